@@ -64,10 +64,15 @@ class IntegranteAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Situação calculada no banco (lida por is_ativo) e ordenável pela coluna "Ativo?"
+        return super().get_queryset(request).com_status()
+
     def is_ativo_display(self, obj):
         return obj.is_ativo
     is_ativo_display.boolean = True
     is_ativo_display.short_description = "Ativo?"
+    is_ativo_display.admin_order_field = 'esta_ativo'
 
 @admin.register(Contrato)
 class ContratoAdmin(admin.ModelAdmin):
@@ -107,4 +112,11 @@ class PrestacaoContasSetorAdmin(admin.ModelAdmin):
 @admin.register(ApontamentoCorrecaoSetor)
 class ApontamentoCorrecaoSetorAdmin(admin.ModelAdmin):
     list_display = ('prestacao', 'autor', 'data_registro')
-    search_fields = ('prestacao__setor__nome', 'autor__username')
\ No newline at end of file
+    search_fields = ('prestacao__setor__nome', 'autor__username')
+from .models import TarefaConsolidacao
+
+@admin.register(TarefaConsolidacao)
+class TarefaConsolidacaoAdmin(admin.ModelAdmin):
+    list_display = ('tipo_apresentacao', 'mes_referencia', 'ano_referencia', 'status', 'arquivos_processados', 'paginas_mescladas', 'data_criacao')
+    list_filter = ('status', 'tipo_apresentacao', 'ano_referencia')
+    readonly_fields = ('data_criacao', 'data_inicio', 'data_fim')
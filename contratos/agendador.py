@@ -0,0 +1,160 @@
+"""
+Agendador das rotinas diárias (comando scheduler), em substituição ao crontab.
+
+As tarefas são declaradas em TAREFAS: nome, horário diário (hora local) e passos. Os passos
+rodam em ordem dentro do próprio processo do agendador, sem reiniciar o Django a cada
+comando, e a falha de um passo interrompe os seguintes (como o '&&' do cron). Cada
+execução fica registrada em ExecucaoTarefa (situação, duração e saída).
+
+Uma tarefa está pendente enquanto o seu horário agendado mais recente (hoje, ou ontem se a
+hora ainda não chegou) não tiver execução registrada. Assim, um horário perdido com o
+agendador parado é executado assim que ele volta (apenas o mais recente; as rotinas são
+diárias e idempotentes). Cada tarefa roda sob uma trava consultiva própria
+(contratos.travas), o que impede execuções sobrepostas mesmo com mais de um agendador.
+"""
+import io
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as horario, timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from contratos.models import ExecucaoTarefa
+from contratos.travas import trava_consultiva
+
+# Apenas o final da saída de cada execução é guardado
+TAMANHO_MAXIMO_SAIDA = 20000
+
+
+@dataclass(frozen=True)
+class Comando:
+    """Passo que executa um comando de gerenciamento."""
+    nome: str
+    argumentos: tuple = ()
+
+    def executar(self, saida):
+        call_command(self.nome, *self.argumentos, stdout=saida, stderr=saida)
+
+    def __str__(self):
+        return ' '.join(('manage.py', self.nome) + self.argumentos)
+
+
+@dataclass(frozen=True)
+class Tarefa:
+    nome: str
+    horario: horario
+    passos: tuple
+    descricao: str = ''
+    validade_trava: int = 60 * 60  # segundos; só vale para a trava em cache (SQLite)
+
+    def _agendado(self, dia):
+        return timezone.make_aware(datetime.combine(dia, self.horario))
+
+    def ultimo_horario(self, agora=None):
+        """Horário agendado mais recente até agora."""
+        agora = timezone.localtime(agora)
+        agendado = self._agendado(agora.date())
+        return agendado if agendado <= agora else self._agendado(agora.date() - timedelta(days=1))
+
+    def proximo_horario(self, agora=None):
+        return self._agendado(timezone.localtime(self.ultimo_horario(agora)).date() + timedelta(days=1))
+
+
+TAREFAS = (
+    Tarefa(
+        'comissoes', horario(0, 0),
+        (Comando('desativar_comissoes_expiradas'), Comando('ativar_comissoes_iniciadas')),
+        'Desativa as comissões encerradas e, em seguida, ativa as iniciadas.',
+    ),
+    Tarefa(
+        'saude_gmail', horario(1, 0),
+        (Comando('verificar_saude_gmail'),),
+        'Verifica a autenticação e o token da Gmail API.',
+    ),
+    Tarefa(
+        'backup', horario(2, 0),
+        (Comando('executar_backup'),),
+        'Backup do banco de dados e dos arquivos de mídia (conforme a periodicidade configurada).',
+        validade_trava=6 * 60 * 60,
+    ),
+)
+
+
+def obter_tarefa(nome):
+    return next((tarefa for tarefa in TAREFAS if tarefa.nome == nome), None)
+
+
+def pendente(tarefa, agendada_para):
+    """Se o horário agendado ainda não tem execução (execuções interrompidas não contam)."""
+    return not ExecucaoTarefa.objects.filter(
+        tarefa=tarefa.nome, agendada_para=agendada_para
+    ).exclude(status='interrompida').exists()
+
+
+def executar(tarefa, agendada_para=None, forcar=False):
+    """
+    Executa a tarefa sob a sua trava e registra a execução. Sem forcar, só executa se o
+    horário agendado (padrão: o mais recente) estiver pendente. Retorna a ExecucaoTarefa,
+    ou None se nada foi executado (tarefa em andamento em outro processo ou já atendida).
+    """
+    agendada_para = agendada_para or tarefa.ultimo_horario()
+    with trava_consultiva(f'agendador:{tarefa.nome}', tarefa.validade_trava) as obtida:
+        if not obtida:
+            return None
+
+        # Com a trava em mãos, execuções ainda em andamento pertencem a um processo que caiu
+        ExecucaoTarefa.objects.filter(tarefa=tarefa.nome, status='executando').update(
+            status='interrompida', data_fim=timezone.now()
+        )
+        if not forcar and not pendente(tarefa, agendada_para):
+            return None
+
+        execucao = ExecucaoTarefa.objects.create(
+            tarefa=tarefa.nome, agendada_para=agendada_para, data_inicio=timezone.now()
+        )
+        saida = io.StringIO()
+        status = 'sucesso'
+        inicio = time.perf_counter()
+        for passo in tarefa.passos:
+            saida.write(f'$ {passo}\n')
+            try:
+                passo.executar(saida)
+            except Exception as e:
+                saida.write(f'[ERRO] {type(e).__name__}: {e}\n')
+                status = 'erro'
+                break
+
+        execucao.status = status
+        execucao.data_fim = timezone.now()
+        execucao.duracao_ms = round((time.perf_counter() - inicio) * 1000)
+        execucao.saida = saida.getvalue()[-TAMANHO_MAXIMO_SAIDA:]
+        execucao.save(update_fields=['status', 'data_fim', 'duracao_ms', 'saida'])
+        return execucao
+
+
+def executar_pendentes(agora=None):
+    """Executa, na ordem de TAREFAS, as tarefas com horário pendente. Retorna as execuções."""
+    execucoes = []
+    for tarefa in TAREFAS:
+        agendada_para = tarefa.ultimo_horario(agora)
+        if pendente(tarefa, agendada_para):
+            execucao = executar(tarefa, agendada_para)
+            if execucao is not None:
+                execucoes.append(execucao)
+    return execucoes
+
+
+def ultimas_execucoes():
+    """Última execução registrada de cada tarefa declarada ({nome: ExecucaoTarefa ou None})."""
+    return {
+        tarefa.nome: ExecucaoTarefa.objects.filter(tarefa=tarefa.nome).defer('saida').first()
+        for tarefa in TAREFAS
+    }
+
+
+def remover_antigas(dias):
+    """Remove do histórico as execuções (já encerradas) iniciadas há mais de 'dias' dias. Retorna quantas."""
+    limite = timezone.now() - timedelta(days=dias)
+    removidas, _ = ExecucaoTarefa.objects.filter(data_inicio__lt=limite).exclude(status='executando').delete()
+    return removidas
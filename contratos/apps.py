@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ContratosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contratos'
+
+    def ready(self):
+        from contratos import busca, permanencia, ponteiros, versoes
+        versoes.conectar_sinais()
+        busca.conectar_sinais()
+        ponteiros.conectar_sinais()
+        permanencia.conectar_sinais()
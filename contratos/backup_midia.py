@@ -0,0 +1,219 @@
+"""
+Backup incremental da pasta de mídia (MEDIA_ROOT), endereçado por conteúdo.
+
+Estrutura no diretório de backup (settings.BACKUP_DIR/midia):
+    objetos/ab/abcdef...   conteúdo de cada arquivo, nomeado pelo seu SHA-256
+    snapshots/AAAAMMDD.json.gz   manifesto do dia: {caminho relativo: sha256, tamanho, mtime}
+
+Cada execução percorre a mídia e monta o manifesto do dia. Arquivos com o mesmo tamanho
+e data de modificação do snapshot anterior reaproveitam o hash sem serem lidos; os
+demais são lidos uma única vez, calculando o hash durante a cópia, e só entram no
+repositório se o conteúdo ainda não existir. Assim o custo diário acompanha o que mudou,
+e não o tamanho acumulado da mídia. Qualquer snapshot é reconstruído a partir do seu
+manifesto (comando restaurar_midia).
+
+Ficam de fora as pastas de arquivos gerados, que o sistema refaz a partir dos uploads:
+o cache de apresentações consolidadas e os PDFs das tarefas de consolidação.
+
+Retenção: remover_snapshots_antigos() apaga os manifestos mais antigos que N dias e,
+em seguida, os objetos que nenhum manifesto restante referencia.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+BLOCO_COPIA = 1024 * 1024
+# Pastas de MEDIA_ROOT (primeiro nível) fora do backup: cache_consolidacao (CONSOLIDACAO_CACHE_DIR)
+# e consolidacoes (TarefaConsolidacao.arquivo)
+PASTAS_IGNORADAS = frozenset({'cache_consolidacao', 'consolidacoes'})
+
+
+@dataclass
+class ResultadoSnapshot:
+    caminho: Path
+    arquivos: int = 0
+    bytes_total: int = 0
+    objetos_novos: int = 0
+    bytes_copiados: int = 0
+    reaproveitados: int = 0
+    duracao_ms: int = 0
+
+
+class RepositorioMidia:
+
+    def __init__(self, raiz):
+        self.raiz = Path(raiz)
+        self.objetos = self.raiz / 'objetos'
+        self.snapshots = self.raiz / 'snapshots'
+
+    def caminho_objeto(self, sha256):
+        return self.objetos / sha256[:2] / sha256
+
+    def caminho_snapshot(self, nome):
+        return self.snapshots / f'{nome}.json.gz'
+
+    def listar_snapshots(self):
+        """Nomes (AAAAMMDD) dos snapshots existentes, do mais antigo ao mais recente."""
+        if not self.snapshots.is_dir():
+            return []
+        return sorted(p.name[:-len('.json.gz')] for p in self.snapshots.glob('*.json.gz'))
+
+    def ler_manifesto(self, nome):
+        with gzip.open(self.caminho_snapshot(nome), 'rt', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+
+    def _gravar_manifesto(self, nome, manifesto):
+        self.snapshots.mkdir(parents=True, exist_ok=True)
+        destino = self.caminho_snapshot(nome)
+        temporario = destino.with_suffix('.tmp')
+        with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, sort_keys=True)
+        os.replace(temporario, destino)
+        return destino
+
+    def _guardar(self, origem):
+        """
+        Copia o arquivo para o repositório calculando o hash na mesma leitura.
+        Retorna (sha256, bytes copiados); 0 se o conteúdo já existia.
+        """
+        self.objetos.mkdir(parents=True, exist_ok=True)
+        hash_ = hashlib.sha256()
+        descritor, temporario = tempfile.mkstemp(dir=self.objetos, suffix='.tmp')
+        try:
+            with open(origem, 'rb') as leitura, os.fdopen(descritor, 'wb') as escrita:
+                while bloco := leitura.read(BLOCO_COPIA):
+                    hash_.update(bloco)
+                    escrita.write(bloco)
+            sha256 = hash_.hexdigest()
+            destino = self.caminho_objeto(sha256)
+            if destino.exists():
+                return sha256, 0
+            destino.parent.mkdir(exist_ok=True)
+            os.replace(temporario, destino)
+            return sha256, destino.stat().st_size
+        finally:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+
+    def criar_snapshot(self, media_root, nome):
+        """Registra o estado atual de media_root como o snapshot 'nome' (AAAAMMDD)."""
+        inicio = time.perf_counter()
+        media_root = Path(media_root)
+        anteriores = [n for n in self.listar_snapshots() if n != nome]
+        anterior = self.ler_manifesto(anteriores[-1])['arquivos'] if anteriores else {}
+
+        arquivos = {}
+        resultado = ResultadoSnapshot(caminho=self.caminho_snapshot(nome))
+        for raiz, pastas, nomes in os.walk(media_root):
+            if Path(raiz) == media_root:
+                pastas[:] = [pasta for pasta in pastas if pasta not in PASTAS_IGNORADAS]
+            for nome_arquivo in nomes:
+                caminho = Path(raiz) / nome_arquivo
+                relativo = caminho.relative_to(media_root).as_posix()
+                estado = caminho.stat()
+                entrada = anterior.get(relativo)
+                if (
+                    entrada and entrada['tamanho'] == estado.st_size and entrada['mtime_ns'] == estado.st_mtime_ns
+                    and self.caminho_objeto(entrada['sha256']).exists()
+                ):
+                    sha256 = entrada['sha256']
+                    resultado.reaproveitados += 1
+                else:
+                    sha256, copiados = self._guardar(caminho)
+                    if copiados:
+                        resultado.objetos_novos += 1
+                        resultado.bytes_copiados += copiados
+                arquivos[relativo] = {'sha256': sha256, 'tamanho': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+                resultado.arquivos += 1
+                resultado.bytes_total += estado.st_size
+
+        self._gravar_manifesto(nome, {'snapshot': nome, 'arquivos': arquivos})
+        resultado.duracao_ms = round((time.perf_counter() - inicio) * 1000)
+        return resultado
+
+    def remover_snapshots_antigos(self, dias, hoje=None):
+        """
+        Apaga os snapshots de mais de 'dias' dias (o mais recente é sempre mantido) e os
+        objetos que deixaram de ser referenciados. Retorna (snapshots removidos,
+        objetos removidos, bytes liberados).
+        """
+        limite = ((hoje or date.today()) - timedelta(days=dias)).strftime('%Y%m%d')
+        removidos = [nome for nome in self.listar_snapshots()[:-1] if nome < limite]
+        for nome in removidos:
+            self.caminho_snapshot(nome).unlink()
+        objetos, liberados = self.coletar_objetos()
+        return removidos, objetos, liberados
+
+    def coletar_objetos(self):
+        """Remove os objetos que nenhum snapshot referencia. Retorna (objetos, bytes liberados)."""
+        if not self.objetos.is_dir():
+            return 0, 0
+        referenciados = set()
+        for nome in self.listar_snapshots():
+            referenciados.update(entrada['sha256'] for entrada in self.ler_manifesto(nome)['arquivos'].values())
+
+        removidos = liberados = 0
+        for objeto in self.objetos.glob('*/*'):
+            if objeto.name not in referenciados:
+                liberados += objeto.stat().st_size
+                objeto.unlink()
+                removidos += 1
+        return removidos, liberados
+
+    def restaurar(self, nome, destino, verificar=False):
+        """
+        Reconstrói o snapshot em destino. Arquivos já presentes com o mesmo tamanho e data de
+        modificação são mantidos. Com verificar=True o hash de cada objeto é conferido.
+        Arquivos de destino que não constam do snapshot não são tocados (ver limpar()).
+        Retorna (arquivos restaurados, arquivos mantidos).
+        """
+        destino = Path(destino)
+        restaurados = mantidos = 0
+        for relativo, entrada in sorted(self.ler_manifesto(nome)['arquivos'].items()):
+            alvo = destino / relativo
+            if alvo.is_file():
+                estado = alvo.stat()
+                if estado.st_size == entrada['tamanho'] and estado.st_mtime_ns == entrada['mtime_ns']:
+                    mantidos += 1
+                    continue
+
+            objeto = self.caminho_objeto(entrada['sha256'])
+            alvo.parent.mkdir(parents=True, exist_ok=True)
+            temporario = alvo.with_name(alvo.name + '.restaurando')
+            hash_ = hashlib.sha256()
+            with open(objeto, 'rb') as leitura, open(temporario, 'wb') as escrita:
+                while bloco := leitura.read(BLOCO_COPIA):
+                    if verificar:
+                        hash_.update(bloco)
+                    escrita.write(bloco)
+            if verificar and hash_.hexdigest() != entrada['sha256']:
+                temporario.unlink()
+                raise ValueError(f'Objeto corrompido no repositório: {objeto} (arquivo {relativo}).')
+            os.replace(temporario, alvo)
+            os.utime(alvo, ns=(entrada['mtime_ns'], entrada['mtime_ns']))
+            restaurados += 1
+        return restaurados, mantidos
+
+    def limpar(self, nome, destino):
+        """
+        Remove de destino os arquivos que não constam do snapshot, fora das pastas ignoradas
+        pelo backup, deixando-o idêntico ao snapshot. Retorna o número de arquivos removidos.
+        """
+        destino = Path(destino)
+        arquivos = self.ler_manifesto(nome)['arquivos']
+        removidos = 0
+        for raiz, pastas, nomes in os.walk(destino):
+            if Path(raiz) == destino:
+                pastas[:] = [pasta for pasta in pastas if pasta not in PASTAS_IGNORADAS]
+            for nome_arquivo in nomes:
+                caminho = Path(raiz) / nome_arquivo
+                if caminho.relative_to(destino).as_posix() not in arquivos:
+                    caminho.unlink()
+                    removidos += 1
+        return removidos
@@ -0,0 +1,222 @@
+"""
+Busca textual de contratos (número, objeto, razão social e nome fantasia) e de
+militares (SARAM, nome de guerra e nome completo).
+
+O texto pesquisável de cada contrato fica normalizado (minúsculas, sem acentos e sem
+pontuação) em Contrato.documento_busca, preenchido pelo sinal pre_save do contrato e
+atualizado nos contratos da empresa quando ela é alterada. Sobre ele:
+
+- PostgreSQL: coluna gerada contratos_contrato.busca_vetor (tsvector na configuração
+  'contratos_pt' = portuguese + unaccent) com índice GIN; ranking por ts_rank.
+- SQLite: tabela FTS5 contratos_contrato_fts (rowid = id do contrato), sincronizada
+  pelos sinais post_save/post_delete; ranking por bm25.
+- Demais bancos: icontains sobre documento_busca, sem ranking.
+
+A coluna/índice do PostgreSQL e a tabela FTS5 são criados pela migração 0038.
+
+Cada termo da busca casa por prefixo ("manut" encontra "manutenção") e todos os termos
+precisam estar presentes. Alterações em massa (QuerySet.update) não disparam sinais:
+use o comando 'reindexar_busca'.
+
+Militares: Agente.nome_de_guerra_busca/nome_completo_busca guardam os nomes
+normalizados em maiúsculas (pre_save do agente). resolver_agentes() tenta primeiro o
+SARAM exato e, sem resultado, procura o texto dentro dos nomes normalizados; no
+PostgreSQL essas colunas têm índices de trigramas (pg_trgm, migração 0039), usados pelo
+LIKE '%...%'.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from contratos.models import Agente, Contrato, Empresa
+
+CONFIGURACAO_PG = 'contratos_pt'
+TABELA_FTS = 'contratos_contrato_fts'
+LIMITE_TERMOS = 10
+
+_fts_disponivel = {}
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com a pontuação trocada por espaços ('Manutenção-12/2026' → 'manutencao 12 2026')."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[^\W_]+', sem_acentos.casefold()))
+
+
+def termos_busca(texto):
+    """Termos (normalizados) de uma busca digitada pelo usuário, limitados a LIMITE_TERMOS."""
+    return normalizar_texto(texto).split()[:LIMITE_TERMOS]
+
+
+def normalizar_nome(texto):
+    """Nome normalizado para as colunas de busca do Agente ('João d'Ávila' → 'JOAO D AVILA')."""
+    return normalizar_texto(texto).upper()
+
+
+def documento_contrato(contrato):
+    """Texto pesquisável do contrato: número, objeto, razão social e nome fantasia da empresa."""
+    empresa = contrato.empresa
+    return normalizar_texto(' '.join(filter(None, [
+        contrato.numero, contrato.objeto, empresa.razao_social, empresa.nome_fantasia,
+    ])))
+
+
+def _usa_fts5(conexao=connection):
+    if conexao.vendor != 'sqlite':
+        return False
+    if conexao.alias not in _fts_disponivel:
+        _fts_disponivel[conexao.alias] = TABELA_FTS in conexao.introspection.table_names()
+    return _fts_disponivel[conexao.alias]
+
+
+def sincronizar_fts(pares):
+    """Grava no índice FTS5 os pares (id do contrato, documento). Sem efeito fora do SQLite."""
+    if not _usa_fts5():
+        return
+    pares = list(pares)
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [(pk,) for pk, _ in pares])
+        cursor.executemany(f"INSERT INTO {TABELA_FTS} (rowid, documento) VALUES (%s, %s)", pares)
+
+
+def reindexar(contratos=None):
+    """
+    Recalcula documento_busca (e o índice FTS5, no SQLite) dos contratos informados
+    ou, sem argumento, de todos. Retorna a quantidade de contratos reindexados.
+    """
+    completo = contratos is None
+    contratos = Contrato.objects.all() if completo else contratos
+    alterados, pares = [], []
+    for contrato in contratos.select_related('empresa').only(
+        'numero', 'objeto', 'documento_busca', 'empresa__razao_social', 'empresa__nome_fantasia'
+    ):
+        documento = documento_contrato(contrato)
+        if documento != contrato.documento_busca:
+            contrato.documento_busca = documento
+            alterados.append(contrato)
+        pares.append((contrato.pk, documento))
+
+    Contrato.objects.bulk_update(alterados, ['documento_busca'], batch_size=500)
+    if completo and _usa_fts5():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABELA_FTS}")
+    sincronizar_fts(pares)
+    return len(pares)
+
+
+def reindexar_agentes():
+    """Recalcula os nomes normalizados de todos os agentes. Retorna quantos foram alterados."""
+    alterados = []
+    for agente in Agente.objects.only('nome_de_guerra', 'nome_completo', 'nome_de_guerra_busca', 'nome_completo_busca'):
+        nomes = (normalizar_nome(agente.nome_de_guerra), normalizar_nome(agente.nome_completo))
+        if nomes != (agente.nome_de_guerra_busca, agente.nome_completo_busca):
+            agente.nome_de_guerra_busca, agente.nome_completo_busca = nomes
+            alterados.append(agente)
+    Agente.objects.bulk_update(alterados, ['nome_de_guerra_busca', 'nome_completo_busca'], batch_size=500)
+    return len(alterados)
+
+
+# --- Consulta ---
+
+def buscar_contratos(texto, queryset=None):
+    """
+    Filtra os contratos (queryset, padrão: todos) que contêm todos os termos de texto
+    e anota 'relevancia' (maior = mais relevante). Sem termos, não retorna nada.
+    """
+    queryset = Contrato.objects.all() if queryset is None else queryset
+    termos = termos_busca(texto)
+    if not termos:
+        return queryset.none().annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        consulta = ' & '.join(f'{termo}:*' for termo in termos)
+        tsquery = f"to_tsquery('{CONFIGURACAO_PG}'::regconfig, %s)"
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT id FROM contratos_contrato WHERE busca_vetor @@ {tsquery}", [consulta])
+        ).annotate(
+            relevancia=RawSQL(f"ts_rank(contratos_contrato.busca_vetor, {tsquery})", [consulta], output_field=FloatField())
+        )
+
+    if _usa_fts5():
+        consulta = ' '.join(f'"{termo}"*' for termo in termos)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s", [consulta])
+        ).annotate(
+            relevancia=RawSQL(
+                f"SELECT -bm25({TABELA_FTS}) FROM {TABELA_FTS} "
+                f"WHERE {TABELA_FTS} MATCH %s AND rowid = contratos_contrato.id",
+                [consulta], output_field=FloatField()
+            )
+        )
+
+    filtro = Q()
+    for termo in termos:
+        filtro &= Q(documento_busca__icontains=termo)
+    return queryset.filter(filtro).annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+
+def resolver_agentes(texto):
+    """
+    Ids dos agentes procurados: o do SARAM exato, quando existir; senão, os que têm o
+    texto (normalizado) no nome de guerra ou no nome completo.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return []
+    ids = list(Agente.objects.filter(saram=texto).values_list('pk', flat=True))
+    if ids:
+        return ids
+    nome = normalizar_nome(texto)
+    if not nome:
+        return []
+    return list(Agente.objects.filter(
+        Q(nome_de_guerra_busca__contains=nome) | Q(nome_completo_busca__contains=nome)
+    ).values_list('pk', flat=True))
+
+
+# --- Sincronização ---
+
+def _preparar_contrato(sender, instance, raw=False, **kwargs):
+    if raw:  # carga de fixtures: use 'reindexar_busca'
+        return
+    instance.documento_busca = documento_contrato(instance)
+
+
+def _preparar_agente(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance.nome_de_guerra_busca = normalizar_nome(instance.nome_de_guerra)
+    instance.nome_completo_busca = normalizar_nome(instance.nome_completo)
+
+
+def _indexar_contrato(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sincronizar_fts([(instance.pk, instance.documento_busca)])
+
+
+def _remover_contrato(sender, instance, **kwargs):
+    if _usa_fts5():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [instance.pk])
+
+
+def _indexar_contratos_da_empresa(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    reindexar(Contrato.objects.filter(empresa=instance))
+
+
+def conectar_sinais():
+    pre_save.connect(_preparar_contrato, sender=Contrato, dispatch_uid='busca_contrato_pre_save')
+    post_save.connect(_indexar_contrato, sender=Contrato, dispatch_uid='busca_contrato_save')
+    post_delete.connect(_remover_contrato, sender=Contrato, dispatch_uid='busca_contrato_delete')
+    post_save.connect(_indexar_contratos_da_empresa, sender=Empresa, dispatch_uid='busca_empresa_save')
+    pre_save.connect(_preparar_agente, sender=Agente, dispatch_uid='busca_agente_pre_save')
@@ -0,0 +1,404 @@
+"""
+Montagem da apresentação consolidada (PDF único) a partir das prestações em
+conformidade e dos slides avulsos de um mês de referência.
+
+O PDF é gravado em um arquivo temporário em disco (SpooledTemporaryFile) em vez
+de um buffer em memória, e cada PDF de origem é fechado assim que suas páginas
+são copiadas para o arquivo final.
+
+O resultado é guardado em cache no MEDIA_ROOT, indexado pelo hash do manifesto
+dos arquivos de origem (identidade, tamanho, data de modificação e ordem): enquanto
+o manifesto não muda, o mesmo PDF é servido sem nova mesclagem.
+
+As tarefas de consolidação em segundo plano (TarefaConsolidacao) usam o mesmo
+motor, executadas pelo comando run_worker. A tarefa concluída apenas referencia o
+PDF do cache (chave_cache), sem gravar uma segunda cópia.
+"""
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from contratos.models import (
+    Contrato, PrestacaoContas, PrestacaoContasSetor, SlideApresentacao, TarefaConsolidacao
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Acima deste tamanho o arquivo temporário deixa a memória e passa para o disco
+TAMANHO_MAXIMO_EM_MEMORIA = 5 * 1024 * 1024
+
+MESES_NOMES = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+
+def itens_apresentacao(tipo_apresentacao, ano, mes, contratos=None):
+    """
+    Retorna a lista ordenada de itens (prestações e slides avulsos) que compõem a apresentação.
+    :param tipo_apresentacao: 'fiscais' (contratos) ou 'gestores' (setores).
+    :param contratos: queryset opcional para restringir os contratos considerados (ex.: vigentes).
+    """
+    if tipo_apresentacao == 'fiscais':
+        prestacoes = PrestacaoContas.objects.filter(
+            ponteiro__ano_referencia=ano, ponteiro__mes_referencia=mes
+        ).select_related('agente', 'agente__posto', 'contrato')
+        if contratos is not None:
+            prestacoes = prestacoes.filter(contrato__in=contratos)
+    else:
+        prestacoes = PrestacaoContasSetor.objects.filter(
+            ponteiro__ano_referencia=ano, ponteiro__mes_referencia=mes
+        ).select_related('agente', 'agente__posto', 'setor')
+
+    prestacoes = list(prestacoes.filter(
+        compor_apresentacao=True,
+        status='ok'
+    ).order_by(
+        'agente__posto__senioridade', 'agente__ordem_manual', 'agente__nome_de_guerra'
+    ))
+
+    slides_avulsos = list(SlideApresentacao.objects.filter(
+        tipo_apresentacao=tipo_apresentacao,
+        ano_referencia=ano,
+        mes_referencia=mes
+    ).order_by('indice_posicao', 'data_registro'))
+
+    # Mescla as listas usando o indice_posicao
+    itens = prestacoes.copy()
+    for s in slides_avulsos:
+        idx = int(s.indice_posicao)
+        if idx > len(itens):
+            idx = len(itens)
+        itens.insert(idx, s)
+    return itens
+
+
+def itens_consolidacao(tipo_apresentacao, ano, mes):
+    """
+    Itens da apresentação consolidada do mês. Para os fiscais, considera apenas
+    os contratos vigentes na data de hoje.
+    """
+    if tipo_apresentacao == 'fiscais':
+        hoje = date.today()
+        contratos_vigentes = Contrato.objects.filter(
+            vigencia_inicio__lte=hoje,
+            vigencia_fim__gte=hoje
+        )
+        return itens_apresentacao('fiscais', ano, mes, contratos=contratos_vigentes)
+    return itens_apresentacao('gestores', ano, mes)
+
+
+def descrever_item(item):
+    """Rótulo do item usado nas mensagens de erro da consolidação."""
+    if isinstance(item, SlideApresentacao):
+        return f"Slide avulso '{item.nome_slide}'"
+    if isinstance(item, PrestacaoContasSetor):
+        return f"Setor {item.setor.sigla or item.setor.nome}"
+    return f"Contrato {item.contrato.numero}"
+
+
+def mesclar_itens(itens, destino, ao_processar=None):
+    """
+    Copia as páginas de cada item para um único PDF gravado em 'destino' (arquivo binário).
+    Retorna (total_de_paginas, erros). Nada é gravado se nenhuma página for aproveitada.
+    :param ao_processar: callback opcional chamado após cada item com
+        (itens_processados, paginas_mescladas, erros).
+    """
+    from pypdf import PdfWriter, PdfReader
+
+    writer = PdfWriter()
+    erros = []
+
+    for processados, item in enumerate(itens, start=1):
+        _copiar_paginas(item, writer, erros, PdfReader)
+        if ao_processar is not None:
+            ao_processar(processados, len(writer.pages), erros)
+
+    total_paginas = len(writer.pages)
+    if total_paginas:
+        writer.write(destino)
+    return total_paginas, erros
+
+
+def _copiar_paginas(item, writer, erros, PdfReader):
+    rotulo = descrever_item(item)
+
+    if not item.arquivo:
+        if isinstance(item, SlideApresentacao):
+            erros.append(f"{rotulo} sem arquivo.")
+        else:
+            erros.append(f"{rotulo}: registro sem arquivo.")
+        return
+
+    caminho = item.arquivo.path
+    if not os.path.isfile(caminho):
+        erros.append(f"{rotulo}: arquivo não encontrado no servidor.")
+        return
+
+    try:
+        # O leitor é fechado logo após a cópia: as páginas já foram clonadas no writer
+        with PdfReader(caminho) as reader:
+            for page in reader.pages:
+                writer.add_page(page)
+    except Exception as e:
+        erros.append(f"{rotulo}: erro ao ler PDF ({e}).")
+
+
+def pico_memoria_kb():
+    """Pico de memória residente do processo (KB), ou None quando indisponível."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def gerar_pdf_consolidado(itens, ao_processar=None):
+    """
+    Gera o PDF consolidado em um arquivo temporário.
+    Retorna (arquivo, total_de_paginas, erros, metricas); o arquivo já vem posicionado no início
+    e deve ser fechado pelo chamador (FileResponse o fecha ao final do envio).
+    """
+    inicio = time.monotonic()
+    arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_MAXIMO_EM_MEMORIA, mode='w+b')
+    total_paginas, erros = mesclar_itens(itens, arquivo, ao_processar)
+    arquivo.seek(0)
+
+    metricas = {
+        'tempo_ms': int((time.monotonic() - inicio) * 1000),
+        'pico_memoria_kb': pico_memoria_kb(),
+        'paginas': total_paginas,
+    }
+    return arquivo, total_paginas, erros, metricas
+
+
+def hash_manifesto(itens):
+    """
+    Calcula o hash do manifesto da apresentação: para cada item, na ordem, o tipo,
+    o id, o nome do arquivo, o tamanho e a data de modificação.
+    """
+    h = hashlib.sha256()
+    for item in itens:
+        linha = [type(item).__name__, str(item.pk), item.arquivo.name if item.arquivo else '']
+        if item.arquivo:
+            try:
+                info = os.stat(item.arquivo.path)
+                linha += [str(info.st_size), str(info.st_mtime_ns)]
+            except OSError:
+                linha.append('ausente')
+        h.update('|'.join(linha).encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def _caminho_cache(chave):
+    return os.path.join(settings.CONSOLIDACAO_CACHE_DIR, f"{chave}.pdf")
+
+
+def _arquivos_cache():
+    """Lista (caminho, tamanho, mtime) dos PDFs em cache."""
+    pasta = settings.CONSOLIDACAO_CACHE_DIR
+    if not os.path.isdir(pasta):
+        return []
+    arquivos = []
+    for nome in os.listdir(pasta):
+        if not nome.endswith('.pdf'):
+            continue
+        caminho = os.path.join(pasta, nome)
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            continue
+        arquivos.append((caminho, info.st_size, info.st_mtime))
+    return arquivos
+
+
+def _salvar_no_cache(chave, arquivo):
+    """Grava o PDF gerado no cache (escrita atômica) e aplica o limite de tamanho."""
+    pasta = settings.CONSOLIDACAO_CACHE_DIR
+    os.makedirs(pasta, exist_ok=True)
+
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as destino:
+            shutil.copyfileobj(arquivo, destino)
+        os.replace(temporario, _caminho_cache(chave))
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    finally:
+        arquivo.seek(0)
+
+    limitar_cache(preservar=_caminho_cache(chave))
+
+
+def limitar_cache(limite_bytes=None, preservar=None):
+    """
+    Remove os PDFs menos usados recentemente até o cache caber no limite.
+    O uso é registrado na data de modificação do arquivo (atualizada a cada acerto).
+    Retorna a quantidade de arquivos removidos.
+    """
+    if limite_bytes is None:
+        limite_bytes = settings.CONSOLIDACAO_CACHE_MAX_MB * 1024 * 1024
+
+    arquivos = sorted(_arquivos_cache(), key=lambda a: a[2])
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    removidos = 0
+    for caminho, tamanho, _ in arquivos:
+        if total <= limite_bytes:
+            break
+        if caminho == preservar:
+            continue
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+
+def limpar_cache():
+    """Apaga todos os PDFs do cache. Retorna (quantidade, bytes liberados)."""
+    quantidade, liberados = 0, 0
+    for caminho, tamanho, _ in _arquivos_cache():
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        quantidade += 1
+        liberados += tamanho
+    return quantidade, liberados
+
+
+def obter_pdf_consolidado(itens, ao_processar=None):
+    """
+    Devolve o PDF consolidado a partir do cache quando o manifesto não mudou;
+    caso contrário gera um novo e o guarda no cache (apenas se não houve erros,
+    para que os avisos continuem aparecendo até o problema ser corrigido).
+    Mesmo retorno de gerar_pdf_consolidado; metricas['cache'] indica HIT ou MISS.
+    """
+    inicio = time.monotonic()
+    chave = hash_manifesto(itens)
+    caminho = _caminho_cache(chave)
+
+    try:
+        arquivo = open(caminho, 'rb')
+    except OSError:
+        arquivo = None
+
+    if arquivo is not None:
+        # Marca o uso para a política LRU
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        metricas = {
+            'tempo_ms': int((time.monotonic() - inicio) * 1000),
+            'pico_memoria_kb': pico_memoria_kb(),
+            'paginas': None,
+            'cache': 'HIT',
+        }
+        return arquivo, None, [], metricas
+
+    arquivo, total_paginas, erros, metricas = gerar_pdf_consolidado(itens, ao_processar)
+    metricas['cache'] = 'MISS'
+    if total_paginas and not erros:
+        try:
+            _salvar_no_cache(chave, arquivo)
+        except OSError:
+            # Falha no cache não impede o download
+            pass
+    return arquivo, total_paginas, erros, metricas
+
+
+def aplicar_cabecalhos_metricas(response, metricas):
+    """Expõe o tempo de geração, o pico de memória e o uso do cache nos cabeçalhos da resposta."""
+    response['X-Consolidacao-Tempo-Ms'] = str(metricas['tempo_ms'])
+    if metricas.get('paginas') is not None:
+        response['X-Consolidacao-Paginas'] = str(metricas['paginas'])
+    if metricas.get('pico_memoria_kb') is not None:
+        response['X-Consolidacao-Pico-Memoria-KB'] = str(metricas['pico_memoria_kb'])
+    if metricas.get('cache'):
+        response['X-Consolidacao-Cache'] = metricas['cache']
+    return response
+
+
+def nome_arquivo_consolidado(tipo_apresentacao, ano, mes):
+    nome_mes = MESES_NOMES[mes - 1] if 1 <= mes <= 12 else str(mes)
+    if tipo_apresentacao == 'gestores':
+        return f"Apresentacao_Consolidada_Setores_{nome_mes}_{ano}.pdf"
+    return f"Apresentacao_Consolidada_{nome_mes}_{ano}.pdf"
+
+
+def caminho_pdf_tarefa(tarefa):
+    """
+    Caminho do PDF de uma tarefa concluída: a entrada do cache que ela referencia ou a
+    cópia própria. None se o arquivo não existe mais (ex.: removido do cache pelo limite).
+    """
+    if tarefa.chave_cache:
+        caminho = _caminho_cache(tarefa.chave_cache)
+    elif tarefa.arquivo:
+        caminho = tarefa.arquivo.path
+    else:
+        return None
+    return caminho if os.path.exists(caminho) else None
+
+
+def processar_tarefa(tarefa):
+    """
+    Executa uma TarefaConsolidacao já marcada como 'processando', gravando o progresso
+    a cada arquivo e, ao final, a referência ao PDF consolidado no cache.
+    """
+    itens = itens_consolidacao(tarefa.tipo_apresentacao, tarefa.ano_referencia, tarefa.mes_referencia)
+    TarefaConsolidacao.objects.filter(pk=tarefa.pk).update(arquivos_total=len(itens))
+    tarefa.arquivos_total = len(itens)
+
+    def ao_processar(processados, paginas, erros):
+        TarefaConsolidacao.objects.filter(pk=tarefa.pk).update(
+            arquivos_processados=processados,
+            paginas_mescladas=paginas,
+            erros='\n'.join(erros),
+        )
+
+    if not itens:
+        tarefa.status = 'erro'
+        tarefa.erros = "Nenhum slide em conformidade para consolidar."
+        tarefa.data_fim = timezone.now()
+        tarefa.save(update_fields=['status', 'erros', 'data_fim'])
+        return tarefa
+
+    chave = hash_manifesto(itens)
+    arquivo, total_paginas, erros, metricas = obter_pdf_consolidado(itens, ao_processar)
+    try:
+        tarefa.arquivos_processados = len(itens)
+        if total_paginas is None:
+            # Veio do cache: conta as páginas sem mesclar novamente
+            from pypdf import PdfReader
+            total_paginas = len(PdfReader(arquivo).pages)
+            arquivo.seek(0)
+        tarefa.paginas_mescladas = total_paginas
+        if total_paginas == 0:
+            erros = erros + ["Nenhuma página válida encontrada para consolidar."]
+            tarefa.status = 'erro'
+        else:
+            if not erros and os.path.exists(_caminho_cache(chave)):
+                tarefa.chave_cache = chave
+            else:
+                # Resultado com erros não entra no cache (ou o cache falhou): cópia própria
+                nome = nome_arquivo_consolidado(tarefa.tipo_apresentacao, tarefa.ano_referencia, tarefa.mes_referencia)
+                tarefa.arquivo.save(nome, File(arquivo), save=False)
+            tarefa.status = 'concluida'
+        tarefa.erros = '\n'.join(erros)
+    finally:
+        arquivo.close()
+
+    tarefa.data_fim = timezone.now()
+    tarefa.save()
+    return tarefa
@@ -0,0 +1,47 @@
+"""
+Contadores de registros exibidos na página inicial do portal.
+
+Os seis totais vêm de uma única consulta (subconsultas COUNT(*) em um só SELECT) e
+ficam memorizados em cada worker junto com as versões dos domínios de que dependem
+(contratos.versoes). Enquanto as versões não mudam, a página consulta apenas elas.
+"""
+from django.db import connection
+
+from contratos.models import Agente, CargoRegimental, Comissao, Contrato, Empresa, Integrante
+from contratos.versoes import versoes
+
+CONTADORES = {
+    'total_empresas': Empresa,
+    'total_contratos': Contrato,
+    'total_agentes': Agente,
+    'total_integrantes': Integrante,
+    'total_comissoes': Comissao,
+    'total_cargos': CargoRegimental,
+}
+DOMINIOS = ['contratos', 'setores']
+
+_memorizado = {'versoes': None, 'contadores': None}
+
+
+def contar_registros():
+    """Os totais de CONTADORES, calculados em uma única consulta."""
+    quote = connection.ops.quote_name
+    subconsultas = ', '.join(
+        f'(SELECT COUNT(*) FROM {quote(modelo._meta.db_table)})' for modelo in CONTADORES.values()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {subconsultas}')
+        return dict(zip(CONTADORES, cursor.fetchone()))
+
+
+def contadores_portal():
+    """Totais da página inicial do portal, recalculados apenas quando os dados mudam."""
+    atuais = versoes(DOMINIOS)
+    memorizado = _memorizado
+    if memorizado['versoes'] != atuais:
+        memorizado.update(versoes=atuais, contadores=contar_registros())
+    return dict(memorizado['contadores'])
+
+
+def descartar_contadores():
+    _memorizado.update(versoes=None, contadores=None)
@@ -0,0 +1,140 @@
+"""
+Listagem paginada, ordenável e filtrável do portal (usada por generico_listar).
+
+As colunas declaradas em fields_display ((caminho, rótulo), com caminhos no formato do
+ORM, ex.: 'empresa__cnpj') definem a consulta: cada relação percorrida entra no
+select_related() e apenas as colunas exibidas são lidas (only()). Assim cada página
+custa duas consultas (contagem e itens), qualquer que seja o tamanho da lista.
+
+Parâmetros GET: q (texto procurado nas colunas de texto), ordem (caminho da coluna,
+com '-' para ordem decrescente), pagina e por_pagina.
+"""
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import models
+from django.db.models import Q
+
+OPCOES_POR_PAGINA = (10, 20, 50, 100)
+POR_PAGINA_PADRAO = 20
+TIPOS_PESQUISAVEIS = (models.CharField, models.TextField)
+
+
+@dataclass(frozen=True)
+class Coluna:
+    caminho: str
+    rotulo: str
+    campo: models.Field = None   # None: atributo que não é campo do modelo (apenas exibido)
+    relacoes: tuple = ()         # caminhos das relações percorridas (select_related)
+
+    @property
+    def ordenavel(self):
+        return self.campo is not None
+
+    @property
+    def pesquisavel(self):
+        return isinstance(self.campo, TIPOS_PESQUISAVEIS)
+
+    def valor(self, objeto):
+        """Valor exibido da coluna: texto da escolha (choices), __str__ da relação ou o próprio valor."""
+        partes = self.caminho.split('__')
+        for parte in partes[:-1]:
+            objeto = getattr(objeto, parte, None)
+            if objeto is None:
+                return None
+        if self.campo is not None and self.campo.choices:
+            return getattr(objeto, f'get_{partes[-1]}_display')()
+        valor = getattr(objeto, partes[-1], None)
+        return str(valor) if isinstance(valor, models.Model) else valor
+
+
+def colunas_da_listagem(model, fields_display):
+    colunas = []
+    for caminho, rotulo in fields_display:
+        opcoes, campo, relacoes = model._meta, None, []
+        partes = caminho.split('__')
+        try:
+            for indice, parte in enumerate(partes):
+                campo = opcoes.get_field(parte)
+                if indice < len(partes) - 1:
+                    if not campo.many_to_one:
+                        raise FieldDoesNotExist(caminho)
+                    relacoes.append('__'.join(partes[:indice + 1]))
+                    opcoes = campo.related_model._meta
+        except FieldDoesNotExist:
+            campo, relacoes = None, []
+        if campo is not None and campo.many_to_one:
+            relacoes.append(caminho)
+        colunas.append(Coluna(caminho, rotulo, campo, tuple(relacoes)))
+    return colunas
+
+
+def queryset_da_listagem(model, colunas):
+    """select_related() das relações exibidas e only() das colunas (se todas forem campos do modelo)."""
+    queryset = model.objects.all()
+    relacoes = sorted({relacao for coluna in colunas for relacao in coluna.relacoes})
+    if relacoes:
+        queryset = queryset.select_related(*relacoes)
+    if all(coluna.campo is not None for coluna in colunas):
+        queryset = queryset.only(*(coluna.caminho for coluna in colunas))
+    return queryset
+
+
+def montar_listagem(model, fields_display, params):
+    """Aplica filtro, ordenação e paginação conforme params (request.GET)."""
+    colunas = colunas_da_listagem(model, fields_display)
+    queryset = queryset_da_listagem(model, colunas)
+
+    q = (params.get('q') or '').strip()
+    if q:
+        filtro = Q()
+        for coluna in colunas:
+            if coluna.pesquisavel:
+                filtro |= Q(**{f'{coluna.caminho}__icontains': q})
+        queryset = queryset.filter(filtro) if filtro else queryset.none()
+
+    ordenaveis = {coluna.caminho for coluna in colunas if coluna.ordenavel}
+    ordem = params.get('ordem') or ''
+    if ordem.lstrip('-') not in ordenaveis:
+        ordem = ''
+    padrao = list(model._meta.ordering) or [next((c.caminho for c in colunas if c.ordenavel), 'pk')]
+    queryset = queryset.order_by(*([ordem] if ordem else padrao), 'pk')
+
+    try:
+        por_pagina = int(params.get('por_pagina', POR_PAGINA_PADRAO))
+    except (TypeError, ValueError):
+        por_pagina = POR_PAGINA_PADRAO
+    if por_pagina not in OPCOES_POR_PAGINA:
+        por_pagina = POR_PAGINA_PADRAO
+
+    pagina = Paginator(queryset, por_pagina).get_page(params.get('pagina'))
+    return {
+        'colunas': colunas,
+        'pagina': pagina,
+        'q': q,
+        'ordem': ordem,
+        'por_pagina': por_pagina,
+    }
+
+
+def serializar_listagem(listagem):
+    """Página da listagem como dicionário serializável (modo JSON para tabelas no cliente)."""
+    pagina = listagem['pagina']
+    colunas = listagem['colunas']
+    return {
+        'total': pagina.paginator.count,
+        'pagina': pagina.number,
+        'paginas': pagina.paginator.num_pages,
+        'por_pagina': listagem['por_pagina'],
+        'q': listagem['q'],
+        'ordem': listagem['ordem'],
+        'colunas': [
+            {'campo': coluna.caminho, 'rotulo': coluna.rotulo, 'ordenavel': coluna.ordenavel}
+            for coluna in colunas
+        ],
+        'itens': [
+            dict({'pk': item.pk}, **{coluna.caminho: coluna.valor(item) for coluna in colunas})
+            for item in pagina.object_list
+        ],
+    }
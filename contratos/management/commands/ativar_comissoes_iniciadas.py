@@ -1,25 +1,53 @@
-from django.core.management.base import BaseCommand
 from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from contratos import versoes
 from contratos.models import Comissao
+from contratos.travas import trava_consultiva
 
 
 class Command(BaseCommand):
     help = 'Ativa automaticamente comissões inativas cuja data de início chegou.'
 
     def handle(self, *args, **kwargs):
-        hoje = date.today()
+        # Duas execuções simultâneas poderiam ativar duas comissões do mesmo tipo para o mesmo contrato
+        with trava_consultiva('ativar_comissoes_iniciadas') as obtida:
+            if not obtida:
+                self.stdout.write(self.style.WARNING(
+                    'Outra execução de ativar_comissoes_iniciadas está em andamento. Nada foi feito.'
+                ))
+                return
+            with transaction.atomic():
+                self._ativar(date.today())
+
+    def _ativar(self, hoje):
+        # Comissões INATIVAS com data_inicio igual ou anterior a hoje, exceto as que já expiraram.
+        # Se data_fim for nulo a comissão é candidata (comissões por tempo indeterminado).
+        filtro_candidatas = Q(ativa=False, data_inicio__lte=hoje) & ~Q(data_fim__lt=hoje)
 
-        # Busca comissões que estão INATIVAS mas com data_inicio igual ou anterior a hoje
-        comissoes_para_ativar = Comissao.objects.filter(
-            ativa=False,
-            data_inicio__lte=hoje,
-        ).exclude(
-            # Não reativa comissões que já expiraram (data_fim no passado)
-            data_fim__lt=hoje,
+        # REGRA DE NEGÓCIO: não permitir duas comissões ativas do mesmo tipo para o mesmo contrato.
+        # Uma única consulta traz as candidatas e as comissões já ativas dos mesmos contratos,
+        # numeradas por (contrato, tipo) com as ativas primeiro: só a candidata de posição 1
+        # (grupo sem comissão ativa) pode ser ativada; as demais são ignoradas.
+        linhas = list(
+            Comissao.objects.filter(
+                filtro_candidatas |
+                Q(ativa=True, contrato_id__in=Comissao.objects.filter(filtro_candidatas).values('contrato_id'))
+            )
+            .annotate(posicao=Window(
+                RowNumber(),
+                partition_by=[F('contrato_id'), F('tipo')],
+                order_by=[F('ativa').desc(), F('pk').asc()],
+            ))
+            .order_by('tipo', 'pk')
+            .values_list('pk', 'ativa', 'contrato_id', 'contrato__numero', 'tipo', 'data_inicio', 'posicao')
         )
-        # Atenção: Se data_fim for nulo, a comissão NÃO será excluída (ou seja, será ativada).
-        # Isso atende comissões por tempo indeterminado.
-        total_candidatas = comissoes_para_ativar.count()
+        candidatas = [linha for linha in linhas if not linha[1]]
+        total_candidatas = len(candidatas)
 
         if total_candidatas == 0:
             self.stdout.write(self.style.SUCCESS('Nenhuma comissão para ativar hoje.'))
@@ -27,41 +55,37 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.WARNING(f'{total_candidatas} comissão(ões) candidata(s) encontrada(s). Verificando duplicatas...'))
 
-        ativadas = 0
-        ignoradas = 0
+        tipos = dict(Comissao.TIPO_CHOICES)
+        ativar = []
+        mensagens = []
+        for pk, _, contrato_id, numero, tipo, data_inicio, posicao in candidatas:
+            if contrato_id and posicao > 1:
+                mensagens.append(self.style.WARNING(
+                    f'[IGNORADA] Comissão {pk} '
+                    f'({tipos.get(tipo, tipo)} - Contrato {numero}) '
+                    f'não ativada: já existe outra comissão ativa do mesmo tipo para este contrato.'
+                ))
+                continue
 
-        for comissao in comissoes_para_ativar:
-            # REGRA DE NEGÓCIO: Não permitir duas comissões ativas do mesmo tipo
-            # para o mesmo contrato (comissões de contrato)
-            if comissao.contrato:
-                ja_existe_ativa = Comissao.objects.filter(
-                    contrato=comissao.contrato,
-                    tipo=comissao.tipo,
-                    ativa=True,
-                ).exclude(pk=comissao.pk).exists()
-
-                if ja_existe_ativa:
-                    ignoradas += 1
-                    msg = (
-                        f'[IGNORADA] Comissão {comissao.id} '
-                        f'({comissao.get_tipo_display()} - Contrato {comissao.contrato.numero}) '
-                        f'não ativada: já existe outra comissão ativa do mesmo tipo para este contrato.'
-                    )
-                    self.stdout.write(self.style.WARNING(msg))
-                    continue
-
-            comissao.ativa = True
-            comissao.save()
-            ativadas += 1
-
-            contrato_info = f'Contrato {comissao.contrato.numero}' if comissao.contrato else f'{comissao.get_tipo_display()}'
-            msg = (
-                f'[OK] Comissão {comissao.id} '
+            ativar.append(pk)
+            contrato_info = f'Contrato {numero}' if contrato_id else f'{tipos.get(tipo, tipo)}'
+            mensagens.append(
+                f'[OK] Comissão {pk} '
                 f'({contrato_info}) ativada. '
-                f'Início: {comissao.data_inicio}'
+                f'Início: {data_inicio}'
             )
-            self.stdout.write(msg)
 
+        # Atualização em lote não dispara save() nem sinais: a versão dos dados é incrementada aqui.
+        # A condição ativa=False mantém o comando idempotente.
+        if ativar:
+            Comissao.objects.filter(pk__in=ativar, ativa=False).update(ativa=True)
+            versoes.incrementar('contratos')
+
+        for mensagem in mensagens:
+            self.stdout.write(mensagem)
+
+        ativadas = len(ativar)
+        ignoradas = total_candidatas - ativadas
         resumo = f'Processo concluído. {ativadas} comissão(ões) ativada(s).'
         if ignoradas:
             resumo += f' {ignoradas} comissão(ões) ignorada(s) por conflito de duplicidade.'
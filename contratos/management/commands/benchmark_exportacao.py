@@ -0,0 +1,91 @@
+import time
+import tracemalloc
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from contratos.models import Contrato, Empresa, Agente, PostoGraduacao, PrestacaoContas
+from contratos.views.prestacao import exportar_historico_prestacao_csv
+
+
+class _Descartar(Exception):
+    """Usada para desfazer a massa de dados ao final da medição."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede tempo e pico de memória da exportação do histórico de prestações (CSV e XLSX) '
+        'sobre uma massa sintética. Os dados são criados em transação e descartados ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100000, help='Quantidade de envios sintéticos (padrão: 100000).')
+        parser.add_argument('--formato', choices=['csv', 'xlsx', 'ambos'], default='ambos')
+        parser.add_argument(
+            '--memoria',
+            action='store_true',
+            help='Mede também o pico de memória alocada (tracemalloc). Torna a execução bem mais lenta.',
+        )
+
+    def handle(self, *args, **options):
+        formatos = ['csv', 'xlsx'] if options['formato'] == 'ambos' else [options['formato']]
+        try:
+            with transaction.atomic():
+                usuario = self.criar_massa(options['linhas'])
+                for formato in formatos:
+                    self.medir(usuario, formato, options['linhas'], options['memoria'])
+                raise _Descartar()
+        except _Descartar:
+            pass
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído (massa de dados descartada).'))
+
+    def criar_massa(self, linhas):
+        self.stdout.write(f'Criando {linhas} envio(s) sintético(s)...')
+        posto = PostoGraduacao.objects.create(sigla='BEN', descricao='Benchmark', senioridade=99)
+        agente = Agente.objects.create(nome_completo='Agente Benchmark', nome_de_guerra='Benchmark', posto=posto, saram='0000000')
+        empresa = Empresa.objects.create(razao_social='Empresa Benchmark', cnpj='00000000000000')
+        contratos = Contrato.objects.bulk_create([
+            Contrato(
+                numero=f'BENCH-{i}', objeto='Objeto de benchmark', empresa=empresa,
+                vigencia_inicio=date(2020, 1, 1), vigencia_fim=date(2030, 12, 31), valor_total='1000.00'
+            )
+            for i in range(100)
+        ])
+
+        # bulk_create não passa por save(): os ponteiros de última prestação não são afetados
+        lote = []
+        for i in range(linhas):
+            lote.append(PrestacaoContas(
+                contrato=contratos[i % len(contratos)], agente=agente,
+                ano_referencia=2020 + (i // 1200) % 10, mes_referencia=(i // 100) % 12 + 1,
+                arquivo='benchmark.pdf', status='entregue', observacao='Envio sintético',
+            ))
+            if len(lote) == 5000:
+                PrestacaoContas.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            PrestacaoContas.objects.bulk_create(lote)
+
+        return User.objects.create_superuser(username='benchmark_exportacao', email='', password=None)
+
+    def medir(self, usuario, formato, linhas, memoria):
+        request = RequestFactory().get('/', {'formato': formato})
+        request.user = usuario
+
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        response = exportar_historico_prestacao_csv(request)
+        tamanho = 0
+        # response.close() não é chamado: dispararia request_finished e fecharia a conexão
+        for bloco in response.streaming_content:
+            tamanho += len(bloco)
+        duracao = time.perf_counter() - inicio
+
+        resultado = f'[{formato.upper()}] {linhas} linha(s): {duracao:.2f}s, {tamanho / (1024 * 1024):.1f} MB gerados'
+        if memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            resultado += f', pico de memória {pico / (1024 * 1024):.1f} MB'
+        self.stdout.write(resultado + '.')
@@ -1,44 +1,93 @@
+import time
+from datetime import date
+
 from django.core.management.base import BaseCommand
-from datetime import date, timedelta
-from django.db import models
-from contratos.models import Comissao
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from contratos import versoes
+from contratos.models import Comissao, Integrante
+
 
 class Command(BaseCommand):
-    help = 'Desativa automaticamente comissões cuja data de fim já expirou.'
+    help = (
+        'Desativa automaticamente comissões cuja data de fim já expirou e encerra, na mesma data, '
+        'as designações que ultrapassam o fim da comissão.'
+    )
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas informa o que seria alterado; nenhuma alteração é gravada.',
+        )
+
+    def handle(self, *args, **options):
+        simulacao = options['dry_run']
         hoje = date.today()
-        
-        # Busca comissões que estão ATIVAS mas com data_fim ANTERIOR a hoje
-        comissoes_expiradas = Comissao.objects.filter(ativa=True, data_fim__lt=hoje)
-        total = comissoes_expiradas.count()
+        inicio = time.perf_counter()
+
+        # Tudo em uma transação, com atualizações em lote: a quantidade de consultas não depende
+        # do número de comissões. Na simulação as mesmas consultas rodam e a transação é desfeita.
+        with transaction.atomic():
+            expiradas = list(
+                Comissao.objects
+                .filter(ativa=True, data_fim__lt=hoje)
+                .order_by('pk')
+                .values_list('pk', 'tipo', 'contrato__numero', 'data_fim')
+            )
+            ids = [pk for pk, *_ in expiradas]
+
+            integrantes = 0
+            grupos = 0
+            if ids:
+                Comissao.objects.filter(pk__in=ids).update(ativa=False)
+
+                # Designações que ultrapassam o fim da comissão (ou sem fim) passam a terminar com ela
+                ajustar = Integrante.objects.filter(comissao_id__in=ids).filter(
+                    Q(data_fim__isnull=True) | Q(data_fim__gt=F('comissao__data_fim'))
+                )
+                chaves = set(ajustar.values_list(
+                    'comissao__contrato_id', 'comissao__tipo', 'agente_id', 'funcao_id'
+                ).distinct())
+                integrantes = ajustar.update(data_fim=Subquery(
+                    Comissao.objects.filter(pk=OuterRef('comissao_id')).values('data_fim')[:1]
+                ))
+
+                # Atualizações em lote não disparam save() nem sinais: sequências e versão dos dados
+                # são atualizadas aqui
+                if chaves:
+                    Integrante.recalcular_sequencias(Integrante.objects.filter(
+                        Integrante.filtro_sequencias(chaves)
+                    ))
+                    grupos = sum(1 for chave in chaves if chave[0] is not None)
+                versoes.incrementar('contratos')
+
+            if simulacao:
+                transaction.set_rollback(True)
+
+        duracao_ms = round((time.perf_counter() - inicio) * 1000)
+        total = len(ids)
+        prefixo = '[SIMULAÇÃO] ' if simulacao else ''
 
         if total == 0:
             self.stdout.write(self.style.SUCCESS('Nenhuma comissão expirada encontrada para desativar hoje.'))
-            return
-
-        self.stdout.write(self.style.WARNING(f'Iniciando desativação de {total} comissões expiradas...'))
-
-        for comissao in comissoes_expiradas:
-            comissao.ativa = False
-            
-            # Garante que a data_fim da comissão seja mantida.
-            # Se for nula (o que não deveria ocorrer para expiradas), força para hoje - 1.
-            if not comissao.data_fim:
-                comissao.data_fim = hoje - timedelta(days=1)
-                
-            comissao.save()
-            
-            # Atualiza os integrantes: se a data_fim do integrante for maior que a da comissão,
-            # ou se for nula, ajusta para a data_fim da comissão.
-            integrantes_ativos = comissao.integrantes.filter(
-                models.Q(data_fim__gt=comissao.data_fim) | models.Q(data_fim__isnull=True)
-            )
-            for integrante in integrantes_ativos:
-                integrante.data_fim = comissao.data_fim
-                integrante.save(update_fields=['data_fim'])
+        else:
+            self.stdout.write(self.style.WARNING(f'{prefixo}Iniciando desativação de {total} comissões expiradas...'))
+            tipos = dict(Comissao.TIPO_CHOICES)
+            for pk, tipo, numero, data_fim in expiradas:
+                contrato_info = f'Contrato {numero}' if numero else tipos.get(tipo, tipo)
+                self.stdout.write(f'{prefixo}[OK] Comissão {pk} ({contrato_info}) desativada. Fim da vigência: {data_fim}')
 
-            msg = f'[OK] Comissão {comissao.id} (Contrato {comissao.contrato.numero}) desativada. Fim da vigência: {comissao.data_fim}'
-            self.stdout.write(msg)
+            if simulacao:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Simulação concluída. {total} comissões seriam desativadas; nada foi gravado.'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Processo concluído. {total} comissões foram desativadas.'))
 
-        self.stdout.write(self.style.SUCCESS(f'Processo concluído. {total} comissões foram desativadas.'))
+        # Linha única, no formato chave=valor, para acompanhamento pelo log do cron
+        self.stdout.write(
+            f'[RESUMO] comissoes={total} integrantes={integrantes} grupos_sequencia={grupos} '
+            f'duracao_ms={duracao_ms} simulacao={"sim" if simulacao else "nao"}'
+        )
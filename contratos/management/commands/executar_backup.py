@@ -1,14 +1,47 @@
 import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
 import datetime
+import tempfile
 import subprocess
-import zipfile
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from contratos.backup_midia import RepositorioMidia
 from contratos.models import ConfiguracaoSistema
 
+# Registro (uma linha JSON por arquivo gerado) com tamanho, duração e checksum de cada backup
+ARQUIVO_MANIFESTO = 'manifesto.jsonl'
+# Páginas copiadas por passo da API de backup do SQLite: entre os passos outras conexões podem gravar
+PAGINAS_POR_PASSO = 1024
+BLOCO_COPIA = 1024 * 1024
+
+
+def compressor_disponivel():
+    """Compressor externo usado no pipe do pg_dump: zstd (mais rápido) se instalado, senão gzip."""
+    if shutil.which('zstd'):
+        return ['zstd', '-q', '-3', '-T0', '-c'], '.zst'
+    return ['gzip', '-6', '-c'], '.gz'
+
+
+def sha256_arquivo(caminho):
+    with open(caminho, 'rb') as arquivo:
+        return hashlib.file_digest(arquivo, 'sha256').hexdigest()
+
+
 class Command(BaseCommand):
-    help = 'Executa rotina de backup baseada nas configurações no banco de dados'
+    help = (
+        'Executa rotina de backup baseada nas configurações no banco de dados. O banco é copiado '
+        'compactado (PostgreSQL: pg_dump em formato custom; SQLite: API de backup online) e a mídia '
+        'entra em um snapshot incremental (contratos.backup_midia). Cada arquivo gerado é registrado '
+        f'em {ARQUIVO_MANIFESTO} com tamanho, duração e SHA-256.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -16,10 +49,28 @@ class Command(BaseCommand):
             action='store_true',
             help='Ignora a periodicidade e força a execução do backup agora',
         )
+        parser.add_argument(
+            '--formato',
+            choices=['custom', 'sql'],
+            default='custom',
+            help=(
+                "Formato do dump do PostgreSQL: 'custom' (padrão, restaurado com pg_restore) ou "
+                "'sql' (texto puro). Em ambos o dump é compactado durante a gravação."
+            ),
+        )
+        parser.add_argument(
+            '--reter-dias',
+            type=int,
+            default=settings.BACKUP_MIDIA_RETER_DIAS,
+            help=(
+                'Remove os snapshots da mídia mais antigos que N dias e os arquivos que só eles '
+                'referenciavam (padrão: BACKUP_MIDIA_RETER_DIAS).'
+            ),
+        )
 
     def handle(self, *args, **options):
         self.stdout.write("Iniciando rotina de backup...")
-        
+
         try:
             config = ConfiguracaoSistema.get_config()
         except Exception as e:
@@ -27,12 +78,12 @@ class Command(BaseCommand):
             return
 
         periodicidade = config.backup_periodicidade
-        backup_dir_path = '/backups'
-        
+        backup_dir_path = settings.BACKUP_DIR
+
         # Validar periodicidade (se é dia de rodar o backup)
         hoje = datetime.date.today()
         force = options.get('force', False)
-        
+
         if not force:
             # Se for 'diario', sempre roda.
             if periodicidade == 'semanal':
@@ -55,11 +106,53 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Não foi possível criar/acessar o diretório de backup {backup_dir_path}: {e}"))
             return
-            
+
         data_str = hoje.strftime("%Y%m%d")
-        
-        # 1. Backup do Banco de Dados (Postgres)
+
+        # 1. Backup do Banco de Dados
         self.stdout.write("Realizando dump do banco de dados...")
+        if connection.vendor == 'sqlite':
+            self.backup_sqlite(backup_dir, data_str)
+        else:
+            self.backup_postgresql(backup_dir, data_str, options.get('formato', 'custom'))
+
+        # 2. Backup da Pasta Media (Arquivos): incremental, apenas o conteúdo novo é copiado
+        self.stdout.write("Atualizando backup incremental da pasta mediafiles...")
+        media_root = settings.MEDIA_ROOT
+
+        if os.path.exists(media_root):
+            try:
+                inicio = time.perf_counter()
+                repositorio = RepositorioMidia(backup_dir / 'midia')
+                resultado = repositorio.criar_snapshot(media_root, data_str)
+                self.registrar(
+                    backup_dir, 'midia', resultado.caminho, inicio,
+                    arquivos=resultado.arquivos, bytes_total=resultado.bytes_total,
+                    objetos_novos=resultado.objetos_novos, bytes_copiados=resultado.bytes_copiados,
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"Snapshot da mídia salvo em: {resultado.caminho} ({resultado.arquivos} arquivo(s), "
+                    f"{resultado.objetos_novos} novo(s), {resultado.bytes_copiados} bytes copiados)"
+                ))
+                snapshots, objetos, liberados = repositorio.remover_snapshots_antigos(options['reter_dias'], hoje)
+                if snapshots or objetos:
+                    self.stdout.write(
+                        f"Retenção da mídia: {len(snapshots)} snapshot(s) e {objetos} arquivo(s) "
+                        f"removido(s), {liberados} bytes liberados."
+                    )
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Erro no backup da pasta media: {e}"))
+        else:
+            self.stdout.write(self.style.WARNING("Pasta MEDIA_ROOT não encontrada. Nenhuma mídia copiada."))
+
+        self.stdout.write(self.style.SUCCESS("Rotina de backup finalizada."))
+
+    def backup_postgresql(self, backup_dir, data_str, formato):
+        """
+        pg_dump com a saída ligada diretamente à entrada do compressor e este ao arquivo de
+        destino: os dados passam de um processo ao outro pelo pipe, sem passar pelo Python.
+        Restauração: zstd -dc (ou gunzip -c) arquivo | pg_restore -d banco.
+        """
         # Usa as configurações atuais do Django para chamar pg_dump
         db_settings = settings.DATABASES['default']
         db_name = db_settings['NAME']
@@ -68,53 +161,111 @@ class Command(BaseCommand):
         db_port = db_settings.get('PORT', '5432')
         db_pass = db_settings.get('PASSWORD', '')
 
-        sql_file_path = backup_dir / f"db_backup_{data_str}.sql"
-        
+        compressor, extensao = compressor_disponivel()
+        sufixo = '.dump' if formato == 'custom' else '.sql'
+        dump_file_path = backup_dir / f"db_backup_{data_str}{sufixo}{extensao}"
+
         env = os.environ.copy()
         if db_pass:
             env['PGPASSWORD'] = db_pass
-            
+
         dump_command = [
             'pg_dump',
             '-h', db_host,
             '-p', str(db_port),
             '-U', db_user,
             '-d', db_name,
-            '-F', 'p',  # formato em texto puro (plain text), legível em bloco de notas
-            '-f', str(sql_file_path)
         ]
-        
+        if formato == 'custom':
+            # Formato custom (pg_restore permite restaurar tabelas isoladas); a compressão interna
+            # é desligada porque o compressor externo já compacta o fluxo
+            dump_command += ['-F', 'c', '-Z', '0']
+        else:
+            dump_command += ['-F', 'p']
+
+        inicio = time.perf_counter()
         try:
-            # Como a imagem python:3.12 (ou similar) base pode não ter pg_dump instalado, 
-            # se falhar o backup do DB, tentamos via docker (se rodar fora) ou temos que instalar postgresql-client
-            # No docker-compose, a imagem django costuma ter libpq-dev, mas não pg_dump. 
-            # Vamos testar a execução. Se não encontrar pg_dump, vamos logar.
-            subprocess.run(dump_command, env=env, check=True, capture_output=True)
-            os.chmod(sql_file_path, 0o666)
-            self.stdout.write(self.style.SUCCESS(f"Dump do banco salvo em: {sql_file_path}"))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR("Comando 'pg_dump' não encontrado. Instale postgresql-client no container."))
+            # stderr vai para arquivos temporários: um pipe cheio de mensagens travaria o pg_dump
+            with open(dump_file_path, 'wb') as destino, \
+                    tempfile.TemporaryFile() as erros_dump, tempfile.TemporaryFile() as erros_compressor:
+                dump = subprocess.Popen(dump_command, env=env, stdout=subprocess.PIPE, stderr=erros_dump)
+                try:
+                    compressao = subprocess.Popen(compressor, stdin=dump.stdout, stdout=destino, stderr=erros_compressor)
+                except OSError:
+                    dump.kill()
+                    dump.wait()
+                    raise
+                finally:
+                    # O compressor é o único leitor do pipe; se ele terminar, o pg_dump recebe SIGPIPE
+                    dump.stdout.close()
+                compressao.wait()
+                dump.wait()
+                for processo, erros in ((dump, erros_dump), (compressao, erros_compressor)):
+                    if processo.returncode != 0:
+                        erros.seek(0)
+                        raise subprocess.CalledProcessError(processo.returncode, processo.args, stderr=erros.read())
+            os.chmod(dump_file_path, 0o666)
+            self.registrar(backup_dir, 'banco', dump_file_path, inicio, compressao=compressor[0], formato=formato)
+            self.stdout.write(self.style.SUCCESS(f"Dump do banco salvo em: {dump_file_path}"))
+        except FileNotFoundError as e:
+            dump_file_path.unlink(missing_ok=True)
+            if e.filename == 'pg_dump':
+                self.stdout.write(self.style.ERROR("Comando 'pg_dump' não encontrado. Instale postgresql-client no container."))
+            else:
+                self.stdout.write(self.style.ERROR(f"Compressor não encontrado: {e}"))
         except subprocess.CalledProcessError as e:
-            self.stdout.write(self.style.ERROR(f"Erro ao executar pg_dump: {e.stderr.decode()}"))
+            dump_file_path.unlink(missing_ok=True)
+            self.stdout.write(self.style.ERROR(f"Erro ao executar {e.cmd[0]}: {e.stderr.decode(errors='replace')}"))
 
-        # 2. Backup da Pasta Media (Arquivos)
-        self.stdout.write("Compactando pasta mediafiles...")
-        media_root = settings.MEDIA_ROOT
-        zip_file_path = backup_dir / f"media_backup_{data_str}.zip"
-        
-        if os.path.exists(media_root):
+    def backup_sqlite(self, backup_dir, data_str):
+        """
+        Cópia consistente do banco SQLite pela API de backup online (sem bloquear as gravações
+        durante toda a cópia), compactada com gzip em seguida.
+        """
+        # Com uma transação de escrita aberta na própria conexão, o SQLite recusa a cópia
+        # (SQLITE_LOCKED) e backup() ficaria tentando indefinidamente
+        if connection.in_atomic_block:
+            self.stdout.write(self.style.ERROR(
+                "Backup do banco não realizado: a cópia online do SQLite não pode rodar dentro de uma transação."
+            ))
+            return
+
+        dump_file_path = backup_dir / f"db_backup_{data_str}.sqlite3.gz"
+        inicio = time.perf_counter()
+        descritor, copia_path = tempfile.mkstemp(dir=backup_dir, suffix='.sqlite3')
+        os.close(descritor)
+        try:
+            connection.ensure_connection()
+            copia = sqlite3.connect(copia_path)
             try:
-                with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for root, _, files in os.walk(media_root):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, media_root)
-                            zipf.write(file_path, arcname)
-                os.chmod(zip_file_path, 0o666)
-                self.stdout.write(self.style.SUCCESS(f"Mediafiles salvos em: {zip_file_path}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Erro ao compactar pasta media: {e}"))
-        else:
-            self.stdout.write(self.style.WARNING("Pasta MEDIA_ROOT não encontrada. Nenhuma mídia copiada."))
+                connection.connection.backup(copia, pages=PAGINAS_POR_PASSO)
+            finally:
+                copia.close()
+            with open(copia_path, 'rb') as origem, gzip.open(dump_file_path, 'wb', compresslevel=6) as destino:
+                shutil.copyfileobj(origem, destino, BLOCO_COPIA)
+            os.chmod(dump_file_path, 0o666)
+            self.registrar(backup_dir, 'banco', dump_file_path, inicio, compressao='gzip', formato='sqlite3')
+            self.stdout.write(self.style.SUCCESS(f"Cópia do banco salva em: {dump_file_path}"))
+        except (sqlite3.Error, OSError) as e:
+            dump_file_path.unlink(missing_ok=True)
+            self.stdout.write(self.style.ERROR(f"Erro ao copiar o banco SQLite: {e}"))
+        finally:
+            os.unlink(copia_path)
 
-        self.stdout.write(self.style.SUCCESS("Rotina de backup finalizada."))
+    def registrar(self, backup_dir, tipo, caminho, inicio, **extras):
+        """Acrescenta ao manifesto o arquivo gerado, com tamanho, duração e SHA-256."""
+        entrada = {
+            'data': timezone.now().isoformat(timespec='seconds'),
+            'tipo': tipo,
+            'arquivo': caminho.relative_to(backup_dir).as_posix(),
+            'tamanho_bytes': caminho.stat().st_size,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000),
+            'sha256': sha256_arquivo(caminho),
+            **extras,
+        }
+        with open(backup_dir / ARQUIVO_MANIFESTO, 'a', encoding='utf-8') as manifesto:
+            manifesto.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+        self.stdout.write(
+            f"[MANIFESTO] {entrada['arquivo']}: {entrada['tamanho_bytes']} bytes, "
+            f"{entrada['duracao_ms']} ms, sha256 {entrada['sha256']}"
+        )
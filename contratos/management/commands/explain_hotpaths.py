@@ -0,0 +1,98 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from contratos.models import (
+    Contrato, Integrante, PrestacaoContas, PrestacaoContasSetor, SlideApresentacao
+)
+
+
+def consultas_frequentes():
+    """
+    Lista (nome, queryset) das consultas mais executadas pelo sistema.
+    Os valores de filtro são apenas representativos: o plano depende da forma da consulta.
+    """
+    hoje = date.today()
+    return [
+        ('Contratos vigentes', Contrato.objects.filter(
+            vigencia_inicio__lte=hoje, vigencia_fim__gte=hoje
+        )),
+        ('Contratos com vigência a partir de hoje', Contrato.objects.filter(vigencia_fim__gte=hoje)),
+        ('Integrantes ativos (Integrante.objects.ativos)', Integrante.objects.ativos()),
+        ('Último envio de um contrato no mês', PrestacaoContas.objects.filter(
+            contrato_id=1, ano_referencia=hoje.year, mes_referencia=hoje.month
+        ).order_by('-id')),
+        ('Último envio de um setor no mês', PrestacaoContasSetor.objects.filter(
+            setor_id=1, ano_referencia=hoje.year, mes_referencia=hoje.month
+        ).order_by('-id')),
+        ('Prestações mais recentes do mês (ponteiro)', PrestacaoContas.objects.filter(
+            ponteiro__ano_referencia=hoje.year, ponteiro__mes_referencia=hoje.month
+        )),
+        ('Prestações de setor mais recentes do mês (ponteiro)', PrestacaoContasSetor.objects.filter(
+            ponteiro__ano_referencia=hoje.year, ponteiro__mes_referencia=hoje.month
+        )),
+        ('Slides avulsos do mês', SlideApresentacao.objects.filter(
+            tipo_apresentacao='fiscais', ano_referencia=hoje.year, mes_referencia=hoje.month
+        ).order_by('indice_posicao', 'data_registro')),
+    ]
+
+
+def linhas_com_varredura(plano, vendor):
+    """Retorna as linhas do plano que indicam leitura sequencial da tabela inteira."""
+    linhas = []
+    for linha in plano.splitlines():
+        if vendor == 'postgresql' and 'Seq Scan' in linha:
+            linhas.append(linha.strip())
+        # No SQLite, "SCAN tabela" sem "USING ... INDEX" é uma varredura completa
+        elif vendor == 'sqlite' and 'SCAN ' in linha and 'INDEX' not in linha:
+            linhas.append(linha.strip())
+    return linhas
+
+
+class Command(BaseCommand):
+    help = 'Executa EXPLAIN nas consultas frequentes e sinaliza varreduras sequenciais (SQLite e PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='Exibe o plano completo de cada consulta, não apenas as linhas sinalizadas.',
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Encerra com erro caso alguma consulta apresente varredura sequencial.',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Banco '{vendor}' não suportado. Use SQLite ou PostgreSQL.")
+
+        self.stdout.write(f"Analisando planos de execução ({vendor})...")
+        if vendor == 'postgresql':
+            self.stdout.write(self.style.NOTICE(
+                "Atenção: em tabelas pequenas o PostgreSQL prefere Seq Scan mesmo havendo índice; "
+                "rode o comando sobre uma base com volume real (e após ANALYZE)."
+            ))
+
+        sinalizadas = 0
+        for nome, queryset in consultas_frequentes():
+            plano = queryset.explain()
+            varreduras = linhas_com_varredura(plano, vendor)
+
+            if varreduras:
+                sinalizadas += 1
+                self.stdout.write(self.style.WARNING(f"[SEQ SCAN] {nome}"))
+                for linha in varreduras:
+                    self.stdout.write(f"    {linha}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[OK] {nome}"))
+
+            if options['verbose_plan']:
+                for linha in plano.splitlines():
+                    self.stdout.write(f"      | {linha}")
+
+        resumo = f"Análise concluída. {sinalizadas} consulta(s) com varredura sequencial."
+        if sinalizadas and options['strict']:
+            raise CommandError(resumo)
+        self.stdout.write(self.style.SUCCESS(resumo) if not sinalizadas else self.style.WARNING(resumo))
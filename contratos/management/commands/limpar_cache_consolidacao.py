@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from contratos.consolidacao import limpar_cache, limitar_cache
+
+
+class Command(BaseCommand):
+    help = 'Remove os PDFs de apresentações consolidadas guardados em cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite-mb',
+            type=int,
+            help='Em vez de apagar tudo, remove apenas os menos usados até o cache caber no limite informado.',
+        )
+
+    def handle(self, *args, **options):
+        if options['limite_mb'] is not None:
+            removidos = limitar_cache(limite_bytes=options['limite_mb'] * 1024 * 1024)
+            self.stdout.write(self.style.SUCCESS(
+                f'{removidos} arquivo(s) removido(s) para respeitar o limite de {options["limite_mb"]} MB.'
+            ))
+            return
+
+        quantidade, liberados = limpar_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Cache limpo: {quantidade} arquivo(s) removido(s), {liberados / (1024 * 1024):.1f} MB liberado(s).'
+        ))
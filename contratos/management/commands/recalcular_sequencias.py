@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from contratos import versoes
+from contratos.models import Integrante
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula, para todas as designações, o início real da sequência de designações contínuas '
+        'e a primeira designação da sequência (usados pelo radar de permanência).'
+    )
+
+    def handle(self, *args, **kwargs):
+        antes = dict(Integrante.objects.values_list('pk', 'inicio_sequencia'))
+
+        with transaction.atomic():
+            sequencias = Integrante.recalcular_sequencias()
+            # As designações são gravadas com update(), que não dispara os sinais
+            versoes.incrementar('contratos')
+
+        alteradas = sum(1 for pk, (_, inicio) in sequencias.items() if antes.get(pk) != inicio)
+        encadeadas = sum(1 for pk, (sequencia_id, _) in sequencias.items() if sequencia_id != pk)
+        self.stdout.write(
+            f'[OK] {len(sequencias)} designação(ões) analisada(s), {encadeadas} continuando uma anterior, '
+            f'{alteradas} com início real alterado.'
+        )
+        self.stdout.write(self.style.SUCCESS('Recálculo das sequências concluído.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from contratos.models import PrestacaoContas, PrestacaoContasSetor, UltimaPrestacao, UltimaPrestacaoSetor
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói do zero os ponteiros de "última prestação" por contrato/setor e mês de referência.'
+
+    def handle(self, *args, **kwargs):
+        pares = [
+            (PrestacaoContas, UltimaPrestacao, 'contrato_id', 'contratos'),
+            (PrestacaoContasSetor, UltimaPrestacaoSetor, 'setor_id', 'setores'),
+        ]
+
+        with transaction.atomic():
+            for modelo_prestacao, modelo_ponteiro, campo, descricao in pares:
+                modelo_ponteiro.objects.all().delete()
+
+                ultimas = modelo_prestacao.objects.values(campo, 'ano_referencia', 'mes_referencia').annotate(
+                    max_id=Max('id')
+                ).order_by()
+
+                ponteiros = modelo_ponteiro.objects.bulk_create([
+                    modelo_ponteiro(**{
+                        campo: item[campo],
+                        'ano_referencia': item['ano_referencia'],
+                        'mes_referencia': item['mes_referencia'],
+                        'prestacao_id': item['max_id'],
+                    })
+                    for item in ultimas
+                ], batch_size=500)
+
+                self.stdout.write(f'[OK] {len(ponteiros)} ponteiro(s) de {descricao} reconstruído(s).')
+
+        self.stdout.write(self.style.SUCCESS('Reconstrução dos ponteiros concluída.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from contratos import busca
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula o texto de busca de todos os contratos (reconstruindo o índice textual) '
+        'e os nomes normalizados dos militares '
+        '(necessário após cargas de fixtures ou alterações em massa).'
+    )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            total = busca.reindexar()
+            agentes = busca.reindexar_agentes()
+
+        self.stdout.write(f'[OK] {total} contrato(s) reindexado(s).')
+        self.stdout.write(f'[OK] {agentes} militar(es) com nome normalizado atualizado.')
+        self.stdout.write(self.style.SUCCESS('Reindexação da busca concluída.'))
@@ -0,0 +1,74 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from contratos.backup_midia import RepositorioMidia
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói a pasta de mídia a partir de um snapshot do backup incremental '
+        '(gerado por executar_backup em BACKUP_DIR/midia).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'snapshot',
+            nargs='?',
+            help="Data do snapshot (AAAAMMDD) ou 'ultimo'. Omitido com --listar.",
+        )
+        parser.add_argument(
+            '--destino',
+            help='Pasta onde os arquivos serão restaurados (padrão: MEDIA_ROOT).',
+        )
+        parser.add_argument(
+            '--listar',
+            action='store_true',
+            help='Lista os snapshots disponíveis e encerra.',
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Confere o SHA-256 de cada arquivo restaurado.',
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help=(
+                'Remove do destino os arquivos que não constam do snapshot. Sem esta opção, '
+                'arquivos criados depois do snapshot são mantidos.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        repositorio = RepositorioMidia(Path(settings.BACKUP_DIR) / 'midia')
+        snapshots = repositorio.listar_snapshots()
+
+        if options['listar']:
+            if not snapshots:
+                self.stdout.write(self.style.WARNING('Nenhum snapshot de mídia encontrado.'))
+            for nome in snapshots:
+                self.stdout.write(f"{nome}: {len(repositorio.ler_manifesto(nome)['arquivos'])} arquivo(s)")
+            return
+
+        nome = options['snapshot']
+        if not nome:
+            raise CommandError("Informe o snapshot (AAAAMMDD ou 'ultimo') ou use --listar.")
+        if nome == 'ultimo':
+            if not snapshots:
+                raise CommandError('Nenhum snapshot de mídia encontrado.')
+            nome = snapshots[-1]
+        elif nome not in snapshots:
+            raise CommandError(f'Snapshot {nome} não encontrado. Use --listar para ver os disponíveis.')
+
+        destino = options['destino'] or settings.MEDIA_ROOT
+        self.stdout.write(f'Restaurando o snapshot {nome} em {destino}...')
+        try:
+            restaurados, mantidos = repositorio.restaurar(nome, destino, verificar=options['verificar'])
+            removidos = repositorio.limpar(nome, destino) if options['limpar'] else 0
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Falha na restauração: {e}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot {nome} restaurado: {restaurados} arquivo(s) copiado(s), {mantidos} já atualizado(s).'
+        ))
+        if removidos:
+            self.stdout.write(f'{removidos} arquivo(s) ausente(s) do snapshot removido(s) do destino.')
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from contratos.models import TarefaConsolidacao
+from contratos.consolidacao import processar_tarefa
+
+
+# Tarefas em 'processando' há mais tempo que isso pertencem a um worker que caiu
+TEMPO_MAXIMO_PROCESSANDO = timedelta(minutes=30)
+
+
+class Command(BaseCommand):
+    help = 'Processa em segundo plano a fila de consolidações de apresentação (TarefaConsolidacao).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Processa as tarefas pendentes e encerra, em vez de aguardar novas tarefas.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera entre consultas à fila quando não há tarefas (padrão: 2).',
+        )
+        parser.add_argument(
+            '--reter-dias',
+            type=int,
+            default=7,
+            help='Remove tarefas finalizadas (e seus PDFs) mais antigas que N dias (padrão: 7).',
+        )
+
+    def handle(self, *args, **options):
+        self.reenfileirar_travadas()
+        self.remover_antigas(options['reter_dias'])
+
+        self.stdout.write('Worker de consolidação iniciado.')
+        while True:
+            tarefa = self.reservar_proxima()
+            if tarefa is None:
+                if options['once']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            self.stdout.write(f'[INICIO] {tarefa}')
+            try:
+                processar_tarefa(tarefa)
+            except Exception as e:
+                TarefaConsolidacao.objects.filter(pk=tarefa.pk).update(
+                    status='erro', erros=f"Falha inesperada na consolidação: {e}", data_fim=timezone.now()
+                )
+                self.stdout.write(self.style.ERROR(f'[ERRO] {tarefa}: {e}'))
+                continue
+
+            tarefa.refresh_from_db()
+            estilo = self.style.SUCCESS if tarefa.status == 'concluida' else self.style.WARNING
+            self.stdout.write(estilo(
+                f'[{tarefa.status.upper()}] {tarefa}: {tarefa.arquivos_processados} arquivo(s), '
+                f'{tarefa.paginas_mescladas} página(s), {len(tarefa.lista_erros)} erro(s).'
+            ))
+
+        self.stdout.write(self.style.SUCCESS('Fila de consolidação vazia. Worker encerrado.'))
+
+    def reservar_proxima(self):
+        """
+        Reserva a tarefa pendente mais antiga com um UPDATE condicional: se outro worker
+        a reservou antes, o UPDATE não afeta linhas e a próxima é tentada.
+        """
+        while True:
+            tarefa = TarefaConsolidacao.objects.filter(status='pendente').order_by('data_criacao').first()
+            if tarefa is None:
+                return None
+
+            agora = timezone.now()
+            reservada = TarefaConsolidacao.objects.filter(pk=tarefa.pk, status='pendente').update(
+                status='processando', data_inicio=agora
+            )
+            if reservada:
+                tarefa.status = 'processando'
+                tarefa.data_inicio = agora
+                return tarefa
+
+    def reenfileirar_travadas(self):
+        limite = timezone.now() - TEMPO_MAXIMO_PROCESSANDO
+        quantidade = TarefaConsolidacao.objects.filter(
+            status='processando', data_inicio__lt=limite
+        ).update(status='pendente', data_inicio=None)
+        if quantidade:
+            self.stdout.write(self.style.WARNING(f'{quantidade} tarefa(s) interrompida(s) devolvida(s) à fila.'))
+
+    def remover_antigas(self, dias):
+        limite = timezone.now() - timedelta(days=dias)
+        antigas = TarefaConsolidacao.objects.filter(status__in=['concluida', 'erro'], data_criacao__lt=limite)
+        for tarefa in antigas:
+            if tarefa.arquivo:
+                tarefa.arquivo.delete(save=False)
+            tarefa.delete()
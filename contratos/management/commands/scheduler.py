@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from contratos import agendador
+
+
+class Command(BaseCommand):
+    help = (
+        'Agendador das rotinas diárias (contratos.agendador): executa cada tarefa no seu horário, '
+        'recupera horários perdidos e registra o histórico das execuções.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Executa as tarefas pendentes e encerra, em vez de permanecer aguardando os próximos horários.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=30.0,
+            help='Segundos entre as verificações de tarefas pendentes (padrão: 30).',
+        )
+        parser.add_argument(
+            '--tarefa',
+            choices=[tarefa.nome for tarefa in agendador.TAREFAS],
+            help='Executa imediatamente a tarefa informada, fora do horário, e encerra.',
+        )
+        parser.add_argument(
+            '--reter-dias',
+            type=int,
+            default=90,
+            help='Remove do histórico as execuções mais antigas que N dias (padrão: 90).',
+        )
+
+    def handle(self, *args, **options):
+        if options['tarefa']:
+            execucao = agendador.executar(
+                agendador.obter_tarefa(options['tarefa']), agendada_para=timezone.now(), forcar=True
+            )
+            if execucao is None:
+                raise CommandError(f"A tarefa {options['tarefa']} já está em execução em outro processo.")
+            self.relatar(execucao)
+            return
+
+        self.stdout.write('Agendador iniciado.')
+        for tarefa in agendador.TAREFAS:
+            self.stdout.write(
+                f'  {tarefa.nome}: diariamente às {tarefa.horario:%H:%M} '
+                f'({", ".join(str(passo) for passo in tarefa.passos)})'
+            )
+
+        ultima_limpeza = None
+        while True:
+            # Processo de longa duração: descarta conexões quebradas ou expiradas antes de cada ciclo
+            close_old_connections()
+            # Histórico podado uma vez por dia (na partida e a cada virada de data)
+            hoje = timezone.localdate()
+            if hoje != ultima_limpeza:
+                ultima_limpeza = hoje
+                removidas = agendador.remover_antigas(options['reter_dias'])
+                if removidas:
+                    self.stdout.write(f'{removidas} execução(ões) antiga(s) removida(s) do histórico.')
+            for execucao in agendador.executar_pendentes():
+                self.relatar(execucao)
+            if options['once']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS('Nenhuma tarefa pendente. Agendador encerrado.'))
+
+    def relatar(self, execucao):
+        self.stdout.write(execucao.saida.rstrip())
+        estilo = self.style.SUCCESS if execucao.status == 'sucesso' else self.style.ERROR
+        self.stdout.write(estilo(
+            f'[{execucao.status.upper()}] {execucao.tarefa} '
+            f'(agendada para {timezone.localtime(execucao.agendada_para):%d/%m/%Y %H:%M}) '
+            f'em {execucao.duracao_ms} ms.'
+        ))
@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from contratos.utils_gmail import verificar_saude
+
+
+class Command(BaseCommand):
+    help = (
+        'Health check da Gmail API: autentica com um cliente novo e verifica a validade do token. '
+        'Imprime o resultado em JSON e termina com erro se a autenticação falhar.'
+    )
+
+    def handle(self, *args, **options):
+        resultado = verificar_saude()
+        self.stdout.write(json.dumps(resultado, indent=2))
+        if resultado['status'] == 'error':
+            raise CommandError(f"Gmail API indisponível: {resultado['detalhes']['erro']}")
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def popular_ponteiros(apps, schema_editor):
+    """Aponta cada (contrato|setor, ano, mês) existente para o envio de maior id."""
+    pares = [
+        ('PrestacaoContas', 'UltimaPrestacao', 'contrato_id'),
+        ('PrestacaoContasSetor', 'UltimaPrestacaoSetor', 'setor_id'),
+    ]
+    for nome_prestacao, nome_ponteiro, campo in pares:
+        Prestacao = apps.get_model('contratos', nome_prestacao)
+        Ponteiro = apps.get_model('contratos', nome_ponteiro)
+        ultimas = Prestacao.objects.values(campo, 'ano_referencia', 'mes_referencia').annotate(
+            max_id=Max('id')
+        ).order_by()
+        Ponteiro.objects.bulk_create([
+            Ponteiro(**{
+                campo: item[campo],
+                'ano_referencia': item['ano_referencia'],
+                'mes_referencia': item['mes_referencia'],
+                'prestacao_id': item['max_id'],
+            })
+            for item in ultimas
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0032_slideapresentacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UltimaPrestacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_referencia', models.IntegerField(verbose_name='Ano de Referência')),
+                ('mes_referencia', models.IntegerField(verbose_name='Mês de Referência')),
+                ('contrato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ultimas_prestacoes', to='contratos.contrato')),
+                ('prestacao', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ponteiro', to='contratos.prestacaocontas')),
+            ],
+            options={
+                'verbose_name': 'Última Prestação de Contas',
+                'verbose_name_plural': 'Últimas Prestações de Contas',
+                'unique_together': {('contrato', 'ano_referencia', 'mes_referencia')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UltimaPrestacaoSetor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_referencia', models.IntegerField(verbose_name='Ano de Referência')),
+                ('mes_referencia', models.IntegerField(verbose_name='Mês de Referência')),
+                ('prestacao', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ponteiro', to='contratos.prestacaocontassetor')),
+                ('setor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ultimas_prestacoes', to='contratos.setor')),
+            ],
+            options={
+                'verbose_name': 'Última Prestação de Contas (Setor)',
+                'verbose_name_plural': 'Últimas Prestações de Contas (Setores)',
+                'unique_together': {('setor', 'ano_referencia', 'mes_referencia')},
+            },
+        ),
+        migrations.RunPython(popular_ponteiros, migrations.RunPython.noop),
+    ]
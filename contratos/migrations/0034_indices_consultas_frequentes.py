@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0033_ultimaprestacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['vigencia_fim', 'vigencia_inicio'], name='contrato_vigencia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='integrante',
+            index=models.Index(fields=['data_desligamento', 'data_fim'], name='integrante_ativos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestacaocontas',
+            index=models.Index(fields=['contrato', 'ano_referencia', 'mes_referencia', 'id'], name='prestacao_contrato_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestacaocontassetor',
+            index=models.Index(fields=['setor', 'ano_referencia', 'mes_referencia', 'id'], name='prestacao_setor_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slideapresentacao',
+            index=models.Index(fields=['tipo_apresentacao', 'ano_referencia', 'mes_referencia'], name='slide_apresentacao_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ultimaprestacao',
+            index=models.Index(fields=['ano_referencia', 'mes_referencia'], name='ultima_prestacao_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ultimaprestacaosetor',
+            index=models.Index(fields=['ano_referencia', 'mes_referencia'], name='ultima_prestacao_setor_ref_idx'),
+        ),
+    ]
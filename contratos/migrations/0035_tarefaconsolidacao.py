@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0034_indices_consultas_frequentes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaConsolidacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_apresentacao', models.CharField(choices=[('fiscais', 'Fiscais'), ('gestores', 'Gestores')], max_length=15, verbose_name='Tipo de Apresentação')),
+                ('ano_referencia', models.IntegerField(verbose_name='Ano de Referência')),
+                ('mes_referencia', models.IntegerField(verbose_name='Mês de Referência')),
+                ('status', models.CharField(choices=[('pendente', 'Na fila'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=15, verbose_name='Status')),
+                ('arquivos_total', models.PositiveIntegerField(default=0, verbose_name='Total de Arquivos')),
+                ('arquivos_processados', models.PositiveIntegerField(default=0, verbose_name='Arquivos Processados')),
+                ('paginas_mescladas', models.PositiveIntegerField(default=0, verbose_name='Páginas Mescladas')),
+                ('erros', models.TextField(blank=True, default='', verbose_name='Erros')),
+                ('arquivo', models.FileField(blank=True, null=True, upload_to='consolidacoes/', verbose_name='PDF Consolidado')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_inicio', models.DateTimeField(blank=True, null=True)),
+                ('data_fim', models.DateTimeField(blank=True, null=True)),
+                ('solicitante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Consolidação',
+                'verbose_name_plural': 'Tarefas de Consolidação',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'data_criacao'], name='tarefa_consolidacao_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:42
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def calcular_sequencias(linhas):
+    """
+    Cópia de contratos.models.calcular_sequencias no momento desta migração.
+
+    linhas: tuplas (pk, chave, data_inicio, data_fim, data_desligamento); chave é None
+    para designações que não formam cadeia. Uma designação continua a anterior do mesmo
+    grupo quando começa no dia seguinte ao término (previsto ou efetivo) dela.
+    Retorna {pk: (pk da primeira designação da sequência, data de início real)}.
+    """
+    linhas = list(linhas)
+    por_termino = {}
+    for pk, chave, inicio, fim, desligamento in linhas:
+        if chave is None:
+            continue
+        for termino in (fim, desligamento):
+            if termino is not None:
+                por_termino.setdefault((chave, termino), (pk, inicio))
+
+    sequencias = {}
+    for pk, chave, inicio, _, _ in linhas:
+        primeira = (pk, inicio)
+        while chave is not None:
+            anterior = por_termino.get((chave, primeira[1] - timedelta(days=1)))
+            if anterior is None or anterior[1] >= primeira[1]:
+                break
+            primeira = anterior
+        sequencias[pk] = primeira
+    return sequencias
+
+
+def popular_sequencias(apps, schema_editor):
+    """Calcula início real e primeira designação da sequência de cada designação existente."""
+    Integrante = apps.get_model('contratos', 'Integrante')
+    linhas = Integrante.objects.order_by('ordem', 'pk').values_list(
+        'pk', 'comissao__contrato_id', 'comissao__tipo', 'agente_id', 'funcao_id',
+        'data_inicio', 'data_fim', 'data_desligamento',
+    )
+    sequencias = calcular_sequencias(
+        (pk, (contrato_id, tipo, agente_id, funcao_id) if contrato_id else None, inicio, fim, desligamento)
+        for pk, contrato_id, tipo, agente_id, funcao_id, inicio, fim, desligamento in linhas
+    )
+    grupos = {}
+    for pk, sequencia in sequencias.items():
+        grupos.setdefault(sequencia, []).append(pk)
+    for (sequencia_id, inicio_sequencia), pks in grupos.items():
+        Integrante.objects.filter(pk__in=pks).update(sequencia_id=sequencia_id, inicio_sequencia=inicio_sequencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0035_tarefaconsolidacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrante',
+            name='inicio_sequencia',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Início Real da Sequência'),
+        ),
+        migrations.AddField(
+            model_name='integrante',
+            name='sequencia',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contratos.integrante', verbose_name='Primeira Designação da Sequência'),
+        ),
+        migrations.AddIndex(
+            model_name='integrante',
+            index=models.Index(fields=['inicio_sequencia'], name='integrante_sequencia_idx'),
+        ),
+        migrations.RunPython(popular_sequencias, migrations.RunPython.noop),
+    ]
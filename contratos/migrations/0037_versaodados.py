@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:55
+
+from django.core.management import call_command
+from django.db import migrations, models
+
+
+def criar_versoes_e_cache(apps, schema_editor):
+    """Cria os contadores dos domínios e a tabela do cache (settings.CACHES)."""
+    VersaoDados = apps.get_model('contratos', 'VersaoDados')
+    for dominio in ('contratos', 'prestacoes', 'setores'):
+        VersaoDados.objects.get_or_create(dominio=dominio)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0036_integrante_sequencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoDados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dominio', models.CharField(choices=[('contratos', 'Contratos e Comissões'), ('prestacoes', 'Prestações de Contas'), ('setores', 'Setores e Cargos Regimentais')], max_length=20, unique=True, verbose_name='Domínio')),
+                ('versao', models.PositiveBigIntegerField(default=0, verbose_name='Versão')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Alteração')),
+            ],
+            options={
+                'verbose_name': 'Versão dos Dados',
+                'verbose_name_plural': 'Versões dos Dados',
+            },
+        ),
+        migrations.RunPython(criar_versoes_e_cache, migrations.RunPython.noop),
+    ]
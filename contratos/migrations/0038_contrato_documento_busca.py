@@ -0,0 +1,104 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:20
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Estruturas e normalização congeladas aqui (contratos.busca pode mudar depois desta migração)
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'contratos_pt') THEN
+            CREATE TEXT SEARCH CONFIGURATION contratos_pt (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION contratos_pt
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END $$
+    """,
+    """
+    ALTER TABLE contratos_contrato ADD COLUMN IF NOT EXISTS busca_vetor tsvector
+        GENERATED ALWAYS AS (to_tsvector('contratos_pt'::regconfig, documento_busca)) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS contrato_busca_gin_idx ON contratos_contrato USING GIN (busca_vetor)",
+]
+
+SQL_POSTGRESQL_REVERSO = [
+    "DROP INDEX IF EXISTS contrato_busca_gin_idx",
+    "ALTER TABLE contratos_contrato DROP COLUMN IF EXISTS busca_vetor",
+]
+
+SQL_SQLITE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contratos_contrato_fts "
+    "USING fts5(documento, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com a pontuação trocada por espaços."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[^\W_]+', sem_acentos.casefold()))
+
+
+def criar_estruturas(conexao):
+    """Cria o tsvector/GIN (PostgreSQL) ou a tabela FTS5 (SQLite, quando disponível)."""
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'postgresql':
+            for sql in SQL_POSTGRESQL:
+                cursor.execute(sql)
+        elif conexao.vendor == 'sqlite':
+            try:
+                cursor.execute(SQL_SQLITE)
+            except Exception:  # SQLite compilado sem FTS5: a busca usa icontains
+                pass
+
+
+def indexar_contratos(apps, schema_editor):
+    """Cria o índice textual do banco (tsvector/GIN ou FTS5) e preenche documento_busca."""
+    conexao = schema_editor.connection
+    criar_estruturas(conexao)
+
+    Contrato = apps.get_model('contratos', 'Contrato')
+    contratos = list(Contrato.objects.select_related('empresa'))
+    for contrato in contratos:
+        contrato.documento_busca = normalizar_texto(' '.join(filter(None, [
+            contrato.numero, contrato.objeto, contrato.empresa.razao_social, contrato.empresa.nome_fantasia,
+        ])))
+    Contrato.objects.bulk_update(contratos, ['documento_busca'], batch_size=500)
+
+    if conexao.vendor == 'sqlite' and 'contratos_contrato_fts' in conexao.introspection.table_names():
+        with conexao.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO contratos_contrato_fts (rowid, documento) VALUES (%s, %s)",
+                [(contrato.pk, contrato.documento_busca) for contrato in contratos]
+            )
+
+
+def desfazer_indice(apps, schema_editor):
+    conexao = schema_editor.connection
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'postgresql':
+            for sql in SQL_POSTGRESQL_REVERSO:
+                cursor.execute(sql)
+        elif conexao.vendor == 'sqlite':
+            cursor.execute("DROP TABLE IF EXISTS contratos_contrato_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0037_versaodados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contrato',
+            name='documento_busca',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Texto para Busca'),
+        ),
+        migrations.RunPython(indexar_contratos, desfazer_indice),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.10 on 2026-10-18 19:05
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Índices e normalização congelados aqui (contratos.busca pode mudar depois desta migração)
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS agente_guerra_trgm_idx ON contratos_agente USING GIN (nome_de_guerra_busca gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS agente_nome_trgm_idx ON contratos_agente USING GIN (nome_completo_busca gin_trgm_ops)",
+]
+
+SQL_POSTGRESQL_REVERSO = [
+    "DROP INDEX IF EXISTS agente_guerra_trgm_idx",
+    "DROP INDEX IF EXISTS agente_nome_trgm_idx",
+]
+
+
+def normalizar_nome(texto):
+    """Maiúsculas, sem acentos e com a pontuação trocada por espaços."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[^\W_]+', sem_acentos.casefold())).upper()
+
+
+def executar(conexao, comandos):
+    """Índices de trigramas: somente no PostgreSQL."""
+    if conexao.vendor == 'postgresql':
+        with conexao.cursor() as cursor:
+            for sql in comandos:
+                cursor.execute(sql)
+
+
+def preencher_nomes_busca(apps, schema_editor):
+    """Preenche os nomes normalizados e cria os índices de trigramas (PostgreSQL)."""
+    Agente = apps.get_model('contratos', 'Agente')
+    agentes = list(Agente.objects.only('nome_de_guerra', 'nome_completo'))
+    for agente in agentes:
+        agente.nome_de_guerra_busca = normalizar_nome(agente.nome_de_guerra)
+        agente.nome_completo_busca = normalizar_nome(agente.nome_completo)
+    Agente.objects.bulk_update(agentes, ['nome_de_guerra_busca', 'nome_completo_busca'], batch_size=500)
+    executar(schema_editor.connection, SQL_POSTGRESQL)
+
+
+def remover_indices(apps, schema_editor):
+    executar(schema_editor.connection, SQL_POSTGRESQL_REVERSO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0038_contrato_documento_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agente',
+            name='nome_completo_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200, verbose_name='Nome Completo (Busca)'),
+        ),
+        migrations.AddField(
+            model_name='agente',
+            name='nome_de_guerra_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Nome de Guerra (Busca)'),
+        ),
+        migrations.RunPython(preencher_nomes_busca, remover_indices),
+    ]
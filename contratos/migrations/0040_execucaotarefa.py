@@ -0,0 +1,32 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0039_agente_nomes_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecucaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarefa', models.CharField(max_length=50, verbose_name='Tarefa')),
+                ('agendada_para', models.DateTimeField(verbose_name='Horário Agendado')),
+                ('status', models.CharField(choices=[('executando', 'Executando'), ('sucesso', 'Sucesso'), ('erro', 'Erro'), ('interrompida', 'Interrompida')], default='executando', max_length=15, verbose_name='Status')),
+                ('data_inicio', models.DateTimeField(verbose_name='Início')),
+                ('data_fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('duracao_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Duração (ms)')),
+                ('saida', models.TextField(blank=True, default='', verbose_name='Saída')),
+            ],
+            options={
+                'verbose_name': 'Execução de Tarefa Agendada',
+                'verbose_name_plural': 'Execuções de Tarefas Agendadas',
+                'ordering': ['-data_inicio'],
+                'indexes': [models.Index(fields=['tarefa', 'agendada_para'], name='execucao_tarefa_horario_idx')],
+            },
+        ),
+    ]
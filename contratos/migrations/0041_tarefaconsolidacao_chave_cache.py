@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0040_execucaotarefa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarefaconsolidacao',
+            name='chave_cache',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Chave no Cache'),
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, Func, Value, Case, When, ExpressionWrapper
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from datetime import date, timedelta
+from django.utils import timezone
 
 
 class PostoGraduacao(models.Model):
@@ -33,6 +36,10 @@ class Agente(models.Model):
 
     data_ultimo_curso = models.DateField(null=True, blank=True, verbose_name="Data do Último Curso de Gestão")
 
+    # Nomes normalizados para a consulta de militares (mantidos por contratos.busca)
+    nome_de_guerra_busca = models.CharField("Nome de Guerra (Busca)", max_length=100, blank=True, default='', editable=False)
+    nome_completo_busca = models.CharField("Nome Completo (Busca)", max_length=200, blank=True, default='', editable=False)
+
     def __str__(self):
         return f"{self.posto.sigla} {self.nome_de_guerra}"
 
@@ -96,6 +103,8 @@ class Contrato(models.Model):
     vigencia_inicio = models.DateField("Início da Vigência")
     vigencia_fim = models.DateField("Fim da Vigência")
     valor_total = models.DecimalField("Valor Total", max_digits=12, decimal_places=2)
+    # Texto normalizado para a busca (mantido por contratos.busca; ver reindexar_busca)
+    documento_busca = models.TextField("Texto para Busca", blank=True, default='', editable=False)
 
     def __str__(self):
         return f"CT {self.numero} - {self.empresa.razao_social}"
@@ -103,8 +112,55 @@ class Contrato(models.Model):
     class Meta:
         verbose_name = "Contrato"
         verbose_name_plural = "Contratos"
-
-
+        indexes = [
+            # Contratos vigentes: todas as consultas filtram vigencia_fim (>= hoje) e
+            # parte delas também vigencia_inicio (<= hoje)
+            models.Index(fields=['vigencia_fim', 'vigencia_inicio'], name='contrato_vigencia_idx'),
+        ]
+
+
+class DiasEntre(Func):
+    """Dias corridos entre duas datas (fim - início), como inteiro, calculados no banco."""
+    arity = 2
+    output_field = models.IntegerField()
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '  # PostgreSQL: date - date resulta em inteiro (dias)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)', arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+
+# Faixas do monitoramento de vencimentos: até 7 dias é crítico, de 8 a 15 é alerta
+LIMITE_VENCIMENTO_CRITICO = 7
+LIMITE_VENCIMENTO_ALERTA = 15
+
+
+class ComissaoQuerySet(models.QuerySet):
+
+    def com_vencimento(self, hoje=None):
+        """
+        Anota o término efetivo (data_fim da comissão ou, sem ela, o fim da vigência do
+        contrato), os dias restantes até ele e a faixa de criticidade ('critico', 'alerta'
+        ou 'normal'). Comissões sem término efetivo ficam de fora.
+        """
+        hoje = hoje or date.today()
+        return self.annotate(
+            data_fim_efetiva=Coalesce('data_fim', 'contrato__vigencia_fim'),
+        ).filter(
+            data_fim_efetiva__isnull=False
+        ).annotate(
+            dias_restantes=DiasEntre('data_fim_efetiva', Value(hoje, output_field=models.DateField())),
+            criticidade=Case(
+                When(dias_restantes__lte=LIMITE_VENCIMENTO_CRITICO, then=Value('critico')),
+                When(dias_restantes__lte=LIMITE_VENCIMENTO_ALERTA, then=Value('alerta')),
+                default=Value('normal'),
+                output_field=models.CharField(),
+            ),
+        )
 
 
 class Comissao(models.Model):
@@ -153,6 +209,8 @@ class Comissao(models.Model):
     data_inicio = models.DateField("Início da Comissão", blank=True, null=True)
     data_fim = models.DateField("Fim da Comissão", blank=True, null=True)
 
+    objects = ComissaoQuerySet.as_manager()
+
     def clean(self):
         if self.ativa and self.data_inicio and self.data_inicio > date.today():
             raise ValidationError(
@@ -178,11 +236,16 @@ class Comissao(models.Model):
         if self.categoria == 'CONTRATO' and self.contrato:
             tipo_ct = self.contrato.get_tipo_display()
             self.descricao_objeto = f"Comissão de {self.get_tipo_display()} do Contrato de {tipo_ct} nº {self.contrato.numero} - {self.contrato.objeto}"
-            
+
+        anterior = None
+        if self.pk:
+            anterior = Comissao.objects.filter(pk=self.pk).values_list('contrato_id', 'tipo').first()
+
         super().save(*args, **kwargs)
         
         # Se a data fim da comissão mudar, precisamos garantir que as designações (integrantes)
         # não fiquem ativas além da nova data de término da comissão
+        ajustados = False
         if self.data_fim:
             integrantes_afetados = self.integrantes.filter(data_fim__gt=self.data_fim)
             for integrante in integrantes_afetados:
@@ -191,6 +254,22 @@ class Comissao(models.Model):
                 # falhar caso a data início fosse violada (isso será verificado no ComissaoForm)
                 # O update não chama sinais ou o método save()
                 Integrante.objects.filter(pk=integrante.pk).update(data_fim=self.data_fim)
+                ajustados = True
+
+        # Término ajustado ou comissão movida de contrato/tipo: as sequências dos integrantes mudam
+        if ajustados or (anterior and anterior != (self.contrato_id, self.tipo)):
+            self.recalcular_sequencias_integrantes(anterior)
+
+    def recalcular_sequencias_integrantes(self, anterior=None):
+        """Recalcula as sequências dos grupos (contrato, tipo, agente, função) dos integrantes desta comissão."""
+        chaves = []
+        for par in self.integrantes.values_list('agente_id', 'funcao_id').distinct():
+            chaves.append((self.contrato_id, self.tipo) + par)
+            if anterior:
+                chaves.append(tuple(anterior) + par)
+        Integrante.recalcular_sequencias(Integrante.objects.filter(
+            Q(comissao=self) | Integrante.filtro_sequencias(chaves)
+        ))
 
     def __str__(self):
         if self.categoria == 'CONTRATO' and self.contrato:
@@ -203,6 +282,66 @@ class Comissao(models.Model):
         ordering = ['tipo']  # FISCALIZACAO (F) vem antes de RECEBIMENTO (R)
 
 
+def calcular_sequencias(linhas):
+    """
+    Calcula a sequência de designações contínuas de cada designação.
+
+    linhas: tuplas (pk, chave, data_inicio, data_fim, data_desligamento) na ordem
+    padrão de Integrante, em que chave identifica o grupo (contrato, tipo de
+    comissão, agente, função) ou é None para designações que não formam cadeia.
+    Uma designação continua a anterior do mesmo grupo quando começa no dia seguinte
+    ao término (previsto ou efetivo) dela; havendo mais de uma, vale a primeira.
+
+    Retorna {pk: (pk da primeira designação da sequência, data de início real)}.
+    """
+    linhas = list(linhas)
+    por_termino = {}
+    for pk, chave, inicio, fim, desligamento in linhas:
+        if chave is None:
+            continue
+        for termino in (fim, desligamento):
+            if termino is not None:
+                por_termino.setdefault((chave, termino), (pk, inicio))
+
+    sequencias = {}
+    for pk, chave, inicio, _, _ in linhas:
+        primeira = (pk, inicio)
+        while chave is not None:
+            anterior = por_termino.get((chave, primeira[1] - timedelta(days=1)))
+            # Só recua no tempo: protege contra registros com datas inconsistentes
+            if anterior is None or anterior[1] >= primeira[1]:
+                break
+            primeira = anterior
+        sequencias[pk] = primeira
+    return sequencias
+
+
+def filtro_integrantes_ativos(em=None, prefixo=''):
+    """
+    Q da regra de integrante ativo na data informada (padrão: hoje):
+    (sem desligamento OU desligamento futuro) E (sem fim previsto OU fim previsto a partir da data).
+    prefixo permite aplicar a regra por relacionamentos (ex.: 'comissoes__integrantes__').
+    """
+    em = em or date.today()
+    return (
+        (Q(**{f'{prefixo}data_desligamento__isnull': True}) | Q(**{f'{prefixo}data_desligamento__gt': em})) &
+        (Q(**{f'{prefixo}data_fim__isnull': True}) | Q(**{f'{prefixo}data_fim__gte': em}))
+    )
+
+
+class IntegranteQuerySet(models.QuerySet):
+
+    def ativos(self, em=None):
+        """Designações ativas na data informada (padrão: hoje)."""
+        return self.filter(filtro_integrantes_ativos(em))
+
+    def com_status(self, em=None):
+        """Anota esta_ativo (booleano calculado no banco), lido por Integrante.is_ativo."""
+        return self.annotate(
+            esta_ativo=ExpressionWrapper(filtro_integrantes_ativos(em), output_field=models.BooleanField())
+        )
+
+
 class Integrante(models.Model):
     comissao = models.ForeignKey(Comissao, on_delete=models.CASCADE, related_name='integrantes')
     agente = models.ForeignKey(Agente, on_delete=models.PROTECT, verbose_name="Militar")
@@ -233,6 +372,14 @@ class Integrante(models.Model):
     # Campo para ordenação manual
     ordem = models.PositiveIntegerField("Ordem", default=0)
 
+    # SEQUÊNCIA DE DESIGNAÇÕES CONTÍNUAS (mantida por save(), pelos sinais de exclusão de
+    # contratos/permanencia.py e pelo comando 'recalcular_sequencias')
+    inicio_sequencia = models.DateField("Início Real da Sequência", null=True, blank=True, editable=False)
+    sequencia = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                                  related_name='+', verbose_name="Primeira Designação da Sequência")
+
+    objects = IntegranteQuerySet.as_manager()
+
     # --- AUTOMATIZAÇÃO: SALVAR O POSTO ATUAL NO HISTÓRICO ---
     def save(self, *args, **kwargs):
         # Se for um novo registro ou se o posto estiver vazio, copia do Agente
@@ -252,8 +399,55 @@ class Integrante(models.Model):
                 self.ordem = last_item.ordem + 1
             else:
                 self.ordem = 1
-            
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            chave_anterior = None
+            if self.pk:
+                chave_anterior = Integrante.objects.filter(pk=self.pk).values_list(*self.CAMPOS_SEQUENCIA).first()
+            super().save(*args, **kwargs)
+            chave_atual = (self.comissao.contrato_id, self.comissao.tipo, self.agente_id, self.funcao_id)
+            sequencias = Integrante.recalcular_sequencias(
+                Integrante.objects.filter(Q(pk=self.pk) | Integrante.filtro_sequencias([chave_anterior, chave_atual]))
+            )
+            self.sequencia_id, self.inicio_sequencia = sequencias[self.pk]
+
+    # --- SEQUÊNCIA DE DESIGNAÇÕES CONTÍNUAS (contrato, tipo de comissão, agente, função) ---
+    CAMPOS_SEQUENCIA = ('comissao__contrato_id', 'comissao__tipo', 'agente_id', 'funcao_id')
+
+    @staticmethod
+    def filtro_sequencias(chaves):
+        """Q que seleciona todas as designações dos grupos informados (chaves sem contrato são ignoradas)."""
+        filtro = Q(pk__in=[])
+        for chave in set(chaves):
+            if chave and chave[0] is not None:
+                filtro |= Q(**dict(zip(Integrante.CAMPOS_SEQUENCIA, chave)))
+        return filtro
+
+    @classmethod
+    def recalcular_sequencias(cls, designacoes=None):
+        """
+        Recalcula início real e primeira designação da sequência das designações
+        informadas (padrão: todas) e grava apenas as que mudaram. Os grupos devem vir
+        completos, pois a cadeia só é procurada entre as designações recebidas.
+        Retorna {pk: (pk da primeira designação, início real)}.
+        """
+        designacoes = cls.objects.all() if designacoes is None else designacoes
+        linhas = list(designacoes.order_by('ordem', 'pk').values_list(
+            'pk', *cls.CAMPOS_SEQUENCIA, 'data_inicio', 'data_fim', 'data_desligamento',
+            'sequencia_id', 'inicio_sequencia',
+        ))
+        sequencias = calcular_sequencias(
+            (pk, (contrato_id, tipo, agente_id, funcao_id) if contrato_id else None, inicio, fim, desligamento)
+            for pk, contrato_id, tipo, agente_id, funcao_id, inicio, fim, desligamento, _, _ in linhas
+        )
+
+        alteradas = {}
+        for pk, *_, sequencia_id, inicio_sequencia in linhas:
+            if sequencias[pk] != (sequencia_id, inicio_sequencia):
+                alteradas.setdefault(sequencias[pk], []).append(pk)
+        for (sequencia_id, inicio_sequencia), pks in alteradas.items():
+            cls.objects.filter(pk__in=pks).update(sequencia_id=sequencia_id, inicio_sequencia=inicio_sequencia)
+        return sequencias
 
     def clean(self):
         if self.data_fim and self.data_inicio > self.data_fim:
@@ -270,6 +464,9 @@ class Integrante(models.Model):
 
     @property
     def is_ativo(self):
+        # Valor anotado por Integrante.objects.com_status(), quando disponível
+        if 'esta_ativo' in self.__dict__:
+            return self.esta_ativo
         hoje = date.today()
         if self.data_desligamento and self.data_desligamento <= hoje: return False
         if self.data_fim and self.data_fim < hoje: return False
@@ -285,6 +482,12 @@ class Integrante(models.Model):
         verbose_name = "Integrante"
         verbose_name_plural = "Histórico de Integrantes"
         ordering = ['ordem']
+        indexes = [
+            # Filtro de integrantes ativos (Integrante.objects.ativos())
+            models.Index(fields=['data_desligamento', 'data_fim'], name='integrante_ativos_idx'),
+            # Radar de permanência / relatórios de rodízio ordenados pelo início real da sequência
+            models.Index(fields=['inicio_sequencia'], name='integrante_sequencia_idx'),
+        ]
 
 
 import re
@@ -337,12 +540,22 @@ class PrestacaoContas(models.Model):
         verbose_name = "Prestação de Contas"
         verbose_name_plural = "Prestações de Contas"
         ordering = ['-ano_referencia', '-mes_referencia']
+        indexes = [
+            # Último envio por contrato/mês (ORDER BY id DESC com igualdade nas três primeiras colunas)
+            models.Index(fields=['contrato', 'ano_referencia', 'mes_referencia', 'id'], name='prestacao_contrato_ref_idx'),
+        ]
 
     def clean(self):
         hoje = date.today()
         if self.ano_referencia > hoje.year or (self.ano_referencia == hoje.year and self.mes_referencia >= hoje.month):
             raise ValidationError("Não é possível enviar uma prestação de contas para o mês atual ou meses futuros.")
 
+    # O ponteiro da última prestação (contrato, ano, mês) é mantido pelos sinais de contratos/ponteiros.py
+    def save(self, *args, **kwargs):
+        # Envio e ponteiro gravados na mesma transação (post_save roda dentro de save())
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"PC {self.contrato.numero} - {self.mes_referencia:02d}/{self.ano_referencia}"
 
@@ -461,16 +674,97 @@ class PrestacaoContasSetor(models.Model):
         verbose_name = "Prestação de Contas (Setor)"
         verbose_name_plural = "Prestações de Contas (Setores)"
         ordering = ['-ano_referencia', '-mes_referencia']
+        indexes = [
+            models.Index(fields=['setor', 'ano_referencia', 'mes_referencia', 'id'], name='prestacao_setor_ref_idx'),
+        ]
 
     def clean(self):
         hoje = date.today()
         if self.ano_referencia > hoje.year or (self.ano_referencia == hoje.year and self.mes_referencia >= hoje.month):
             raise ValidationError("Não é possível enviar uma prestação de contas para o mês atual ou meses futuros.")
 
+    # O ponteiro da última prestação (setor, ano, mês) é mantido pelos sinais de contratos/ponteiros.py
+    def save(self, *args, **kwargs):
+        # Envio e ponteiro gravados na mesma transação (post_save roda dentro de save())
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"PC {self.setor.sigla or self.setor.nome} - {self.mes_referencia:02d}/{self.ano_referencia}"
 
 
+class UltimaPrestacao(models.Model):
+    """
+    Ponteiro materializado para o envio mais recente (maior id) de cada contrato
+    no mês/ano de referência. Mantido pelos sinais de contratos/ponteiros.py e
+    reconstruído pelo comando 'reconstruir_ultimas_prestacoes'.
+    """
+    contrato = models.ForeignKey(Contrato, on_delete=models.CASCADE, related_name='ultimas_prestacoes')
+    ano_referencia = models.IntegerField("Ano de Referência")
+    mes_referencia = models.IntegerField("Mês de Referência")
+    prestacao = models.OneToOneField(PrestacaoContas, on_delete=models.CASCADE, related_name='ponteiro')
+
+    class Meta:
+        verbose_name = "Última Prestação de Contas"
+        verbose_name_plural = "Últimas Prestações de Contas"
+        unique_together = ['contrato', 'ano_referencia', 'mes_referencia']
+        indexes = [
+            # Leitura de todos os ponteiros de um mês (dashboard, exportações, consolidação)
+            models.Index(fields=['ano_referencia', 'mes_referencia'], name='ultima_prestacao_ref_idx'),
+        ]
+
+    @classmethod
+    def atualizar(cls, contrato_id, ano, mes):
+        """Reaponta (ou remove) o ponteiro de um contrato/mês para o envio mais recente."""
+        ultima_id = PrestacaoContas.objects.filter(
+            contrato_id=contrato_id, ano_referencia=ano, mes_referencia=mes
+        ).order_by('-id').values_list('id', flat=True).first()
+        if ultima_id is None:
+            cls.objects.filter(contrato_id=contrato_id, ano_referencia=ano, mes_referencia=mes).delete()
+        else:
+            cls.objects.update_or_create(
+                contrato_id=contrato_id, ano_referencia=ano, mes_referencia=mes,
+                defaults={'prestacao_id': ultima_id}
+            )
+
+    def __str__(self):
+        return f"Última PC {self.contrato_id} - {self.mes_referencia:02d}/{self.ano_referencia}"
+
+
+class UltimaPrestacaoSetor(models.Model):
+    """Ponteiro materializado para o envio mais recente de cada setor no mês/ano de referência."""
+    setor = models.ForeignKey(Setor, on_delete=models.CASCADE, related_name='ultimas_prestacoes')
+    ano_referencia = models.IntegerField("Ano de Referência")
+    mes_referencia = models.IntegerField("Mês de Referência")
+    prestacao = models.OneToOneField(PrestacaoContasSetor, on_delete=models.CASCADE, related_name='ponteiro')
+
+    class Meta:
+        verbose_name = "Última Prestação de Contas (Setor)"
+        verbose_name_plural = "Últimas Prestações de Contas (Setores)"
+        unique_together = ['setor', 'ano_referencia', 'mes_referencia']
+        indexes = [
+            # Leitura de todos os ponteiros de um mês (dashboard, exportações, consolidação)
+            models.Index(fields=['ano_referencia', 'mes_referencia'], name='ultima_prestacao_setor_ref_idx'),
+        ]
+
+    @classmethod
+    def atualizar(cls, setor_id, ano, mes):
+        """Reaponta (ou remove) o ponteiro de um setor/mês para o envio mais recente."""
+        ultima_id = PrestacaoContasSetor.objects.filter(
+            setor_id=setor_id, ano_referencia=ano, mes_referencia=mes
+        ).order_by('-id').values_list('id', flat=True).first()
+        if ultima_id is None:
+            cls.objects.filter(setor_id=setor_id, ano_referencia=ano, mes_referencia=mes).delete()
+        else:
+            cls.objects.update_or_create(
+                setor_id=setor_id, ano_referencia=ano, mes_referencia=mes,
+                defaults={'prestacao_id': ultima_id}
+            )
+
+    def __str__(self):
+        return f"Última PC Setor {self.setor_id} - {self.mes_referencia:02d}/{self.ano_referencia}"
+
+
 class ApontamentoCorrecaoSetor(models.Model):
     prestacao = models.ForeignKey(
         PrestacaoContasSetor, on_delete=models.CASCADE, related_name='apontamentos'
@@ -552,6 +846,119 @@ class SlideApresentacao(models.Model):
         verbose_name = "Slide Avulso"
         verbose_name_plural = "Slides Avulsos"
         ordering = ['indice_posicao', 'data_registro']
+        indexes = [
+            models.Index(fields=['tipo_apresentacao', 'ano_referencia', 'mes_referencia'], name='slide_apresentacao_ref_idx'),
+        ]
 
     def __str__(self):
         return f"Slide {self.nome_slide} ({self.get_tipo_apresentacao_display()}) - {self.mes_referencia:02d}/{self.ano_referencia}"
+
+
+class TarefaConsolidacao(models.Model):
+    """
+    Pedido de consolidação da apresentação mensal processado em segundo plano
+    pelo comando run_worker, com o progresso registrado a cada arquivo.
+    """
+    TIPO_CHOICES = SlideApresentacao.TIPO_CHOICES
+    STATUS_CHOICES = [
+        ('pendente', 'Na fila'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    tipo_apresentacao = models.CharField("Tipo de Apresentação", max_length=15, choices=TIPO_CHOICES)
+    ano_referencia = models.IntegerField("Ano de Referência")
+    mes_referencia = models.IntegerField("Mês de Referência")
+    status = models.CharField("Status", max_length=15, choices=STATUS_CHOICES, default='pendente')
+    solicitante = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Solicitado por")
+
+    arquivos_total = models.PositiveIntegerField("Total de Arquivos", default=0)
+    arquivos_processados = models.PositiveIntegerField("Arquivos Processados", default=0)
+    paginas_mescladas = models.PositiveIntegerField("Páginas Mescladas", default=0)
+    erros = models.TextField("Erros", blank=True, default='')
+    # O PDF completo fica no cache de consolidação (referenciado pela chave do manifesto);
+    # 'arquivo' guarda uma cópia própria só quando o resultado não entra no cache (com erros)
+    chave_cache = models.CharField("Chave no Cache", max_length=64, blank=True, default='', editable=False)
+    arquivo = models.FileField("PDF Consolidado", upload_to='consolidacoes/', blank=True, null=True)
+
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(null=True, blank=True)
+    data_fim = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarefa de Consolidação"
+        verbose_name_plural = "Tarefas de Consolidação"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['status', 'data_criacao'], name='tarefa_consolidacao_fila_idx'),
+        ]
+
+    @property
+    def lista_erros(self):
+        return [linha for linha in self.erros.splitlines() if linha]
+
+    @property
+    def finalizada(self):
+        return self.status in ('concluida', 'erro')
+
+    def __str__(self):
+        return f"Consolidação {self.get_tipo_apresentacao_display()} {self.mes_referencia:02d}/{self.ano_referencia} ({self.get_status_display()})"
+
+
+class VersaoDados(models.Model):
+    """
+    Contador de versão por domínio de dados, incrementado a cada gravação ou exclusão
+    nos modelos do domínio (ver contratos.versoes). Resultados guardados em cache são
+    indexados por essas versões e deixam de ser usados assim que os dados mudam.
+    """
+    DOMINIO_CHOICES = [
+        ('contratos', 'Contratos e Comissões'),
+        ('prestacoes', 'Prestações de Contas'),
+        ('setores', 'Setores e Cargos Regimentais'),
+    ]
+
+    dominio = models.CharField("Domínio", max_length=20, choices=DOMINIO_CHOICES, unique=True)
+    versao = models.PositiveBigIntegerField("Versão", default=0)
+    data_atualizacao = models.DateTimeField("Última Alteração", auto_now=True)
+
+    class Meta:
+        verbose_name = "Versão dos Dados"
+        verbose_name_plural = "Versões dos Dados"
+
+    def __str__(self):
+        return f"{self.get_dominio_display()} v{self.versao}"
+
+
+class ExecucaoTarefa(models.Model):
+    """
+    Execução de uma tarefa do agendador (comando scheduler, ver contratos.agendador):
+    horário agendado atendido, situação, duração e saída produzida pelos passos.
+    """
+    STATUS_CHOICES = [
+        ('executando', 'Executando'),
+        ('sucesso', 'Sucesso'),
+        ('erro', 'Erro'),
+        ('interrompida', 'Interrompida'),
+    ]
+    tarefa = models.CharField("Tarefa", max_length=50)
+    agendada_para = models.DateTimeField("Horário Agendado")
+    status = models.CharField("Status", max_length=15, choices=STATUS_CHOICES, default='executando')
+    data_inicio = models.DateTimeField("Início")
+    data_fim = models.DateTimeField("Fim", null=True, blank=True)
+    duracao_ms = models.PositiveIntegerField("Duração (ms)", null=True, blank=True)
+    saida = models.TextField("Saída", blank=True, default='')
+
+    class Meta:
+        verbose_name = "Execução de Tarefa Agendada"
+        verbose_name_plural = "Execuções de Tarefas Agendadas"
+        ordering = ['-data_inicio']
+        indexes = [
+            models.Index(fields=['tarefa', 'agendada_para'], name='execucao_tarefa_horario_idx'),
+        ]
+
+    @property
+    def finalizada(self):
+        return self.status != 'executando'
+
+    def __str__(self):
+        return f"{self.tarefa} ({timezone.localtime(self.agendada_para):%d/%m/%Y %H:%M}) - {self.get_status_display()}"
@@ -0,0 +1,76 @@
+"""
+Radar de permanência: tempo de designação contínua de cada integrante ativo.
+
+Uma designação continua a anterior quando pertence ao mesmo contrato, tipo de
+comissão, agente e função, e começa no dia seguinte ao término (previsto ou
+efetivo) da anterior. A data de início real é a da primeira designação da
+cadeia, gravada em Integrante.inicio_sequencia (mantida por Integrante.save(),
+pelos sinais de exclusão abaixo e pelo comando 'recalcular_sequencias').
+
+As exclusões são tratadas por sinais para cobrir também as feitas em lote
+(QuerySet.delete(), ação "excluir selecionados" do admin e a cascata da exclusão
+de comissões), que não chamam o delete() do modelo.
+"""
+from datetime import date
+
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_delete, post_delete
+
+from contratos.models import Integrante
+
+
+def classificar_tempo(dias_totais):
+    """Classe visual para o rodízio: mais de 2 anos, mais de 1 ano ou dentro do prazo."""
+    if dias_totais > 730:
+        return 'bg-danger'
+    if dias_totais > 365:
+        return 'bg-warning text-dark'
+    return 'bg-success'
+
+
+def calcular_radar_permanencia(hoje=None):
+    """
+    Retorna as linhas do radar para os integrantes ativos, ordenadas do maior
+    tempo contínuo para o menor (desempate por senioridade e nome de guerra).
+    Designações de comissões sem contrato não formam cadeia.
+    """
+    hoje = hoje or date.today()
+    integrantes_ativos = Integrante.objects.ativos(hoje).select_related(
+        'agente__posto', 'funcao', 'comissao__contrato'
+    ).annotate(
+        inicio_real=Coalesce('inicio_sequencia', 'data_inicio')
+    ).order_by('inicio_real', 'agente__posto__senioridade', 'agente__nome_de_guerra')
+
+    radar = []
+    for atual in integrantes_ativos:
+        dias_totais = (hoje - atual.inicio_real).days
+        anos, meses = dias_totais // 365, (dias_totais % 365) // 30
+
+        radar.append({
+            'agente': atual.agente,
+            'funcao': atual.funcao,
+            'contrato': atual.comissao.contrato,
+            'dias_totais': dias_totais,
+            'tempo_formatado': f"{anos}a {meses}m ({dias_totais} dias)",
+            'inicio_real': atual.inicio_real,
+            'classe_tempo': classificar_tempo(dias_totais),
+            'inicio_original': atual.data_inicio,
+        })
+    return radar
+
+
+def _guardar_chave_sequencia(sender, instance, **kwargs):
+    # Lida antes da exclusão: na cascata, a comissão ainda existe neste ponto
+    instance._chave_sequencia = Integrante.objects.filter(pk=instance.pk).values_list(
+        *Integrante.CAMPOS_SEQUENCIA
+    ).first()
+
+
+def _recalcular_apos_excluir(sender, instance, **kwargs):
+    chave = getattr(instance, '_chave_sequencia', None)
+    Integrante.recalcular_sequencias(Integrante.objects.filter(Integrante.filtro_sequencias([chave])))
+
+
+def conectar_sinais():
+    pre_delete.connect(_guardar_chave_sequencia, sender=Integrante, dispatch_uid='sequencia_integrante_pre_delete')
+    post_delete.connect(_recalcular_apos_excluir, sender=Integrante, dispatch_uid='sequencia_integrante_delete')
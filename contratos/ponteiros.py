@@ -0,0 +1,61 @@
+"""
+Ponteiros materializados da última prestação (UltimaPrestacao e UltimaPrestacaoSetor).
+
+Cada ponteiro indica o envio mais recente (maior id) de um contrato/setor no mês/ano
+de referência e é mantido pelos sinais pre_save/post_save/post_delete das prestações.
+Por serem sinais, também cobrem as exclusões em lote (QuerySet.delete(), ação
+"excluir selecionados" do admin), que não chamam o delete() do modelo: o vínculo 1:1
+remove o ponteiro em cascata e o post_delete o reaponta para o envio anterior.
+
+Atualizações em massa (QuerySet.update, bulk_create) não disparam sinais: use o
+comando 'reconstruir_ultimas_prestacoes'.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from contratos import models
+
+# Modelo da prestação -> (modelo do ponteiro, campo do dono do envio)
+PONTEIROS = {
+    models.PrestacaoContas: (models.UltimaPrestacao, 'contrato_id'),
+    models.PrestacaoContasSetor: (models.UltimaPrestacaoSetor, 'setor_id'),
+}
+
+
+def _chave(sender, instance):
+    _, campo = PONTEIROS[sender]
+    return (getattr(instance, campo), instance.ano_referencia, instance.mes_referencia)
+
+
+def _guardar_chave_anterior(sender, instance, raw=False, **kwargs):
+    instance._chave_ponteiro_anterior = None
+    if raw or not instance.pk:
+        return
+    _, campo = PONTEIROS[sender]
+    instance._chave_ponteiro_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        campo, 'ano_referencia', 'mes_referencia'
+    ).first()
+
+
+def _atualizar_apos_salvar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ponteiro, _ = PONTEIROS[sender]
+    chave_anterior = getattr(instance, '_chave_ponteiro_anterior', None)
+    chave_atual = _chave(sender, instance)
+    # A chave antiga é reapontada primeiro para liberar o vínculo 1:1 com este envio
+    if chave_anterior and chave_anterior != chave_atual:
+        ponteiro.atualizar(*chave_anterior)
+    ponteiro.atualizar(*chave_atual)
+
+
+def _atualizar_apos_excluir(sender, instance, **kwargs):
+    ponteiro, _ = PONTEIROS[sender]
+    ponteiro.atualizar(*_chave(sender, instance))
+
+
+def conectar_sinais():
+    for modelo in PONTEIROS:
+        nome = modelo.__name__
+        pre_save.connect(_guardar_chave_anterior, sender=modelo, dispatch_uid=f'ponteiro_{nome}_pre_save')
+        post_save.connect(_atualizar_apos_salvar, sender=modelo, dispatch_uid=f'ponteiro_{nome}_save')
+        post_delete.connect(_atualizar_apos_excluir, sender=modelo, dispatch_uid=f'ponteiro_{nome}_delete')
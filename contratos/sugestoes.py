@@ -0,0 +1,157 @@
+"""
+Sugestões para as caixas de busca (contratos, empresas e militares), servidas de um
+índice de prefixos em memória.
+
+Cada worker monta o índice na primeira consulta, a partir dos dados públicos:
+contratos vigentes, as empresas desses contratos e os militares com designação ativa.
+O índice guarda, ordenadas, as palavras normalizadas (contratos.busca.normalizar_texto)
+de cada item; uma consulta é uma busca binária pelo prefixo, sem acesso ao banco.
+
+O índice é reconstruído quando a versão do domínio 'contratos' (contratos.versoes)
+muda. A versão é conferida no máximo a cada SUGESTOES_INTERVALO_VERIFICACAO segundos,
+de modo que as teclas digitadas dentro desse intervalo não consultam o banco.
+"""
+import threading
+import time
+from bisect import bisect_left
+from datetime import date
+
+from django.conf import settings
+from django.urls import reverse
+
+from contratos.busca import normalizar_texto, termos_busca
+from contratos.models import Contrato, Integrante
+from contratos.versoes import versoes
+
+TIPOS = ('contratos', 'empresas', 'militares')
+TAMANHO_MINIMO = 2
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 20
+
+
+class IndicePrefixos:
+    """Índice imutável de itens (dicionários serializáveis) pelas palavras de suas chaves."""
+
+    def __init__(self, itens_com_chaves):
+        self.itens = []
+        self.palavras_por_item = []
+        entradas = []
+        for item, chaves in itens_com_chaves:
+            palavras = set(normalizar_texto(' '.join(filter(None, chaves))).split())
+            if not palavras:
+                continue
+            posicao = len(self.itens)
+            self.itens.append(item)
+            self.palavras_por_item.append(palavras)
+            entradas.extend((palavra, normalizar_texto(item['rotulo']), posicao) for palavra in palavras)
+        entradas.sort()
+        self.palavras = [palavra for palavra, _, _ in entradas]
+        self.posicoes = [posicao for _, _, posicao in entradas]
+
+    def __len__(self):
+        return len(self.itens)
+
+    def buscar(self, termos, tipos=TIPOS, limite=LIMITE_PADRAO):
+        """Itens dos tipos informados em que cada termo é prefixo de alguma palavra (ordem alfabética)."""
+        if not termos:
+            return []
+        primeiro, demais = termos[0], termos[1:]
+        encontrados, vistos = [], set()
+        inicio = bisect_left(self.palavras, primeiro)
+        for indice in range(inicio, len(self.palavras)):
+            if not self.palavras[indice].startswith(primeiro):
+                break
+            posicao = self.posicoes[indice]
+            if posicao in vistos:
+                continue
+            vistos.add(posicao)
+            item = self.itens[posicao]
+            if item['tipo'] not in tipos:
+                continue
+            palavras = self.palavras_por_item[posicao]
+            if all(any(p.startswith(termo) for p in palavras) for termo in demais):
+                encontrados.append(item)
+                if len(encontrados) >= limite:
+                    break
+        return encontrados
+
+
+def montar_indice(hoje=None):
+    """Monta o índice a partir do banco (três consultas)."""
+    hoje = hoje or date.today()
+    itens = []
+    empresas = {}
+
+    for contrato in Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').order_by('numero'):
+        empresa = contrato.empresa
+        itens.append(({
+            'tipo': 'contratos',
+            'rotulo': f"CT {contrato.numero} - {empresa.nome_exibicao}",
+            'valor': contrato.numero,
+            'url': reverse('detalhe_contrato', args=[contrato.pk]),
+        }, [contrato.numero, contrato.objeto[:200]]))
+        empresas[empresa.pk] = empresa
+
+    for empresa in empresas.values():
+        itens.append(({
+            'tipo': 'empresas',
+            'rotulo': empresa.nome_exibicao,
+            'valor': empresa.razao_social,
+            'url': None,
+        }, [empresa.razao_social, empresa.nome_fantasia, empresa.cnpj]))
+
+    # O SARAM é chave de busca, mas não é devolvido nas sugestões
+    agentes = (
+        Integrante.objects.ativos(hoje)
+        .values_list('agente__posto__sigla', 'agente__nome_de_guerra', 'agente__nome_completo', 'agente__saram')
+        .distinct()
+    )
+    for posto, nome_de_guerra, nome_completo, saram in agentes:
+        itens.append(({
+            'tipo': 'militares',
+            'rotulo': f"{posto} {nome_de_guerra}",
+            'valor': nome_de_guerra,
+            'url': None,
+        }, [nome_de_guerra, nome_completo, saram]))
+
+    return IndicePrefixos(itens)
+
+
+class _EstadoIndice:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indice = None
+        self.chave = None
+        self.verificado_em = 0.0
+
+
+_estado = _EstadoIndice()
+
+
+def obter_indice():
+    """Índice do worker, reconstruído quando a versão dos dados (ou o dia) muda."""
+    agora = time.monotonic()
+    if _estado.indice is not None and agora - _estado.verificado_em < settings.SUGESTOES_INTERVALO_VERIFICACAO:
+        return _estado.indice
+
+    with _estado.lock:
+        chave = (versoes(['contratos'])['contratos'], date.today())
+        if _estado.indice is None or chave != _estado.chave:
+            _estado.indice = montar_indice(chave[1])
+            _estado.chave = chave
+        _estado.verificado_em = time.monotonic()
+        return _estado.indice
+
+
+def descartar_indice():
+    with _estado.lock:
+        _estado.indice = None
+        _estado.chave = None
+
+
+def sugerir(texto, tipos=TIPOS, limite=LIMITE_PADRAO):
+    """Sugestões para o texto digitado; textos com menos de TAMANHO_MINIMO caracteres não geram consulta."""
+    termos = termos_busca(texto)
+    if not termos or len(''.join(termos)) < TAMANHO_MINIMO:
+        return []
+    return obter_indice().buscar(termos, tipos, min(limite, LIMITE_MAXIMO))
@@ -1,8 +1,12 @@
 from django import template
-from contratos.utils import is_admin as utils_is_admin
+from contratos.utils import is_admin as utils_is_admin, is_auditor as utils_is_auditor
 
 register = template.Library()
 
 @register.filter
 def is_admin(user):
     return utils_is_admin(user)
+
+@register.filter
+def is_auditor(user):
+    return utils_is_auditor(user)
@@ -0,0 +1,25 @@
+"""
+Base comum dos testes que gravam arquivos: uploads e consolidação de apresentações.
+"""
+import os
+import shutil
+import tempfile
+from django.test import override_settings
+
+
+class MidiaTemporariaMixin:
+    """
+    Redireciona MEDIA_ROOT e o cache de consolidação para um diretório temporário,
+    removido ao fim de cada teste: nada é gravado na mídia real do projeto.
+    """
+
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media_dir,
+            CONSOLIDACAO_CACHE_DIR=os.path.join(self.media_dir, 'cache_consolidacao'),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
@@ -0,0 +1,164 @@
+"""
+Testes do agendador de tarefas (contratos.agendador / comando scheduler):
+- Horários agendados e recuperação do horário perdido
+- Passos em ordem, interrompidos na primeira falha
+- Trava por tarefa e execuções interrompidas
+- Limpeza diária do histórico e verificação da Gmail API
+- Página de histórico no portal
+"""
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from contratos import agendador
+from contratos.agendador import Comando, Tarefa
+from contratos.models import ExecucaoTarefa
+from contratos.travas import trava_consultiva
+
+TAREFAS_TESTE = (
+    Tarefa('ativacao', time(0, 0), (Comando('ativar_comissoes_iniciadas'),), 'Ativa comissões.'),
+    Tarefa('quebrada', time(3, 0), (Comando('comando_inexistente'), Comando('ativar_comissoes_iniciadas'))),
+)
+
+
+def _local(ano, mes, dia, hora, minuto=0):
+    return timezone.make_aware(datetime(ano, mes, dia, hora, minuto))
+
+
+@patch.object(agendador, 'TAREFAS', TAREFAS_TESTE)
+class AgendadorTests(TestCase):
+
+    def test_horarios_agendados(self):
+        tarefa = TAREFAS_TESTE[1]
+        self.assertEqual(tarefa.ultimo_horario(_local(2026, 5, 10, 2, 59)), _local(2026, 5, 9, 3))
+        self.assertEqual(tarefa.ultimo_horario(_local(2026, 5, 10, 3, 0)), _local(2026, 5, 10, 3))
+        self.assertEqual(tarefa.proximo_horario(_local(2026, 5, 10, 14)), _local(2026, 5, 11, 3))
+
+    def test_executa_pendentes_uma_vez_por_horario(self):
+        agora = _local(2026, 5, 10, 9)
+
+        execucoes = agendador.executar_pendentes(agora)
+
+        self.assertEqual([(e.tarefa, e.status) for e in execucoes], [('ativacao', 'sucesso'), ('quebrada', 'erro')])
+        ativacao, quebrada = execucoes
+        self.assertEqual(ativacao.agendada_para, _local(2026, 5, 10, 0))
+        self.assertIn("Nenhuma comissão para ativar hoje.", ativacao.saida)
+        self.assertIsNotNone(ativacao.duracao_ms)
+        # A falha interrompe os passos seguintes
+        self.assertIn("[ERRO]", quebrada.saida)
+        self.assertNotIn("ativar_comissoes_iniciadas", quebrada.saida)
+
+        # Horários já atendidos (com sucesso ou erro) não são repetidos
+        self.assertEqual(agendador.executar_pendentes(agora + timedelta(hours=5)), [])
+        # O horário do dia seguinte perdido com o agendador parado é recuperado
+        recuperadas = agendador.executar_pendentes(_local(2026, 5, 11, 23))
+        self.assertEqual([e.agendada_para for e in recuperadas], [_local(2026, 5, 11, 0), _local(2026, 5, 11, 3)])
+
+    def test_trava_impede_execucao_sobreposta(self):
+        tarefa = TAREFAS_TESTE[0]
+        with trava_consultiva('agendador:ativacao'):
+            self.assertIsNone(agendador.executar(tarefa, _local(2026, 5, 10, 0)))
+        self.assertFalse(ExecucaoTarefa.objects.exists())
+
+    def test_execucao_interrompida_e_refeita(self):
+        tarefa = TAREFAS_TESTE[0]
+        horario = _local(2026, 5, 10, 0)
+        orfa = ExecucaoTarefa.objects.create(tarefa='ativacao', agendada_para=horario, data_inicio=horario)
+
+        execucao = agendador.executar(tarefa, horario)
+
+        orfa.refresh_from_db()
+        self.assertEqual(orfa.status, 'interrompida')
+        self.assertEqual(execucao.status, 'sucesso')
+
+    def test_comando_scheduler(self):
+        out = StringIO()
+        call_command('scheduler', '--once', stdout=out)
+        self.assertIn("[SUCESSO] ativacao", out.getvalue())
+        self.assertIn("[ERRO] quebrada", out.getvalue())
+        self.assertEqual(ExecucaoTarefa.objects.count(), 2)
+
+        out = StringIO()
+        call_command('scheduler', '--tarefa', 'ativacao', stdout=out)
+        self.assertIn("[SUCESSO] ativacao", out.getvalue())
+        self.assertEqual(ExecucaoTarefa.objects.filter(tarefa='ativacao').count(), 2)
+
+    def test_scheduler_remove_historico_antigo_uma_vez_por_dia(self):
+        antiga = timezone.now() - timedelta(days=120)
+        ExecucaoTarefa.objects.create(
+            tarefa='ativacao', agendada_para=antiga, data_inicio=antiga, status='sucesso'
+        )
+        # Três ciclos do laço: dois no mesmo dia e um depois da virada de data
+        datas = iter([date(2026, 5, 10), date(2026, 5, 10), date(2026, 5, 11)])
+        sono = MagicMock(side_effect=[None, None, KeyboardInterrupt])
+
+        with patch('contratos.management.commands.scheduler.timezone.localdate', lambda: next(datas)), \
+                patch('contratos.management.commands.scheduler.time.sleep', sono), \
+                patch.object(agendador, 'remover_antigas', wraps=agendador.remover_antigas) as remover, \
+                patch.object(agendador, 'executar_pendentes', return_value=[]):
+            out = StringIO()
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('scheduler', '--reter-dias', '90', stdout=out)
+
+        self.assertEqual(remover.call_count, 2)
+        self.assertIn("1 execução(ões) antiga(s) removida(s)", out.getvalue())
+        self.assertFalse(ExecucaoTarefa.objects.exists())
+
+    def test_verificacao_da_gmail_api_usa_cliente_novo(self):
+        from contratos import utils_gmail
+
+        with patch.object(utils_gmail.GmailAPIClient, 'autenticar', side_effect=RuntimeError("Token inválido.")):
+            with self.assertRaises(CommandError) as contexto:
+                call_command('verificar_saude_gmail', stdout=StringIO())
+        self.assertIn("Token inválido.", str(contexto.exception))
+
+        servico = MagicMock()
+        servico._http.credentials.expired = False
+
+        def autenticar(cliente):
+            cliente._service = servico
+            return servico
+
+        with patch.object(utils_gmail.GmailAPIClient, 'autenticar', autenticar):
+            out = StringIO()
+            call_command('verificar_saude_gmail', stdout=out)
+        self.assertIn('"token": "valido"', out.getvalue())
+        # O cliente compartilhado do envio de e-mails não é tocado
+        self.assertIsNot(utils_gmail.gmail_client._service, servico)
+
+
+@patch.object(agendador, 'TAREFAS', TAREFAS_TESTE)
+class HistoricoAgendadorTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(username='normal', password='pw')
+        User.objects.create_superuser(username='super', password='pw')
+        self.url = reverse('historico_agendador')
+        agora = timezone.now()
+        ExecucaoTarefa.objects.create(
+            tarefa='ativacao', agendada_para=agora, data_inicio=agora, data_fim=agora,
+            status='sucesso', duracao_ms=42, saida='Nenhuma comissão para ativar hoje.'
+        )
+
+    def test_historico_para_superusuario(self):
+        self.client.login(username='super', password='pw')
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        ultimas = {item['tarefa'].nome: item['ultima'] for item in response.context['tarefas']}
+        self.assertEqual(ultimas['ativacao'].duracao_ms, 42)
+        self.assertIsNone(ultimas['quebrada'])
+        self.assertContains(response, "42 ms")
+        self.assertContains(response, "Nunca executada")
+
+        response = self.client.get(self.url, {'tarefa': 'quebrada'})
+        self.assertEqual(response.context['pagina'].paginator.count, 0)
+
+    def test_acesso_negado_usuario_normal(self):
+        self.client.login(username='normal', password='pw')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('painel_controle'))
@@ -6,11 +6,13 @@ from django.contrib.auth.models import User, Group
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from contratos.models import Contrato, Empresa, PrestacaoContas, Agente, PostoGraduacao, Comissao, ApontamentoCorrecao
+from contratos.tests.midia import MidiaTemporariaMixin
 
-class ApontamentoCorrecaoTests(TestCase):
+class ApontamentoCorrecaoTests(MidiaTemporariaMixin, TestCase):
     """Suíte de testes automatizados para a funcionalidade de Apontamentos de Correção."""
 
     def setUp(self):
+        super().setUp()
         self.posto = PostoGraduacao.objects.create(sigla="CB", descricao="Cabo", senioridade=8)
         self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
         self.agente = Agente.objects.create(
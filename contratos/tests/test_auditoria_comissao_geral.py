@@ -109,7 +109,7 @@ class AuditoriaComissaoSemContratoTest(TestCase):
         url = reverse('exportar_vencimentos_csv') + '?formato=csv'
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("Planejamento", content)
 
     # ========================================
@@ -153,7 +153,7 @@ class AuditoriaComissaoSemContratoTest(TestCase):
         url = reverse('exportar_periodo_csv') + f'?data_inicial={data_ini}&data_final={data_fim}'
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("Planejamento", content)
 
     # ========================================
@@ -0,0 +1,253 @@
+"""
+Testes do comando executar_backup:
+- SQLite: cópia pela API de backup online, compactada e registrada no manifesto
+- PostgreSQL: pg_dump (formato custom) ligado por pipe ao compressor, sem passar pelo Python
+- Mídia: snapshots incrementais endereçados por conteúdo, retenção e comando restaurar_midia
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.management import call_command, CommandError
+from django.db import transaction
+from contratos.backup_midia import RepositorioMidia
+from contratos.management.commands.executar_backup import Command, ARQUIVO_MANIFESTO
+from contratos.models import Empresa
+
+
+def _manifesto(diretorio):
+    linhas = (Path(diretorio) / ARQUIVO_MANIFESTO).read_text(encoding='utf-8').splitlines()
+    return [json.loads(linha) for linha in linhas]
+
+
+class BackupSqliteTests(TransactionTestCase):
+    # A cópia online do SQLite exige que a conexão não esteja dentro de uma transação (TestCase)
+
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.diretorio = Path(temporario.name)
+        self.media = self.diretorio / 'media'
+        (self.media / 'prestacoes').mkdir(parents=True)
+        (self.media / 'prestacoes' / 'relatorio.pdf').write_bytes(b'%PDF-1.4 teste')
+
+    def test_sqlite_backup_online_com_manifesto(self):
+        Empresa.objects.create(razao_social="Empresa do Backup", cnpj="11222333000181")
+        destino = self.diretorio / 'backups'
+
+        out = StringIO()
+        with override_settings(BACKUP_DIR=str(destino), MEDIA_ROOT=str(self.media)):
+            call_command('executar_backup', force=True, stdout=out)
+
+        entradas = {entrada['tipo']: entrada for entrada in _manifesto(destino)}
+        banco = entradas['banco']
+        arquivo = destino / banco['arquivo']
+        self.assertTrue(banco['arquivo'].endswith('.sqlite3.gz'))
+        self.assertEqual(banco['tamanho_bytes'], arquivo.stat().st_size)
+        self.assertEqual(banco['sha256'], hashlib.sha256(arquivo.read_bytes()).hexdigest())
+        self.assertEqual(entradas['midia']['arquivo'], 'midia/snapshots/%s.json.gz' % date.today().strftime('%Y%m%d'))
+        self.assertEqual(entradas['midia']['arquivos'], 1)
+        self.assertIn("[MANIFESTO]", out.getvalue())
+
+        # A cópia é um banco SQLite íntegro com os dados gravados
+        copia = self.diretorio / 'copia.sqlite3'
+        copia.write_bytes(gzip.decompress(arquivo.read_bytes()))
+        with sqlite3.connect(copia) as conexao:
+            nomes = [linha[0] for linha in conexao.execute("SELECT razao_social FROM contratos_empresa")]
+        self.assertEqual(nomes, ["Empresa do Backup"])
+        # Nenhum arquivo temporário da cópia fica para trás
+        self.assertEqual(sorted(p.name for p in destino.iterdir()), [banco['arquivo'], ARQUIVO_MANIFESTO, 'midia'])
+
+    def test_sqlite_dentro_de_transacao(self):
+        destino = self.diretorio / 'backups'
+        out = StringIO()
+        with override_settings(BACKUP_DIR=str(destino), MEDIA_ROOT=str(self.media)), transaction.atomic():
+            call_command('executar_backup', force=True, stdout=out)
+
+        self.assertIn("não pode rodar dentro de uma transação", out.getvalue())
+        self.assertEqual([entrada['tipo'] for entrada in _manifesto(destino)], ['midia'])
+
+
+@skipUnless(os.name == 'posix', 'Usa scripts de shell no lugar do pg_dump.')
+class BackupPostgresqlTests(TestCase):
+
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.diretorio = Path(temporario.name)
+        self.bin = self.diretorio / 'bin'
+        self.bin.mkdir()
+
+    def _pg_dump_falso(self, corpo):
+        script = self.bin / 'pg_dump'
+        script.write_text(f"#!/bin/sh\n{corpo}\n")
+        script.chmod(0o755)
+
+    def _executar(self, formato='custom'):
+        out = StringIO()
+        comando = Command(stdout=out)
+        caminho = f"{self.bin}{os.pathsep}{os.environ.get('PATH', '')}"
+        with patch.dict(os.environ, {'PATH': caminho}), \
+                patch('contratos.management.commands.executar_backup.shutil.which', return_value=None):
+            comando.backup_postgresql(self.diretorio, '20260601', formato)
+        return out.getvalue()
+
+    def test_dump_custom_compactado_pelo_pipe(self):
+        self._pg_dump_falso('echo "ARGS $@"; head -c 200000 /dev/zero')
+
+        saida = self._executar()
+
+        arquivo = self.diretorio / 'db_backup_20260601.dump.gz'
+        conteudo = gzip.decompress(arquivo.read_bytes())
+        self.assertTrue(conteudo.startswith(b'ARGS '))
+        self.assertIn(b'-F c -Z 0', conteudo.splitlines()[0])
+        self.assertEqual(len(conteudo.split(b'\n', 1)[1]), 200000)
+        # O arquivo compactado é bem menor que o dump
+        self.assertLess(arquivo.stat().st_size, 10000)
+
+        entrada, = _manifesto(self.diretorio)
+        self.assertEqual(entrada['formato'], 'custom')
+        self.assertEqual(entrada['compressao'], 'gzip')
+        self.assertEqual(entrada['sha256'], hashlib.sha256(arquivo.read_bytes()).hexdigest())
+        self.assertIn("Dump do banco salvo em", saida)
+
+    def test_falha_do_pg_dump_remove_arquivo_parcial(self):
+        self._pg_dump_falso('echo "parcial"; echo "conexão recusada" >&2; exit 1')
+
+        saida = self._executar(formato='sql')
+
+        self.assertIn("Erro ao executar pg_dump: conexão recusada", saida)
+        self.assertFalse((self.diretorio / 'db_backup_20260601.sql.gz').exists())
+        self.assertFalse((self.diretorio / ARQUIVO_MANIFESTO).exists())
+
+
+class BackupMidiaTests(TestCase):
+
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.diretorio = Path(temporario.name)
+        self.media = self.diretorio / 'media'
+        self.repositorio = RepositorioMidia(self.diretorio / 'backups' / 'midia')
+        self._gravar('prestacoes/2026/janeiro.pdf', b'%PDF janeiro', mtime=1000)
+        self._gravar('prestacoes/2026/fevereiro.pdf', b'%PDF fevereiro', mtime=1000)
+        self._gravar('slides/capa.pdf', b'%PDF janeiro', mtime=1000)
+
+    def _gravar(self, relativo, conteudo, mtime):
+        caminho = self.media / relativo
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_bytes(conteudo)
+        os.utime(caminho, (mtime, mtime))
+
+    def _conteudo(self, pasta):
+        return {p.relative_to(pasta).as_posix(): p.read_bytes() for p in Path(pasta).rglob('*') if p.is_file()}
+
+    def test_snapshots_copiam_apenas_conteudo_novo(self):
+        primeiro = self.repositorio.criar_snapshot(self.media, '20260601')
+        # Conteúdo repetido (capa.pdf = janeiro.pdf) é guardado uma única vez
+        self.assertEqual((primeiro.arquivos, primeiro.objetos_novos), (3, 2))
+
+        self._gravar('prestacoes/2026/fevereiro.pdf', b'%PDF fevereiro v2', mtime=2000)
+        self._gravar('prestacoes/2026/marco.pdf', b'%PDF marco', mtime=2000)
+        segundo = self.repositorio.criar_snapshot(self.media, '20260602')
+
+        self.assertEqual(segundo.arquivos, 4)
+        self.assertEqual(segundo.reaproveitados, 2)
+        self.assertEqual(segundo.objetos_novos, 2)
+        self.assertEqual(segundo.bytes_copiados, len(b'%PDF fevereiro v2') + len(b'%PDF marco'))
+        self.assertEqual(self.repositorio.listar_snapshots(), ['20260601', '20260602'])
+
+    def test_pastas_de_arquivos_gerados_ficam_fora(self):
+        self._gravar('cache_consolidacao/abc123.pdf', b'%PDF cache', mtime=1000)
+        self._gravar('consolidacoes/apresentacao.pdf', b'%PDF tarefa', mtime=1000)
+
+        resultado = self.repositorio.criar_snapshot(self.media, '20260601')
+
+        self.assertEqual(resultado.arquivos, 3)
+        self.assertEqual(
+            sorted(self.repositorio.ler_manifesto('20260601')['arquivos']),
+            ['prestacoes/2026/fevereiro.pdf', 'prestacoes/2026/janeiro.pdf', 'slides/capa.pdf'],
+        )
+
+    def test_retencao_remove_snapshots_e_objetos_sem_referencia(self):
+        self.repositorio.criar_snapshot(self.media, '20260501')
+        self._gravar('prestacoes/2026/fevereiro.pdf', b'%PDF fevereiro v2', mtime=2000)
+        self.repositorio.criar_snapshot(self.media, '20260601')
+
+        removidos, objetos, liberados = self.repositorio.remover_snapshots_antigos(30, hoje=date(2026, 6, 10))
+
+        self.assertEqual(removidos, ['20260501'])
+        # Só o conteúdo antigo de fevereiro.pdf deixou de ser referenciado
+        self.assertEqual((objetos, liberados), (1, len(b'%PDF fevereiro')))
+        self.assertEqual(self.repositorio.listar_snapshots(), ['20260601'])
+        self.assertEqual(self.repositorio.restaurar('20260601', self.diretorio / 'restaurado', verificar=True), (3, 0))
+
+        # O snapshot mais recente é mantido mesmo fora do prazo
+        self.assertEqual(self.repositorio.remover_snapshots_antigos(30, hoje=date(2027, 1, 1)), ([], 0, 0))
+
+    def test_restaura_qualquer_snapshot(self):
+        esperado = self._conteudo(self.media)
+        self.repositorio.criar_snapshot(self.media, '20260601')
+        self._gravar('prestacoes/2026/janeiro.pdf', b'%PDF janeiro corrigido', mtime=3000)
+        (self.media / 'slides' / 'capa.pdf').unlink()
+        self.repositorio.criar_snapshot(self.media, '20260602')
+
+        destino = self.diretorio / 'restaurado'
+        self.assertEqual(self.repositorio.restaurar('20260601', destino), (3, 0))
+        self.assertEqual(self._conteudo(destino), esperado)
+        self.assertEqual((destino / 'slides' / 'capa.pdf').stat().st_mtime, 1000)
+        # Uma segunda restauração mantém os arquivos que já estão atualizados
+        self.assertEqual(self.repositorio.restaurar('20260601', destino), (0, 3))
+
+    def test_verificacao_detecta_objeto_corrompido(self):
+        self.repositorio.criar_snapshot(self.media, '20260601')
+        sha256 = self.repositorio.ler_manifesto('20260601')['arquivos']['slides/capa.pdf']['sha256']
+        self.repositorio.caminho_objeto(sha256).write_bytes(b'corrompido')
+
+        with self.assertRaises(ValueError):
+            self.repositorio.restaurar('20260601', self.diretorio / 'restaurado', verificar=True)
+
+    def test_comando_restaurar_midia(self):
+        self.repositorio.criar_snapshot(self.media, '20260601')
+        destino = self.diretorio / 'restaurado'
+
+        with override_settings(BACKUP_DIR=str(self.diretorio / 'backups')):
+            out = StringIO()
+            call_command('restaurar_midia', '--listar', stdout=out)
+            self.assertIn("20260601: 3 arquivo(s)", out.getvalue())
+
+            out = StringIO()
+            call_command('restaurar_midia', 'ultimo', '--destino', str(destino), '--verificar', stdout=out)
+            self.assertIn("Snapshot 20260601 restaurado: 3 arquivo(s) copiado(s)", out.getvalue())
+            self.assertEqual(self._conteudo(destino), self._conteudo(self.media))
+
+            with self.assertRaises(CommandError):
+                call_command('restaurar_midia', '20250101', '--destino', str(destino))
+
+    def test_comando_restaurar_midia_com_limpeza(self):
+        self.repositorio.criar_snapshot(self.media, '20260601')
+        destino = self.diretorio / 'restaurado'
+        (destino / 'prestacoes').mkdir(parents=True)
+        (destino / 'prestacoes' / 'posterior.pdf').write_bytes(b'%PDF posterior')
+        (destino / 'cache_consolidacao').mkdir()
+        (destino / 'cache_consolidacao' / 'abc123.pdf').write_bytes(b'%PDF cache')
+
+        with override_settings(BACKUP_DIR=str(self.diretorio / 'backups')):
+            call_command('restaurar_midia', '20260601', '--destino', str(destino), stdout=StringIO())
+            self.assertTrue((destino / 'prestacoes' / 'posterior.pdf').exists())
+
+            out = StringIO()
+            call_command('restaurar_midia', '20260601', '--destino', str(destino), '--limpar', stdout=out)
+
+        self.assertIn("1 arquivo(s) ausente(s) do snapshot removido(s)", out.getvalue())
+        self.assertFalse((destino / 'prestacoes' / 'posterior.pdf').exists())
+        # O cache de consolidação não faz parte do backup e não é apagado
+        self.assertTrue((destino / 'cache_consolidacao' / 'abc123.pdf').exists())
@@ -0,0 +1,94 @@
+"""
+Testes da busca textual de contratos (contratos.busca):
+- Normalização sem acentos/pontuação e casamento por prefixo de todos os termos
+- Índice mantido ao salvar/excluir contratos e ao alterar a empresa
+- Página de resultados ordenada por relevância e paginada
+- Comando reindexar_busca
+"""
+from datetime import date, timedelta
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from django.urls import reverse
+from contratos.models import Contrato, Empresa
+from contratos import busca
+
+
+class BuscaContratosTests(TestCase):
+
+    def setUp(self):
+        self.hoje = date.today()
+        self.empresa = Empresa.objects.create(razao_social="Conservação Predial Ltda", nome_fantasia="LimpaBem", cnpj="11222333000181")
+        self.outra = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="44555666000199")
+
+    def _contrato(self, numero, objeto, empresa=None, vigencia_fim=None):
+        return Contrato.objects.create(
+            numero=numero, objeto=objeto, empresa=empresa or self.empresa,
+            vigencia_inicio=self.hoje - timedelta(days=10),
+            vigencia_fim=vigencia_fim or self.hoje + timedelta(days=300), valor_total=1000
+        )
+
+    def _numeros(self, texto):
+        return [c.numero for c in busca.buscar_contratos(texto).order_by('-relevancia', 'numero')]
+
+    def test_normalizacao(self):
+        self.assertEqual(busca.normalizar_texto("Manutenção-Elétrica 12/2026"), "manutencao eletrica 12 2026")
+        self.assertEqual(busca.termos_busca("  ÁGUA, esgoto  "), ["agua", "esgoto"])
+
+    def test_ignora_acentos_e_casa_por_prefixo(self):
+        self._contrato("10/2026", "Manutenção de ar-condicionado", empresa=self.outra)
+        self._contrato("11/2026", "Serviço de limpeza")
+
+        self.assertEqual(self._numeros("manutencao"), ["10/2026"])
+        self.assertEqual(self._numeros("MANUT condic"), ["10/2026"])
+        self.assertEqual(self._numeros("conservacao"), ["11/2026"])
+        self.assertEqual(self._numeros("limpabem"), ["11/2026"])
+        self.assertEqual(self._numeros("manutencao limpeza"), [])
+        self.assertEqual(self._numeros("?!"), [])
+
+    def test_relevancia_favorece_mais_ocorrencias(self):
+        self._contrato("20/2026", "Fornecimento de água mineral e água para bebedouros", empresa=self.outra)
+        self._contrato("21/2026", "Manutenção predial, inclusive reservatórios de água e coberturas externas", empresa=self.outra)
+
+        self.assertEqual(self._numeros("agua"), ["20/2026", "21/2026"])
+
+    def test_indice_acompanha_alteracoes(self):
+        contrato = self._contrato("30/2026", "Vigilância armada", empresa=self.outra)
+
+        contrato.objeto = "Vigilância desarmada"
+        contrato.save()
+        self.assertEqual(self._numeros("desarmada"), ["30/2026"])
+
+        self.outra.nome_fantasia = "Guardiões"
+        self.outra.save()
+        self.assertEqual(self._numeros("guardioes"), ["30/2026"])
+
+        contrato.delete()
+        self.assertEqual(self._numeros("vigilancia"), [])
+
+    def test_pagina_de_resultados_paginada_e_somente_vigentes(self):
+        for i in range(25):
+            self._contrato(f"{100 + i}/2026", "Serviço de jardinagem")
+        self._contrato("99/2020", "Serviço de jardinagem", vigencia_fim=self.hoje - timedelta(days=1))
+
+        url = reverse('buscar_contratos')
+        primeira = self.client.get(url, {'q': 'Jardinagem'})
+        self.assertEqual(primeira.context['pagina'].paginator.count, 25)
+        self.assertEqual(len(primeira.context['contratos']), 20)
+        self.assertContains(primeira, "pagina=2")
+
+        segunda = self.client.get(url, {'q': 'Jardinagem', 'pagina': 2})
+        numeros = [c.numero for c in segunda.context['contratos']]
+        self.assertEqual(len(numeros), 5)
+        self.assertNotIn("99/2020", numeros)
+
+    def test_comando_reindexar(self):
+        self._contrato("40/2026", "Lavanderia hospitalar")
+        Contrato.objects.update(objeto="Coleta de resíduos")
+
+        out = StringIO()
+        call_command('reindexar_busca', stdout=out)
+
+        self.assertIn('[OK] 1 contrato(s) reindexado(s).', out.getvalue())
+        self.assertEqual(self._numeros("residuos"), ["40/2026"])
+        self.assertEqual(self._numeros("lavanderia"), [])
@@ -1,6 +1,11 @@
+from unittest import skipUnless
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.management import call_command
 from datetime import date, timedelta
+from contratos import versoes
+from contratos.travas import trava_consultiva
 from contratos.models import Contrato, Empresa, Comissao, Integrante, Agente, PostoGraduacao, Funcao
 from io import StringIO
 
@@ -69,6 +74,61 @@ class TestComissaoManagementCommands(TestCase):
         self.assertEqual(integrante.data_fim, comissao.data_fim, "A data de fim do integrante deve ser truncada para a data da comissão.")
         self.assertIn("Processo concluído. 1 comissões foram desativadas.", out.getvalue())
 
+    def test_desativar_comissoes_em_lote(self):
+        """Integrantes sem fim também são encerrados, sequências e versão dos dados acompanham a alteração."""
+        fim = self.hoje - timedelta(days=1)
+        comissao = Comissao.objects.create(
+            contrato=self.contrato, tipo='FISCALIZACAO', ativa=True,
+            data_inicio=self.hoje - timedelta(days=30), data_fim=fim
+        )
+        # Comissão sem contrato: o log mostra o tipo no lugar do número do contrato
+        avulsa = Comissao.objects.create(
+            categoria='OUTRAS', tipo='EXAME', ativa=True,
+            data_inicio=self.hoje - timedelta(days=30), data_fim=fim
+        )
+        integrante = Integrante.objects.create(
+            comissao=comissao, agente=self.agente, funcao=self.funcao,
+            data_inicio=comissao.data_inicio, portaria_numero="123", portaria_data=comissao.data_inicio
+        )
+        Integrante.objects.filter(pk=integrante.pk).update(data_fim=None)
+        versao = versoes.versoes(['contratos'])['contratos']
+
+        out = StringIO()
+        call_command('desativar_comissoes_expiradas', stdout=out)
+
+        integrante.refresh_from_db()
+        self.assertEqual(integrante.data_fim, fim)
+        self.assertEqual(integrante.sequencia_id, integrante.pk)
+        self.assertFalse(Comissao.objects.filter(ativa=True).exists())
+        self.assertGreater(versoes.versoes(['contratos'])['contratos'], versao)
+        self.assertIn(f"[OK] Comissão {avulsa.pk} (Exame) desativada.", out.getvalue())
+        self.assertIn("Processo concluído. 2 comissões foram desativadas.", out.getvalue())
+        self.assertIn("[RESUMO] comissoes=2 integrantes=1 grupos_sequencia=1", out.getvalue())
+
+    def test_desativar_comissoes_dry_run(self):
+        comissao = Comissao.objects.create(
+            contrato=self.contrato, tipo='FISCALIZACAO', ativa=True,
+            data_inicio=self.hoje - timedelta(days=30), data_fim=self.hoje - timedelta(days=1)
+        )
+        integrante = Integrante.objects.create(
+            comissao=comissao, agente=self.agente, funcao=self.funcao,
+            data_inicio=comissao.data_inicio, data_fim=self.hoje + timedelta(days=60),
+            portaria_numero="123", portaria_data=comissao.data_inicio
+        )
+        versao = versoes.versoes(['contratos'])['contratos']
+
+        out = StringIO()
+        call_command('desativar_comissoes_expiradas', '--dry-run', stdout=out)
+
+        comissao.refresh_from_db()
+        integrante.refresh_from_db()
+        self.assertTrue(comissao.ativa)
+        self.assertEqual(integrante.data_fim, self.hoje + timedelta(days=60))
+        self.assertEqual(versoes.versoes(['contratos'])['contratos'], versao)
+        self.assertIn("Simulação concluída. 1 comissões seriam desativadas", out.getvalue())
+        self.assertIn("[RESUMO] comissoes=1 integrantes=1 grupos_sequencia=1", out.getvalue())
+        self.assertIn("simulacao=sim", out.getvalue())
+
     def test_ativar_comissoes_iniciadas(self):
         # Create an inactive commission whose start date is today and has NO end date (null)
         comissao_null_end_date = Comissao.objects.create(
@@ -164,3 +224,71 @@ class TestComissaoManagementCommands(TestCase):
         self.assertIn("Processo concluído. 1 comissão(ões) ativada(s).", out.getvalue())
         self.assertIn("1 comissão(ões) ignorada(s) por conflito de duplicidade.", out.getvalue())
 
+
+    def test_ativar_comissoes_candidatas_do_mesmo_grupo(self):
+        """Sem comissão ativa no grupo, apenas a primeira candidata é ativada; a segunda execução não muda nada."""
+        primeira = Comissao.objects.create(
+            contrato=self.contrato, tipo='FISCALIZACAO', ativa=False, data_inicio=self.hoje - timedelta(days=2)
+        )
+        segunda = Comissao.objects.create(
+            contrato=self.contrato, tipo='FISCALIZACAO', ativa=False, data_inicio=self.hoje - timedelta(days=1)
+        )
+        avulsa = Comissao.objects.create(categoria='OUTRAS', tipo='EXAME', ativa=False, data_inicio=self.hoje)
+
+        out = StringIO()
+        call_command('ativar_comissoes_iniciadas', stdout=out)
+
+        self.assertEqual(
+            set(Comissao.objects.filter(ativa=True).values_list('pk', flat=True)), {primeira.pk, avulsa.pk}
+        )
+        self.assertIn(f"[IGNORADA] Comissão {segunda.pk} (Fiscalização - Contrato 12345/2026)", out.getvalue())
+        self.assertIn(f"[OK] Comissão {avulsa.pk} (Exame) ativada.", out.getvalue())
+        self.assertIn("Processo concluído. 2 comissão(ões) ativada(s). 1 comissão(ões) ignorada(s)", out.getvalue())
+
+        out = StringIO()
+        call_command('ativar_comissoes_iniciadas', stdout=out)
+        self.assertIn("Processo concluído. 0 comissão(ões) ativada(s). 1 comissão(ões) ignorada(s)", out.getvalue())
+        self.assertFalse(Comissao.objects.get(pk=segunda.pk).ativa)
+
+    def test_ativar_comissoes_consultas_constantes(self):
+        def consultas():
+            Comissao.objects.update(ativa=False)
+            with CaptureQueriesContext(connection) as contexto:
+                call_command('ativar_comissoes_iniciadas', stdout=StringIO())
+            return len(contexto.captured_queries)
+
+        Comissao.objects.create(contrato=self.contrato, tipo='FISCALIZACAO', data_inicio=self.hoje)
+        poucas = consultas()
+        for i in range(5):
+            contrato = Contrato.objects.create(
+                numero=f"{i}/2026", empresa=self.empresa, vigencia_inicio=date(2025, 1, 1),
+                vigencia_fim=date(2027, 12, 31), valor_total=1000
+            )
+            Comissao.objects.create(contrato=contrato, tipo='RECEBIMENTO', data_inicio=self.hoje)
+
+        self.assertEqual(consultas(), poucas)
+        self.assertEqual(Comissao.objects.filter(ativa=True).count(), 6)
+
+    def test_ativar_comissoes_com_trava_ocupada(self):
+        comissao = Comissao.objects.create(contrato=self.contrato, tipo='FISCALIZACAO', data_inicio=self.hoje)
+
+        out = StringIO()
+        with trava_consultiva('ativar_comissoes_iniciadas') as obtida:
+            self.assertTrue(obtida)
+            call_command('ativar_comissoes_iniciadas', stdout=out)
+
+        comissao.refresh_from_db()
+        self.assertFalse(comissao.ativa)
+        self.assertIn("Outra execução de ativar_comissoes_iniciadas está em andamento", out.getvalue())
+
+
+class TestExplainHotpathsCommand(TestCase):
+    # No PostgreSQL o planejador escolhe Seq Scan em tabelas vazias, então a verificação
+    # estrita só é determinística no SQLite
+    @skipUnless(connection.vendor == 'sqlite', 'Plano determinístico apenas no SQLite.')
+    def test_consultas_frequentes_usam_indices(self):
+        """Com o plano de índices aplicado, nenhuma consulta frequente deve varrer a tabela inteira."""
+        out = StringIO()
+        call_command('explain_hotpaths', '--strict', stdout=out)
+        self.assertNotIn("[SEQ SCAN]", out.getvalue())
+        self.assertIn("0 consulta(s) com varredura sequencial.", out.getvalue())
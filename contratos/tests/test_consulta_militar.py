@@ -122,8 +122,58 @@ class ConsultaMilitarComissaoSemContratoTest(TestCase):
         url = reverse('exportar_historico_militar_csv') + '?q=SILVA&formato=csv'
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         # Deve conter o tipo da comissão geral
         self.assertIn("Planejamento", content)
         # E o número do contrato da comissão contratual
         self.assertIn("001/2026", content)
+
+
+class ConsultaMilitarNomesNormalizadosTest(TestCase):
+    """
+    Testa a consulta de militares pelas colunas normalizadas do Agente:
+    SARAM exato primeiro, nomes sem distinção de acentos/caixa e exportação
+    reaproveitando os agentes resolvidos pela consulta.
+    """
+
+    def setUp(self):
+        posto = PostoGraduacao.objects.create(sigla="Sgt", descricao="Sargento", senioridade=5)
+        funcao = Funcao.objects.create(titulo="Membro", sigla="MBR")
+        comissao = Comissao.objects.create(
+            categoria='OUTRAS', tipo='PLANEJAMENTO', descricao_objeto='Planejamento', ativa=True,
+            data_inicio=date.today() - timedelta(days=30),
+        )
+        self.conceicao = Agente.objects.create(nome_completo="Maria da Conceição", nome_de_guerra="CONCEIÇÃO", posto=posto, saram="333444")
+        # Nome de guerra que contém o SARAM do outro militar
+        self.outro = Agente.objects.create(nome_completo="Pedro Sousa", nome_de_guerra="SOUSA333444", posto=posto, saram="555666")
+        for agente in (self.conceicao, self.outro):
+            Integrante.objects.create(
+                comissao=comissao, agente=agente, funcao=funcao,
+                data_inicio=date.today() - timedelta(days=30),
+                portaria_numero="003/2026", portaria_data=date.today() - timedelta(days=30),
+            )
+
+    def test_nomes_normalizados_mantidos_ao_salvar(self):
+        self.assertEqual(
+            (self.conceicao.nome_de_guerra_busca, self.conceicao.nome_completo_busca),
+            ("CONCEICAO", "MARIA DA CONCEICAO")
+        )
+        self.conceicao.nome_de_guerra = "Conceição-Lima"
+        self.conceicao.save()
+        self.conceicao.refresh_from_db()
+        self.assertEqual(self.conceicao.nome_de_guerra_busca, "CONCEICAO LIMA")
+
+    def test_busca_sem_acentos_e_saram_exato_primeiro(self):
+        response = self.client.get(reverse('consulta_militar'), {'q': 'conceicao'})
+        self.assertEqual([i.agente for i in response.context['integrantes']], [self.conceicao])
+
+        response = self.client.get(reverse('consulta_militar'), {'q': '333444'})
+        self.assertEqual([i.agente for i in response.context['integrantes']], [self.conceicao])
+        self.assertEqual(response.context['agentes'], str(self.conceicao.pk))
+
+    def test_exportacao_reaproveita_agentes_resolvidos(self):
+        response = self.client.get(reverse('exportar_historico_militar_csv'), {
+            'q': 'qualquer', 'agentes': str(self.outro.pk), 'formato': 'csv'
+        })
+        linhas = response.getvalue().decode('utf-8-sig').strip().splitlines()[1:]
+        self.assertEqual([linha.split(';')[1] for linha in linhas], ["555666"])
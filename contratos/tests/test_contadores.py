@@ -0,0 +1,57 @@
+"""
+Testes dos contadores da página inicial do portal (contratos.contadores):
+- Os seis totais calculados em uma única consulta
+- Página inicial consulta apenas as versões dos dados enquanto elas não mudam
+- Totais atualizados após inclusões nos domínios contratos e setores
+"""
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from contratos.models import Empresa, Setor, CargoRegimental, Agente, PostoGraduacao
+from contratos.contadores import contar_registros, contadores_portal, descartar_contadores
+
+
+class ContadoresPortalTests(TestCase):
+
+    def setUp(self):
+        descartar_contadores()
+        Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        User.objects.create_superuser(username="admin_contadores", password="pass123")
+        self.client.login(username="admin_contadores", password="pass123")
+
+    def tearDown(self):
+        descartar_contadores()
+
+    def test_totais_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            totais = contar_registros()
+
+        self.assertEqual(totais['total_empresas'], 1)
+        self.assertEqual(set(totais), {
+            'total_empresas', 'total_contratos', 'total_agentes',
+            'total_integrantes', 'total_comissoes', 'total_cargos',
+        })
+
+    def test_reaproveita_enquanto_as_versoes_nao_mudam(self):
+        contadores_portal()
+        with self.assertNumQueries(1):  # apenas as versões dos dados
+            self.assertEqual(contadores_portal()['total_empresas'], 1)
+
+        Empresa.objects.create(razao_social="Beta Ltda", cnpj="44555666000199")
+        posto = PostoGraduacao.objects.create(sigla="CAP", descricao="Capitão", senioridade=3)
+        agente = Agente.objects.create(nome_completo="Ana Souza", nome_de_guerra="Souza", posto=posto, saram="1234567")
+        CargoRegimental.objects.create(setor=Setor.objects.create(nome="Setor de Testes"), agente=agente, cargo="Chefe")
+
+        totais = contadores_portal()
+        self.assertEqual((totais['total_empresas'], totais['total_cargos']), (2, 1))
+
+    def test_pagina_inicial_nao_conta_registros(self):
+        self.client.get(reverse('portal_home'))
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse('portal_home'))
+
+        self.assertContains(response, "1 registradas")
+        self.assertFalse([q['sql'] for q in contexto.captured_queries if 'COUNT(' in q['sql'].upper()])
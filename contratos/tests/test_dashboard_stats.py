@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from contratos.models import (
+    Empresa, Contrato, Agente, PostoGraduacao, PrestacaoContas,
+    Setor, PrestacaoContasSetor
+)
+from contratos.views.prestacao import _get_dashboard_stats
+
+
+class DashboardStatsTests(TestCase):
+    """Garante o resultado e o orçamento de consultas de _get_dashboard_stats."""
+
+    # contratos vigentes, agregado de contratos, lista de gestores, slides de fiscais,
+    # total de setores, agregado de setores, lista de setores, slides de gestores
+    ORCAMENTO_CONSULTAS = 8
+
+    def setUp(self):
+        self.hoje = date.today()
+        self.mes = self.hoje.month
+        self.ano = self.hoje.year
+
+        self.posto = PostoGraduacao.objects.create(sigla="Maj", descricao="Major", senioridade=1)
+        self.agente = Agente.objects.create(
+            nome_completo="Fulano de Tal", nome_de_guerra="Fulano", posto=self.posto, saram="7654321"
+        )
+        self.empresa = Empresa.objects.create(razao_social="Empresa Stats", cnpj="12.345.678/0001-90")
+
+        self.contratos = []
+        for i in range(6):
+            self.contratos.append(Contrato.objects.create(
+                numero=f"ST-{i}/2026",
+                empresa=self.empresa,
+                objeto="Objeto",
+                vigencia_inicio=self.hoje - timedelta(days=30),
+                vigencia_fim=self.hoje + timedelta(days=30),
+                valor_total=1000
+            ))
+
+        # Reenvio: apenas o registro mais recente (status 'ok') deve ser considerado
+        PrestacaoContas.objects.create(
+            contrato=self.contratos[0], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='correcao'
+        )
+        PrestacaoContas.objects.create(
+            contrato=self.contratos[0], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='ok', compor_apresentacao=True
+        )
+        PrestacaoContas.objects.create(
+            contrato=self.contratos[1], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='entregue', compor_apresentacao=True
+        )
+        PrestacaoContas.objects.create(
+            contrato=self.contratos[2], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='correcao'
+        )
+        PrestacaoContas.objects.create(
+            contrato=self.contratos[3],
+            mes_referencia=self.mes, ano_referencia=self.ano, status='pendente', compor_apresentacao=True
+        )
+
+        self.setores = [Setor.objects.create(nome=f"Setor {i}", sigla=f"S{i}") for i in range(3)]
+        PrestacaoContasSetor.objects.create(
+            setor=self.setores[0], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='ok', compor_apresentacao=True
+        )
+        PrestacaoContasSetor.objects.create(
+            setor=self.setores[1], agente=self.agente,
+            mes_referencia=self.mes, ano_referencia=self.ano, status='correcao'
+        )
+
+    def test_contadores_de_contratos(self):
+        stats = _get_dashboard_stats(self.ano, self.mes)
+        self.assertEqual(stats['total_contratos'], 6)
+        self.assertEqual(stats['ok_no_mes'], 1)
+        self.assertEqual(stats['entregues_no_mes'], 1)
+        self.assertEqual(stats['correcao_no_mes'], 1)
+        self.assertEqual(stats['pendentes_no_mes'], 3)
+        self.assertEqual(stats['prio_ok'], 1)
+        self.assertEqual(stats['prio_entregues'], 1)
+        self.assertEqual(stats['prio_correcao'], 0)
+        self.assertEqual(stats['prio_pendentes'], 1)
+        self.assertEqual(len(stats['gestores_prio']), 3)
+
+    def test_contadores_de_setores(self):
+        stats = _get_dashboard_stats(self.ano, self.mes)
+        self.assertEqual(stats['total_setores'], 3)
+        self.assertEqual(stats['ok_setores_no_mes'], 1)
+        self.assertEqual(stats['entregues_setores_no_mes'], 0)
+        self.assertEqual(stats['correcao_setores_no_mes'], 1)
+        self.assertEqual(stats['pendentes_setores_no_mes'], 1)
+        self.assertEqual(stats['prio_ok_setores'], 1)
+        self.assertEqual(stats['prio_pendentes_setores'], 0)
+        self.assertEqual(len(stats['gestores_setores']), 1)
+
+    def test_orcamento_de_consultas(self):
+        """O número de consultas não deve crescer com a quantidade de status/contratos."""
+        with self.assertNumQueries(self.ORCAMENTO_CONSULTAS):
+            _get_dashboard_stats(self.ano, self.mes)
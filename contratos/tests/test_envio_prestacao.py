@@ -19,11 +19,14 @@ Cobre:
 - Upload sobre placeholder pendente (preservação da flag compor_apresentacao)
 - Dashboard: contexto com estatísticas de prioritários
 - Tabela de gestores prioritários: estrutura, conteúdo e ordenação (antiguidade + alfabética)
-- Consolidação de PDF: download, filtros (somente OK+prioritário), permissões
+- Consolidação de PDF: download, filtros (somente OK+prioritário), permissões, cache por manifesto
 """
 import os
 import json
+from io import StringIO
 from datetime import date
+from django.core.management import call_command
+from django.conf import settings
 from django.test import TestCase, Client
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
@@ -33,12 +36,15 @@ from contratos.models import (
     Contrato, Empresa, PrestacaoContas, Agente,
     PostoGraduacao, Comissao, Integrante, Funcao
 )
+from contratos.consolidacao import limitar_cache
+from contratos.tests.midia import MidiaTemporariaMixin
 
 
-class BaseTestSetup(TestCase):
+class BaseTestSetup(MidiaTemporariaMixin, TestCase):
     """Setup compartilhado para todos os testes de envio."""
 
     def setUp(self):
+        super().setUp()
         self.posto = PostoGraduacao.objects.create(sigla="CB", descricao="Cabo", senioridade=8)
         self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
         self.agente = Agente.objects.create(
@@ -963,6 +969,10 @@ class ConsolidarApresentacaoTests(BaseTestSetup):
         self.user_admin = User.objects.create_superuser(username="admin_consolida", email="ac@t.com", password="pass123")
         self.user_normal = User.objects.create_user(username="normal_consolida", password="pass123")
 
+        # Cache de PDFs consolidados (dentro da mídia temporária do teste)
+        self.cache_dir = settings.CONSOLIDACAO_CACHE_DIR
+        os.makedirs(self.cache_dir)
+
     def _make_real_pdf(self, name="real.pdf"):
         """Gera um PDF válido mínimo que pode ser lido pelo pypdf."""
         import io
@@ -978,6 +988,14 @@ class ConsolidarApresentacaoTests(BaseTestSetup):
         for p in PrestacaoContas.objects.all():
             self._cleanup(p)
 
+    def _criar_prestacao_prioritaria(self, nome="slide_cache.pdf"):
+        return PrestacaoContas.objects.create(
+            contrato=self.contrato, agente=self.agente,
+            mes_referencia=5, ano_referencia=2026,
+            arquivo=self._make_real_pdf(nome),
+            status='ok', compor_apresentacao=True
+        )
+
     def test_consolidar_download_pdf_valido(self):
         """Auditor consolida slides prioritários em conformidade e baixa PDF."""
         self.client.login(username="auditor_consolida", password="pass123")
@@ -995,7 +1013,76 @@ class ConsolidarApresentacaoTests(BaseTestSetup):
         self.assertIn('attachment', response['Content-Disposition'])
         self.assertIn('Apresentacao_Consolidada_Mai_2026.pdf', response['Content-Disposition'])
         # Verifica que o conteúdo é um PDF válido
-        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertTrue(response.getvalue().startswith(b'%PDF'))
+
+    def test_consolidar_expoe_metricas_nos_cabecalhos(self):
+        """O PDF consolidado é transmitido de arquivo temporário, com tempo e memória nos cabeçalhos."""
+        self.client.login(username="auditor_consolida", password="pass123")
+        PrestacaoContas.objects.create(
+            contrato=self.contrato, agente=self.agente,
+            mes_referencia=5, ano_referencia=2026,
+            arquivo=self._make_real_pdf("slide_metricas.pdf"),
+            status='ok', compor_apresentacao=True
+        )
+        response = self.client.get(reverse('consolidar_apresentacao'), {'mes': 5, 'ano': 2026})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('X-Consolidacao-Tempo-Ms', response)
+        self.assertEqual(response['X-Consolidacao-Paginas'], '1')
+        self.assertTrue(response.getvalue().startswith(b'%PDF'))
+
+    def test_consolidar_reutiliza_pdf_em_cache(self):
+        """Sem mudança nos arquivos de origem, o segundo download vem do cache."""
+        self.client.login(username="auditor_consolida", password="pass123")
+        self._criar_prestacao_prioritaria()
+        url = reverse('consolidar_apresentacao')
+
+        primeira = self.client.get(url, {'mes': 5, 'ano': 2026})
+        self.assertEqual(primeira['X-Consolidacao-Cache'], 'MISS')
+        conteudo = primeira.getvalue()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        segunda = self.client.get(url, {'mes': 5, 'ano': 2026})
+        self.assertEqual(segunda['X-Consolidacao-Cache'], 'HIT')
+        self.assertEqual(segunda.getvalue(), conteudo)
+
+    def test_consolidar_regera_quando_manifesto_muda(self):
+        """Um novo envio altera o manifesto e força nova mesclagem."""
+        self.client.login(username="auditor_consolida", password="pass123")
+        self._criar_prestacao_prioritaria("primeiro.pdf")
+        url = reverse('consolidar_apresentacao')
+        self.client.get(url, {'mes': 5, 'ano': 2026}).getvalue()
+
+        self._criar_prestacao_prioritaria("reenvio.pdf")
+        response = self.client.get(url, {'mes': 5, 'ano': 2026})
+        self.assertEqual(response['X-Consolidacao-Cache'], 'MISS')
+        response.getvalue()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_limite_do_cache_remove_os_menos_usados(self):
+        """Acima do limite, os PDFs com uso mais antigo são removidos primeiro."""
+        for i, nome in enumerate(['antigo', 'medio', 'recente']):
+            caminho = os.path.join(self.cache_dir, f"{nome}.pdf")
+            with open(caminho, 'wb') as f:
+                f.write(b'x' * 1024)
+            os.utime(caminho, (1000 + i, 1000 + i))
+
+        removidos = limitar_cache(limite_bytes=2048)
+
+        self.assertEqual(removidos, 1)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['medio.pdf', 'recente.pdf'])
+
+    def test_comando_limpar_cache_consolidacao(self):
+        """O comando apaga todos os PDFs do cache."""
+        for nome in ['a.pdf', 'b.pdf']:
+            with open(os.path.join(self.cache_dir, nome), 'wb') as f:
+                f.write(b'%PDF')
+        out = StringIO()
+        call_command('limpar_cache_consolidacao', stdout=out)
+
+        self.assertIn('2 arquivo(s) removido(s)', out.getvalue())
+        self.assertEqual(os.listdir(self.cache_dir), [])
 
     def test_consolidar_sem_slides_prioritarios_redireciona(self):
         """Sem slides prioritários em conformidade, deve redirecionar preservando filtros de mês/ano."""
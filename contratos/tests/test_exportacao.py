@@ -0,0 +1,86 @@
+"""
+Testes do motor de exportação CSV/XLSX (contratos.utils.export_csv_or_xlsx):
+- CSV transmitido em streaming, com BOM, ';' e formatação brasileira de datas/decimais
+- Consumo preguiçoso do gerador de linhas
+- XLSX em modo write-only com células tipadas (data, data/hora e decimal)
+- Comando benchmark_exportacao
+"""
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from django.test import TestCase, RequestFactory
+from django.core.management import call_command
+from django.utils import timezone
+from contratos.utils import export_csv_or_xlsx
+
+
+class ExportacaoStreamingTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.headers = ['Nome', 'Data', 'Envio', 'Valor', 'Quantidade']
+        self.envio = timezone.make_aware(datetime(2026, 3, 5, 14, 30))
+        self.linhas = [['Alpha', date(2026, 3, 1), self.envio, Decimal('1234.50'), 7]]
+
+    def test_csv_e_transmitido_com_formatacao_brasileira(self):
+        response = export_csv_or_xlsx(self.factory.get('/'), 'teste', self.headers, iter(self.linhas))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('teste.csv', response['Content-Disposition'])
+
+        conteudo = response.getvalue()
+        self.assertTrue(conteudo.startswith(b'\xef\xbb\xbf'))
+        linhas = conteudo.decode('utf-8-sig').strip().splitlines()
+        self.assertEqual(linhas[0], 'Nome;Data;Envio;Valor;Quantidade')
+        envio_local = timezone.localtime(self.envio).strftime('%d/%m/%Y %H:%M')
+        self.assertEqual(linhas[1], f'Alpha;01/03/2026;{envio_local};1234,50;7')
+
+    def test_csv_consome_o_gerador_apenas_durante_o_envio(self):
+        consumidas = []
+
+        def gerador():
+            for i in range(3):
+                consumidas.append(i)
+                yield [f'linha {i}', '', '', '', i]
+
+        response = export_csv_or_xlsx(self.factory.get('/'), 'teste', self.headers, gerador())
+        self.assertEqual(consumidas, [])
+
+        self.assertEqual(len(response.getvalue().decode('utf-8-sig').strip().splitlines()), 4)
+        self.assertEqual(consumidas, [0, 1, 2])
+
+    def test_xlsx_grava_celulas_tipadas(self):
+        import openpyxl
+
+        response = export_csv_or_xlsx(self.factory.get('/', {'formato': 'xlsx'}), 'teste', self.headers, iter(self.linhas))
+        self.assertIn('teste.xlsx', response['Content-Disposition'])
+
+        ws = openpyxl.load_workbook(io.BytesIO(response.getvalue())).active
+        self.assertEqual([c.value for c in ws[1]], self.headers)
+
+        nome, data, envio, valor, quantidade = ws[2]
+        self.assertEqual(nome.value, 'Alpha')
+        self.assertEqual(data.value.date(), date(2026, 3, 1))
+        self.assertEqual(data.number_format, 'DD/MM/YYYY')
+        self.assertEqual(envio.value, timezone.make_naive(self.envio))
+        self.assertEqual(envio.number_format, 'DD/MM/YYYY HH:MM')
+        self.assertEqual(valor.value, 1234.5)
+        self.assertEqual(valor.number_format, '#,##0.00')
+        self.assertEqual(quantidade.value, 7)
+
+
+class BenchmarkExportacaoCommandTests(TestCase):
+
+    def test_benchmark_mede_e_descarta_a_massa(self):
+        from contratos.models import PrestacaoContas
+
+        out = StringIO()
+        call_command('benchmark_exportacao', '--linhas', '50', '--memoria', stdout=out)
+
+        saida = out.getvalue()
+        self.assertIn('[CSV] 50 linha(s)', saida)
+        self.assertIn('[XLSX] 50 linha(s)', saida)
+        self.assertIn('pico de memória', saida)
+        self.assertEqual(PrestacaoContas.objects.count(), 0)
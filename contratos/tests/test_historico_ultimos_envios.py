@@ -15,12 +15,14 @@ from contratos.models import (
     Contrato, Empresa, PrestacaoContas, Agente,
     PostoGraduacao, Comissao, Funcao, Integrante
 )
+from contratos.tests.midia import MidiaTemporariaMixin
 
 
-class HistoricoUltimosEnviosTests(TestCase):
+class HistoricoUltimosEnviosTests(MidiaTemporariaMixin, TestCase):
     """Suíte de testes para a seção Últimos Envios no acesso público."""
 
     def setUp(self):
+        super().setUp()
         self.posto = PostoGraduacao.objects.create(
             sigla="CB", descricao="Cabo", senioridade=8
         )
@@ -0,0 +1,81 @@
+"""
+Testes da regra de integrante ativo aplicada no banco (Integrante.objects):
+- ativos(em=...) respeita desligamento e término previsto na data informada
+- com_status() anota a situação lida por is_ativo, sem recalcular em Python
+- Prefetches das views trazem apenas as designações ativas
+"""
+from datetime import date, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from contratos.models import (
+    Contrato, Empresa, Agente, PostoGraduacao, Funcao, Comissao, Integrante
+)
+
+
+class IntegrantesAtivosTests(TestCase):
+
+    def setUp(self):
+        self.hoje = date.today()
+        posto = PostoGraduacao.objects.create(sigla="SGT", descricao="Sargento", senioridade=5)
+        empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        self.contrato = Contrato.objects.create(
+            numero="60/2026", objeto="Limpeza", empresa=empresa,
+            vigencia_inicio=self.hoje - timedelta(days=400), vigencia_fim=self.hoje + timedelta(days=300),
+            valor_total=1000
+        )
+        self.funcao = Funcao.objects.create(titulo="Fiscal", sigla="FIS")
+        self.comissao = Comissao.objects.create(contrato=self.contrato, tipo="FISCALIZACAO", ativa=True)
+        self.agentes = [
+            Agente.objects.create(nome_completo=f"{nome} Completo", nome_de_guerra=nome, posto=posto, saram=saram)
+            for nome, saram in (("Silva", "1111111"), ("Souza", "2222222"), ("Lima", "3333333"))
+        ]
+        inicio = self.hoje - timedelta(days=100)
+        self.vigente = self._designar(self.agentes[0], inicio)
+        self.encerra_hoje = self._designar(self.agentes[1], inicio, fim=self.hoje)
+        self.desligado = self._designar(self.agentes[2], inicio, desligamento=self.hoje)
+
+    def _designar(self, agente, inicio, fim=None, desligamento=None):
+        return Integrante.objects.create(
+            comissao=self.comissao, agente=agente, funcao=self.funcao,
+            data_inicio=inicio, data_fim=fim, data_desligamento=desligamento,
+            portaria_numero="1", portaria_data=inicio
+        )
+
+    def test_ativos_na_data_informada(self):
+        self.assertEqual(
+            set(Integrante.objects.ativos().values_list('pk', flat=True)),
+            {self.vigente.pk, self.encerra_hoje.pk}
+        )
+        ontem = self.hoje - timedelta(days=1)
+        self.assertEqual(Integrante.objects.ativos(ontem).count(), 3)
+        self.assertEqual(
+            list(Integrante.objects.ativos(self.hoje + timedelta(days=1)).values_list('pk', flat=True)),
+            [self.vigente.pk]
+        )
+
+    def test_com_status_anota_is_ativo(self):
+        with self.assertNumQueries(1):
+            situacao = {i.pk: i.is_ativo for i in Integrante.objects.com_status()}
+
+        self.assertEqual(situacao, {self.vigente.pk: True, self.encerra_hoje.pk: True, self.desligado.pk: False})
+        self.assertEqual(
+            [i.is_ativo for i in Integrante.objects.com_status(self.hoje + timedelta(days=1)).order_by('pk')],
+            [True, False, False]
+        )
+
+    def test_detalhe_do_contrato_recebe_apenas_ativos(self):
+        response = self.client.get(reverse('detalhe_contrato', args=[self.contrato.pk]))
+
+        comissao = response.context['comissoes_fiscalizacao'][0]
+        self.assertEqual({i.pk for i in comissao.integrantes_lista}, {self.vigente.pk, self.encerra_hoje.pk})
+
+    def test_historico_do_militar_usa_situacao_anotada(self):
+        User.objects.create_superuser(username="admin_ativos", password="pass123")
+        self.client.login(username="admin_ativos", password="pass123")
+
+        response = self.client.get(reverse('exportar_historico_militar_csv'), {'q': '3333333', 'formato': 'csv'})
+
+        linhas = response.getvalue().decode('utf-8-sig').strip().splitlines()
+        self.assertEqual(len(linhas), 2)
+        self.assertIn('ENCERRADO', linhas[1])
@@ -0,0 +1,90 @@
+"""
+Testes da listagem genérica do portal (generico_listar / contratos.listagem):
+- select_related/only derivados de fields_display: consultas constantes por página
+- Paginação, ordenação e filtro no servidor
+- Modo JSON para tabelas montadas no cliente
+"""
+from datetime import date, timedelta
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from contratos.models import Contrato, Empresa, Agente, PostoGraduacao
+from contratos.listagem import colunas_da_listagem
+
+
+class ListagemGenericaTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser(username="admin_lista", password="pass123")
+        self.client.login(username="admin_lista", password="pass123")
+        self.hoje = date.today()
+        self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        self.posto = PostoGraduacao.objects.create(sigla="SGT", descricao="Sargento", senioridade=5)
+
+    def _contratos(self, quantidade, inicio=0):
+        for i in range(inicio, inicio + quantidade):
+            empresa = Empresa.objects.create(razao_social=f"Empresa {i:02d}", cnpj=f"{i:014d}")
+            Contrato.objects.create(
+                numero=f"{i:02d}/2026", objeto="Limpeza", empresa=empresa,
+                vigencia_inicio=self.hoje, vigencia_fim=self.hoje + timedelta(days=100 + i), valor_total=1000
+            )
+
+    def _consultas(self, url, params):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_colunas_derivam_relacoes(self):
+        colunas = colunas_da_listagem(Contrato, [('numero', 'Número'), ('empresa__cnpj', 'CNPJ'), ('inexistente', 'X')])
+
+        self.assertEqual([c.relacoes for c in colunas], [(), ('empresa',), ()])
+        self.assertEqual([c.ordenavel for c in colunas], [True, True, False])
+
+    def test_consultas_constantes_em_contratos_e_agentes(self):
+        self._contratos(3)
+        for i in range(3):
+            Agente.objects.create(nome_completo=f"Agente {i}", nome_de_guerra=f"Ag{i}", posto=self.posto, saram=f"90{i}")
+        poucos = {
+            nome: self._consultas(reverse(nome), {'por_pagina': 50})
+            for nome in ('listar_contratos', 'listar_agentes')
+        }
+
+        self._contratos(30, inicio=3)
+        for i in range(3, 33):
+            Agente.objects.create(nome_completo=f"Agente {i}", nome_de_guerra=f"Ag{i}", posto=self.posto, saram=f"90{i}")
+
+        for nome, consultas in poucos.items():
+            with self.subTest(lista=nome):
+                self.assertEqual(self._consultas(reverse(nome), {'por_pagina': 50}), consultas)
+
+    def test_paginacao_ordenacao_e_filtro(self):
+        self._contratos(25)
+        url = reverse('listar_contratos')
+
+        response = self.client.get(url, {'ordem': '-numero', 'por_pagina': 10, 'pagina': 2})
+        self.assertEqual([c.numero for c in response.context['items']], [f"{i:02d}/2026" for i in range(14, 4, -1)])
+        self.assertEqual(response.context['pagina'].paginator.num_pages, 3)
+        self.assertContains(response, "Página 2 de 3")
+
+        response = self.client.get(url, {'q': 'empresa 07'})
+        self.assertEqual([c.numero for c in response.context['items']], ["07/2026"])
+
+        # Ordem inválida é ignorada
+        response = self.client.get(url, {'ordem': 'valor_total'})
+        self.assertEqual(response.context['ordem'], '')
+
+    def test_modo_json(self):
+        self._contratos(3)
+
+        dados = self.client.get(reverse('listar_contratos'), {'formato': 'json', 'ordem': 'vigencia_fim'}).json()
+
+        self.assertEqual(dados['total'], 3)
+        self.assertEqual(dados['colunas'][3], {'campo': 'empresa__razao_social', 'rotulo': 'Empresa', 'ordenavel': True})
+        primeiro = dados['itens'][0]
+        self.assertEqual(primeiro['numero'], "00/2026")
+        self.assertEqual(primeiro['tipo'], "Despesa")
+        self.assertEqual(primeiro['empresa__cnpj'], "00000000000000")
+        self.assertEqual(primeiro['vigencia_fim'], (self.hoje + timedelta(days=100)).isoformat())
@@ -0,0 +1,52 @@
+"""
+Testes da resolução de papéis (is_admin/is_auditor) memorizada por requisição:
+- Páginas do portal consultam os grupos do usuário uma única vez
+- O filtro is_admin dos templates reaproveita a mesma consulta
+- update_user_group invalida os papéis memorizados
+"""
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.template import Context, Template
+from django.contrib.auth.models import User, Group
+from contratos.utils import is_admin, is_auditor
+from contratos.views.users import update_user_group
+
+
+def consultas_de_grupos(contexto):
+    return [q['sql'] for q in contexto.captured_queries if 'auth_user_groups' in q['sql']]
+
+
+class PapeisMemorizadosTests(TestCase):
+
+    def setUp(self):
+        grupo, _ = Group.objects.get_or_create(name='Auditores')
+        self.auditor = User.objects.create_user(username="auditor_papeis", password="pass123")
+        self.auditor.groups.add(grupo)
+        self.client.login(username="auditor_papeis", password="pass123")
+
+    def test_paginas_do_portal_consultam_grupos_uma_vez(self):
+        for nome in ('portal_home', 'dashboard_prestacao', 'cargos_regimentais'):
+            with self.subTest(pagina=nome), CaptureQueriesContext(connection) as contexto:
+                response = self.client.get(reverse(nome))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(consultas_de_grupos(contexto)), 1)
+
+    def test_filtro_de_template_reaproveita_papeis(self):
+        usuario = User.objects.get(pk=self.auditor.pk)
+        template = Template("{% load portal_tags %}{{ user|is_admin }}{{ user|is_admin }}{{ user|is_admin }}")
+
+        with self.assertNumQueries(1):
+            self.assertTrue(is_auditor(usuario))
+            self.assertEqual(template.render(Context({'user': usuario})), 'FalseFalseFalse')
+
+    def test_update_user_group_invalida_papeis(self):
+        usuario = User.objects.get(pk=self.auditor.pk)
+        self.assertFalse(is_admin(usuario))
+
+        update_user_group(usuario, 'admin')
+        self.assertTrue(is_admin(usuario))
+
+        update_user_group(usuario, 'comum')
+        self.assertFalse(is_auditor(usuario))
@@ -0,0 +1,217 @@
+"""
+Testes do radar de permanência (contratos.permanencia):
+- Encadeamento de designações contíguas (término previsto e desligamento efetivo)
+- Designações não contíguas, de outra função ou de comissão sem contrato não encadeiam
+- Número constante de consultas, independente da quantidade de integrantes
+- Painel e exportação usam as mesmas linhas
+- Manutenção incremental de inicio_sequencia/sequencia (inclusive em exclusões em lote) e comando recalcular_sequencias
+"""
+from datetime import date, timedelta
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth.models import User
+from contratos.models import (
+    Contrato, Empresa, Agente, PostoGraduacao, Funcao, Comissao, Integrante
+)
+from contratos.permanencia import calcular_radar_permanencia
+
+
+class CenarioPermanenciaMixin:
+
+    def setUp(self):
+        self.hoje = date.today()
+        self.posto = PostoGraduacao.objects.create(sigla="SGT", descricao="Sargento", senioridade=5)
+        self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        self.contrato = Contrato.objects.create(
+            numero="30/2026", objeto="Limpeza", empresa=self.empresa,
+            vigencia_inicio=self.hoje - timedelta(days=2000), vigencia_fim=self.hoje + timedelta(days=300),
+            valor_total=1000
+        )
+        self.fiscal = Funcao.objects.create(titulo="Fiscal", sigla="FIS")
+        self.gestor = Funcao.objects.create(titulo="Gestor", sigla="GES")
+        self.comissao = Comissao.objects.create(contrato=self.contrato, tipo="FISCALIZACAO", ativa=True)
+        self.agente = self._agente("Silva", "1111111")
+
+    def _agente(self, nome, saram):
+        return Agente.objects.create(nome_completo=f"{nome} Completo", nome_de_guerra=nome, posto=self.posto, saram=saram)
+
+    def _designar(self, inicio, fim=None, desligamento=None, agente=None, funcao=None, comissao=None):
+        return Integrante.objects.create(
+            comissao=comissao or self.comissao, agente=agente or self.agente, funcao=funcao or self.fiscal,
+            data_inicio=inicio, data_fim=fim, data_desligamento=desligamento,
+            portaria_numero="1", portaria_data=inicio
+        )
+
+
+class RadarPermanenciaTests(CenarioPermanenciaMixin, TestCase):
+
+    def _linha(self, radar, agente):
+        return next(item for item in radar if item['agente'] == agente)
+
+    def test_encadeia_designacoes_contiguas(self):
+        inicio = self.hoje - timedelta(days=900)
+        self._designar(inicio, fim=inicio + timedelta(days=299))
+        self._designar(inicio + timedelta(days=300), desligamento=inicio + timedelta(days=599))
+        atual = self._designar(inicio + timedelta(days=600))
+
+        linha = self._linha(calcular_radar_permanencia(self.hoje), self.agente)
+
+        self.assertEqual(linha['inicio_real'], inicio)
+        self.assertEqual(linha['inicio_original'], atual.data_inicio)
+        self.assertEqual(linha['dias_totais'], 900)
+        self.assertEqual(linha['classe_tempo'], 'bg-danger')
+
+    def test_nao_encadeia_intervalo_nem_outra_funcao(self):
+        inicio = self.hoje - timedelta(days=400)
+        self._designar(inicio, fim=inicio + timedelta(days=98))  # termina dois dias antes
+        self._designar(inicio + timedelta(days=100))
+
+        outro = self._agente("Souza", "2222222")
+        self._designar(inicio, fim=inicio + timedelta(days=99), agente=outro, funcao=self.gestor)
+        self._designar(inicio + timedelta(days=100), agente=outro)
+
+        radar = calcular_radar_permanencia(self.hoje)
+
+        self.assertEqual(self._linha(radar, self.agente)['dias_totais'], 300)
+        self.assertEqual(self._linha(radar, outro)['dias_totais'], 300)
+
+    def test_comissao_sem_contrato_nao_encadeia(self):
+        geral = Comissao.objects.create(tipo="PLANEJAMENTO", ativa=True)
+        inicio = self.hoje - timedelta(days=200)
+        self._designar(inicio, fim=inicio + timedelta(days=99), comissao=geral)
+        self._designar(inicio + timedelta(days=100), comissao=geral)
+
+        linha = self._linha(calcular_radar_permanencia(self.hoje), self.agente)
+
+        self.assertEqual(linha['dias_totais'], 100)
+        self.assertIsNone(linha['contrato'])
+
+    def test_consultas_constantes(self):
+        for i in range(5):
+            agente = self._agente(f"Agente{i}", f"30000{i}")
+            inicio = self.hoje - timedelta(days=500 + i)
+            self._designar(inicio, fim=inicio + timedelta(days=199), agente=agente)
+            self._designar(inicio + timedelta(days=200), agente=agente)
+
+        with self.assertNumQueries(1):
+            radar = calcular_radar_permanencia(self.hoje)
+            [item['agente'].posto.senioridade for item in radar]
+
+        self.assertEqual(len(radar), 5)
+        self.assertEqual([item['dias_totais'] for item in radar], [504, 503, 502, 501, 500])
+
+    def test_painel_e_exportacao_usam_as_mesmas_linhas(self):
+        inicio = self.hoje - timedelta(days=800)
+        self._designar(inicio, fim=inicio + timedelta(days=399))
+        self._designar(inicio + timedelta(days=400))
+
+        User.objects.create_superuser(username="admin_radar", password="pass123")
+        self.client.login(username="admin_radar", password="pass123")
+
+        painel = self.client.get(reverse('painel_controle'))
+        self.assertEqual(painel.context['top_permanencia'][0]['inicio_real'], inicio)
+
+        csv = self.client.get(reverse('exportar_radar_permanencia_csv'), {'formato': 'csv'})
+        linhas = csv.getvalue().decode('utf-8-sig').strip().splitlines()
+        self.assertEqual(linhas[1].split(';')[3], '800')
+        self.assertEqual(linhas[1].split(';')[5], inicio.strftime('%d/%m/%Y'))
+
+
+class SequenciaIntegranteTests(CenarioPermanenciaMixin, TestCase):
+
+    def _recarregar(self, *integrantes):
+        for integrante in integrantes:
+            integrante.refresh_from_db()
+
+    def test_criacao_encadeia_com_a_anterior(self):
+        inicio = self.hoje - timedelta(days=300)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=99))
+        segunda = self._designar(inicio + timedelta(days=100))
+
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (primeira.pk, inicio))
+        self._recarregar(primeira, segunda)
+        self.assertEqual((primeira.sequencia_id, primeira.inicio_sequencia), (primeira.pk, inicio))
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (primeira.pk, inicio))
+
+    def test_edicao_da_anterior_propaga_para_as_seguintes(self):
+        inicio = self.hoje - timedelta(days=300)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=99))
+        segunda = self._designar(inicio + timedelta(days=100), fim=inicio + timedelta(days=199))
+        terceira = self._designar(inicio + timedelta(days=200))
+
+        # Encerrar a primeira antes quebra a cadeia inteira à frente dela
+        primeira.data_fim = inicio + timedelta(days=50)
+        primeira.save()
+        self._recarregar(segunda, terceira)
+        self.assertEqual((terceira.sequencia_id, terceira.inicio_sequencia), (segunda.pk, segunda.data_inicio))
+
+        primeira.data_desligamento = inicio + timedelta(days=99)
+        primeira.save()
+        self._recarregar(terceira)
+        self.assertEqual((terceira.sequencia_id, terceira.inicio_sequencia), (primeira.pk, inicio))
+
+    def test_exclusao_e_troca_de_funcao_recalculam(self):
+        inicio = self.hoje - timedelta(days=300)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=99))
+        segunda = self._designar(inicio + timedelta(days=100))
+
+        segunda.funcao = self.gestor
+        segunda.save()
+        self.assertEqual(segunda.inicio_sequencia, segunda.data_inicio)
+
+        segunda.funcao = self.fiscal
+        segunda.save()
+        self.assertEqual(segunda.inicio_sequencia, inicio)
+
+        primeira.delete()
+        self._recarregar(segunda)
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (segunda.pk, segunda.data_inicio))
+
+    def test_exclusao_em_lote_recalcula(self):
+        # Ação "excluir selecionados" do admin: QuerySet.delete(), sem passar por delete()
+        inicio = self.hoje - timedelta(days=300)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=99))
+        segunda = self._designar(inicio + timedelta(days=100))
+
+        Integrante.objects.filter(pk=primeira.pk).delete()
+        self._recarregar(segunda)
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (segunda.pk, segunda.data_inicio))
+
+    def test_exclusao_em_lote_de_comissao_recalcula(self):
+        inicio = self.hoje - timedelta(days=300)
+        outra = Comissao.objects.create(contrato=self.contrato, tipo="FISCALIZACAO", ativa=True)
+        self._designar(inicio, fim=inicio + timedelta(days=99), comissao=outra)
+        segunda = self._designar(inicio + timedelta(days=100))
+        self.assertEqual(segunda.inicio_sequencia, inicio)
+
+        Comissao.objects.filter(pk=outra.pk).delete()
+        self._recarregar(segunda)
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (segunda.pk, segunda.data_inicio))
+
+    def test_ajuste_do_fim_da_comissao_recalcula(self):
+        inicio = self.hoje - timedelta(days=300)
+        outra = Comissao.objects.create(contrato=self.contrato, tipo="FISCALIZACAO", ativa=True)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=150), comissao=outra)
+        segunda = self._designar(inicio + timedelta(days=100))
+        self.assertEqual(segunda.inicio_sequencia, segunda.data_inicio)
+
+        outra.data_fim = inicio + timedelta(days=99)
+        outra.save()
+
+        self._recarregar(segunda)
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (primeira.pk, inicio))
+
+    def test_comando_recalcula_sequencias(self):
+        inicio = self.hoje - timedelta(days=300)
+        primeira = self._designar(inicio, fim=inicio + timedelta(days=99))
+        segunda = self._designar(inicio + timedelta(days=100))
+        Integrante.objects.update(inicio_sequencia=None, sequencia=None)
+
+        out = StringIO()
+        call_command('recalcular_sequencias', stdout=out)
+
+        self.assertIn('[OK] 2 designação(ões) analisada(s), 1 continuando uma anterior, 2 com início real alterado.', out.getvalue())
+        self._recarregar(segunda)
+        self.assertEqual((segunda.sequencia_id, segunda.inicio_sequencia), (primeira.pk, inicio))
@@ -7,14 +7,14 @@ Cobre:
 - Ano renderizado como inteiro (sem separador de milhar) em todos os templates
 - Dashboard: aba Setores com matriz de acompanhamento
 - Alteração de status de setor (OK, Correção com justificativa, permissões)
-- Download e exclusão de prestação de setor
+- Download e exclusão de prestação de setor (ETag, Range e X-Accel-Redirect)
 - Desacoplamento: detalhe.html não contém mais formulário de upload
 - Isolamento entre setores
 """
 import os
 import json
 from datetime import date, timedelta
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.contrib.auth.models import User, Group
@@ -25,12 +25,14 @@ from contratos.models import (
     Setor, CargoRegimental, ApontamentoCorrecaoSetor, ApontamentoCorrecao,
     CalendarioPrestacao
 )
+from contratos.tests.midia import MidiaTemporariaMixin
 
 
-class BaseSetorTestSetup(TestCase):
+class BaseSetorTestSetup(MidiaTemporariaMixin, TestCase):
     """Setup compartilhado para testes do portal de setores."""
 
     def setUp(self):
+        super().setUp()
         self.posto = PostoGraduacao.objects.create(sigla="1S", descricao="Primeiro Sargento", senioridade=5)
         self.agente = Agente.objects.create(
             nome_completo="Roberto Silva", nome_de_guerra="Silva",
@@ -446,6 +448,43 @@ class DownloadExcluirSetorTests(BaseSetorTestSetup):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
 
+    def test_download_responde_304_com_etag_igual(self):
+        p = self._criar_prestacao_setor(4, 2026)
+        self.client.login(username='auditor_test', password='pw')
+        url = reverse('download_prestacao_setor', kwargs={'pk': p.id})
+        etag = self.client.get(url)['ETag']
+        # Mesmo formato do ETag do Nginx: "<mtime em segundos>-<tamanho>", em hexadecimal
+        info = os.stat(p.arquivo.path)
+        self.assertEqual(etag, f'"{int(info.st_mtime):x}-{info.st_size:x}"')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_download_atende_intervalo_de_bytes(self):
+        p = self._criar_prestacao_setor(4, 2026)
+        self.client.login(username='auditor_test', password='pw')
+        url = reverse('download_prestacao_setor', kwargs={'pk': p.id})
+        with open(p.arquivo.path, 'rb') as f:
+            conteudo = f.read()
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(conteudo)}')
+        self.assertEqual(response.getvalue(), conteudo[2:6])
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(conteudo)}-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(DOWNLOAD_X_ACCEL_REDIRECT='/protegido/')
+    def test_download_delega_ao_nginx_com_x_accel_redirect(self):
+        p = self._criar_prestacao_setor(4, 2026)
+        self.client.login(username='auditor_test', password='pw')
+        response = self.client.get(reverse('download_prestacao_setor', kwargs={'pk': p.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protegido/' + p.arquivo.name)
+        self.assertEqual(response.content, b'')
+
     def test_exclusao_requer_admin(self):
         p = self._criar_prestacao_setor(4, 2026)
         self.client.login(username='auditor_test', password='pw')
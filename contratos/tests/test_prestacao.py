@@ -6,9 +6,11 @@ from django.urls import reverse
 from django.contrib.auth.models import User
 
 from contratos.models import Contrato, Empresa, PrestacaoContas, Agente, PostoGraduacao, Comissao, Integrante, Funcao
+from contratos.tests.midia import MidiaTemporariaMixin
 
-class PrestacaoContasTests(TestCase):
+class PrestacaoContasTests(MidiaTemporariaMixin, TestCase):
     def setUp(self):
+        super().setUp()
         # Configurar ambiente de teste
         self.posto = PostoGraduacao.objects.create(sigla="SGT", descricao="Sargento", senioridade=5)
         self.empresa = Empresa.objects.create(razao_social="Empresa Teste Ltda", cnpj="12345678000199")
@@ -157,7 +159,7 @@ class PrestacaoContasTests(TestCase):
         self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
         
         # O CSV é delimitado por ';'
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         lines = content.split('\r\n')
         
         # Verificar cabeçalhos
@@ -184,7 +186,7 @@ class PrestacaoContasTests(TestCase):
         prestacao.save()
         
         response_ok = self.client.get(url, {'mes': 5, 'ano': 2026, 'formato': 'csv'})
-        content_ok = response_ok.content.decode('utf-8-sig')
+        content_ok = response_ok.getvalue().decode('utf-8-sig')
         lines_ok = content_ok.split('\r\n')
         found_ok = False
         for line in lines_ok[1:]:
@@ -199,7 +201,7 @@ class PrestacaoContasTests(TestCase):
         # Testar exportação para outro mês (por exemplo, mês 6 de 2026) onde não há prestação (deve constar como Pendente)
         response_pending = self.client.get(url, {'mes': 6, 'ano': 2026, 'formato': 'csv'})
         self.assertEqual(response_pending.status_code, 200)
-        content_pending = response_pending.content.decode('utf-8-sig')
+        content_pending = response_pending.getvalue().decode('utf-8-sig')
         lines_pending = content_pending.split('\r\n')
         
         found_pending = False
@@ -246,7 +248,7 @@ class PrestacaoContasTests(TestCase):
         response = self.client.get(url, {'mes': 5, 'ano': 2026, 'formato': 'csv'})
         self.assertEqual(response.status_code, 200)
 
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         lines = [l for l in content.split('\r\n') if l]
 
         # Contar quantas linhas de dados pertencem ao contrato 10/2026 (excluindo o cabeçalho)
@@ -524,7 +526,7 @@ class PrestacaoContasTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
         
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         lines = content.split('\r\n')
         self.assertIn('Contrato', lines[0])
         self.assertIn('Mês de Referência', lines[0])
@@ -559,7 +561,7 @@ class PrestacaoContasTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
         
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         lines = content.split('\r\n')
         
         # Verificar cabeçalhos
@@ -607,7 +609,7 @@ class PrestacaoContasTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
         
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         lines = content.split('\r\n')
         self.assertIn('Setor', lines[0])
         self.assertIn('Mês de Referência', lines[0])
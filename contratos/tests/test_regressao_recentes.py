@@ -26,15 +26,17 @@ from contratos.models import (
     PostoGraduacao,
     PrestacaoContas,
 )
+from contratos.tests.midia import MidiaTemporariaMixin
 
 
 # ─────────────────────────────────────────────
 # Fixture base compartilhada
 # ─────────────────────────────────────────────
-class _BaseFixture(TestCase):
+class _BaseFixture(MidiaTemporariaMixin, TestCase):
     """Cria os objetos mínimos necessários em todos os grupos de teste."""
 
     def setUp(self):
+        super().setUp()
         self.posto = PostoGraduacao.objects.create(
             sigla="TEN", descricao="Tenente", senioridade=3
         )
@@ -316,7 +318,7 @@ class ExportacaoPendenteFanatmasmaTests(_BaseFixture):
         response = self.client.get(self.url_export, {"mes": 5, "ano": 2026, "formato": "csv"})
         self.assertEqual(response.status_code, 200)
 
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         lines = [l for l in content.split("\r\n") if l]
 
         # Pegar as linhas de dados referentes ao nosso contrato
@@ -354,7 +356,7 @@ class ExportacaoPendenteFanatmasmaTests(_BaseFixture):
         self.assertIsNotNone(fantasma.data_envio)
 
         response = self.client.get(self.url_export, {"mes": 5, "ano": 2026, "formato": "csv"})
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         lines = [l for l in content.split("\r\n") if l]
         linhas_contrato = [l for l in lines[1:] if l.startswith("REG/2026")]
 
@@ -381,7 +383,7 @@ class ExportacaoPendenteFanatmasmaTests(_BaseFixture):
         )
 
         response = self.client.get(self.url_export, {"mes": 5, "ano": 2026, "formato": "csv"})
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         lines = [l for l in content.split("\r\n") if l]
         linhas_contrato = [l for l in lines[1:] if l.startswith("REG/2026")]
 
@@ -419,7 +421,7 @@ class ExportacaoPendenteFanatmasmaTests(_BaseFixture):
         )
 
         response = self.client.get(self.url_export, {"mes": 5, "ano": 2026, "formato": "csv"})
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         lines = [l for l in content.split("\r\n") if l]
         linhas_contrato = [l for l in lines[1:] if l.startswith("REG/2026")]
 
@@ -431,3 +433,35 @@ class ExportacaoPendenteFanatmasmaTests(_BaseFixture):
         # Limpeza
         if prest_real.arquivo and os.path.isfile(prest_real.arquivo.path):
             os.remove(prest_real.arquivo.path)
+
+    def test_pendente_criado_depois_do_envio_real_nao_oculta_o_envio(self):
+        """
+        Se o registro fantasma for o mais recente do contrato/mês (criado depois do envio),
+        o CSV deve continuar exportando o último envio efetivo.
+        """
+        pdf_file = SimpleUploadedFile("real3.pdf", b"%PDF-1.4", content_type="application/pdf")
+        PrestacaoContas.objects.create(
+            contrato=self.contrato,
+            agente=self.agente,
+            mes_referencia=5,
+            ano_referencia=2026,
+            arquivo=pdf_file,
+            status="entregue",
+        )
+        PrestacaoContas.objects.create(
+            contrato=self.contrato,
+            agente=None,
+            mes_referencia=5,
+            ano_referencia=2026,
+            status="pendente",
+        )
+
+        response = self.client.get(self.url_export, {"mes": 5, "ano": 2026, "formato": "csv"})
+        content = response.getvalue().decode("utf-8-sig")
+        lines = [l for l in content.split("\r\n") if l]
+        linhas_contrato = [l for l in lines[1:] if l.startswith("REG/2026")]
+
+        self.assertEqual(len(linhas_contrato), 1)
+        cols = linhas_contrato[0].split(";")
+        self.assertEqual(cols[9], "Entregue")
+        self.assertIn("Teste", cols[10])
@@ -6,9 +6,11 @@ from django.contrib.auth.models import User, Group
 from django.core.files.uploadedfile import SimpleUploadedFile
 from pypdf import PdfReader
 from contratos.models import Setor, PrestacaoContasSetor, Agente, PostoGraduacao
+from contratos.tests.midia import MidiaTemporariaMixin
 
-class SetoresDashboardTests(TestCase):
+class SetoresDashboardTests(MidiaTemporariaMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.user = User.objects.create_superuser(username='admin_test', password='password123', email='admin@test.com')
         
@@ -103,7 +105,7 @@ class SetoresDashboardTests(TestCase):
         self.assertEqual(response['Content-Type'], 'application/pdf')
         
         # Read consolidated PDF content and verify it contains the page
-        pdf_reader = PdfReader(io.BytesIO(response.content))
+        pdf_reader = PdfReader(io.BytesIO(response.getvalue()))
         self.assertEqual(len(pdf_reader.pages), 1)
 
     def test_consolidar_apresentacao_setor_no_ok(self):
@@ -204,7 +206,7 @@ class SetoresDashboardTests(TestCase):
         self.assertEqual(response['Content-Type'], 'application/pdf')
 
         # O PDF consolidado deve conter apenas 1 página (somente o envio mais recente)
-        pdf_reader = PdfReader(io.BytesIO(response.content))
+        pdf_reader = PdfReader(io.BytesIO(response.getvalue()))
         self.assertEqual(
             len(pdf_reader.pages), 1,
             "Consolidação não deve duplicar slides de setores com múltiplos envios"
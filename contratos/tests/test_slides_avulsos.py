@@ -11,6 +11,7 @@ from contratos.models import (
     Comissao, Integrante, Funcao, SlideApresentacao,
     Setor, PrestacaoContasSetor
 )
+from contratos.tests.midia import MidiaTemporariaMixin
 
 # PDF mínimo válido para pypdf
 PDF_MINIMO = (
@@ -24,10 +25,11 @@ PDF_MINIMO = (
 )
 
 
-class SlideAvulsoBaseTestCase(TestCase):
+class SlideAvulsoBaseTestCase(MidiaTemporariaMixin, TestCase):
     """Setup compartilhado para todos os testes de slides avulsos."""
 
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.posto = PostoGraduacao.objects.create(sigla="Cap", descricao="Capitão", senioridade=3)
         self.empresa = Empresa.objects.create(razao_social="Empresa Slide", cnpj="11.111.111/0001-11")
@@ -326,7 +328,7 @@ class ConsolidarComSlideAvulsoTests(SlideAvulsoBaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
         # Deve ter pelo menos 2 páginas (1 do slide + 1 da prestação)
-        self.assertTrue(len(response.content) > 100)
+        self.assertTrue(len(response.getvalue()) > 100)
 
     def test_consolidar_setores_somente_slides(self):
         """PDF consolidado de setores deve funcionar apenas com slides avulsos."""
@@ -361,7 +363,7 @@ class ConsolidarComSlideAvulsoTests(SlideAvulsoBaseTestCase):
 
 # ─── MODELO ────────────────────────────────────────────────────────────────────
 
-class SlideApresentacaoModelTests(TestCase):
+class SlideApresentacaoModelTests(MidiaTemporariaMixin, TestCase):
 
     def test_str_representation(self):
         """O __str__ do modelo deve exibir nome, tipo e período."""
@@ -0,0 +1,102 @@
+"""
+Testes das sugestões das caixas de busca (contratos.sugestoes / api_sugestoes):
+- Índice de prefixos sem acentos, com todos os termos e filtro por tipo
+- Apenas dados públicos: contratos vigentes e militares com designação ativa; SARAM não é devolvido
+- Consultas ao banco somente quando a versão dos dados é conferida
+- Reconstrução do índice quando os dados mudam
+"""
+from datetime import date, timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from contratos.models import (
+    Contrato, Empresa, Agente, PostoGraduacao, Funcao, Comissao, Integrante
+)
+from contratos import sugestoes
+from contratos.sugestoes import IndicePrefixos
+
+
+class IndicePrefixosTests(TestCase):
+
+    def test_busca_por_prefixo_de_todos_os_termos(self):
+        indice = IndicePrefixos([
+            ({'tipo': 'empresas', 'rotulo': 'Conservação Predial'}, ['Conservação Predial Ltda']),
+            ({'tipo': 'empresas', 'rotulo': 'Construtora Alfa'}, ['Construtora Alfa SA']),
+            ({'tipo': 'militares', 'rotulo': 'SGT Conrado'}, ['Conrado', '1234567']),
+        ])
+
+        self.assertEqual([i['rotulo'] for i in indice.buscar(['con'])], ['SGT Conrado', 'Conservação Predial', 'Construtora Alfa'])
+        self.assertEqual([i['rotulo'] for i in indice.buscar(['conservacao', 'pred'])], ['Conservação Predial'])
+        self.assertEqual([i['rotulo'] for i in indice.buscar(['con'], tipos=('empresas',), limite=1)], ['Conservação Predial'])
+        self.assertEqual(indice.buscar(['xyz']), [])
+
+
+@override_settings(SUGESTOES_INTERVALO_VERIFICACAO=0)
+class ApiSugestoesTests(TestCase):
+
+    def setUp(self):
+        sugestoes.descartar_indice()
+        self.hoje = date.today()
+        self.posto = PostoGraduacao.objects.create(sigla="SGT", descricao="Sargento", senioridade=5)
+        self.empresa = Empresa.objects.create(razao_social="Manutenção Predial Ltda", nome_fantasia="PrediMax", cnpj="11222333000181")
+        self.contrato = self._contrato("15/2026", "Manutenção de elevadores")
+        self._contrato("16/2020", "Manutenção antiga", vigencia_fim=self.hoje - timedelta(days=1))
+        self.funcao = Funcao.objects.create(titulo="Fiscal", sigla="FIS")
+        self.comissao = Comissao.objects.create(contrato=self.contrato, tipo="FISCALIZACAO", ativa=True)
+        self._designar("Mendonça", "7654321")
+        self._designar("Mendes", "7650000", desligamento=self.hoje)
+
+    def tearDown(self):
+        sugestoes.descartar_indice()
+
+    def _contrato(self, numero, objeto, vigencia_fim=None):
+        return Contrato.objects.create(
+            numero=numero, objeto=objeto, empresa=self.empresa,
+            vigencia_inicio=self.hoje - timedelta(days=400),
+            vigencia_fim=vigencia_fim or self.hoje + timedelta(days=300), valor_total=1000
+        )
+
+    def _designar(self, nome, saram, desligamento=None):
+        agente = Agente.objects.create(nome_completo=f"João {nome}", nome_de_guerra=nome, posto=self.posto, saram=saram)
+        return Integrante.objects.create(
+            comissao=self.comissao, agente=agente, funcao=self.funcao,
+            data_inicio=self.hoje - timedelta(days=30), data_desligamento=desligamento,
+            portaria_numero="1", portaria_data=self.hoje
+        )
+
+    def _sugestoes(self, q, tipo=None):
+        url = reverse('api_sugestoes_tipo', args=[tipo]) if tipo else reverse('api_sugestoes')
+        response = self.client.get(url, {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['sugestoes']
+
+    def test_sugere_contratos_vigentes_e_empresas_sem_acentos(self):
+        itens = self._sugestoes("manutencao")
+
+        self.assertEqual(
+            [(i['tipo'], i['valor']) for i in itens],
+            [('contratos', '15/2026'), ('empresas', 'Manutenção Predial Ltda')]
+        )
+        self.assertEqual(itens[0]['url'], reverse('detalhe_contrato', args=[self.contrato.pk]))
+        self.assertEqual([i['valor'] for i in self._sugestoes("15/20")], ['15/2026'])
+
+    def test_militares_ativos_por_nome_ou_saram_sem_expor_o_saram(self):
+        self.assertEqual([i['rotulo'] for i in self._sugestoes("mend", tipo='militares')], ['SGT Mendonça'])
+        itens = self._sugestoes("7654", tipo='militares')
+        self.assertEqual(itens, [{'tipo': 'militares', 'rotulo': 'SGT Mendonça', 'valor': 'Mendonça', 'url': None}])
+
+    def test_texto_curto_e_tipo_invalido(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self._sugestoes("m"), [])
+        self.assertEqual(self.client.get(reverse('api_sugestoes_tipo', args=['agentes']), {'q': 'mend'}).status_code, 404)
+
+    def test_indice_reaproveitado_e_reconstruido_quando_os_dados_mudam(self):
+        self._sugestoes("mend")
+
+        with self.assertNumQueries(1):  # apenas a versão dos dados
+            self._sugestoes("mendo")
+
+        with override_settings(SUGESTOES_INTERVALO_VERIFICACAO=60), self.assertNumQueries(0):
+            self._sugestoes("mendon")
+
+        self._contrato("17/2026", "Jardinagem")
+        self.assertEqual([i['valor'] for i in self._sugestoes("jardin")], ['17/2026'])
@@ -0,0 +1,159 @@
+"""
+Testes da consolidação de apresentações em segundo plano:
+- Enfileiramento via POST (e reaproveitamento de tarefa não finalizada)
+- Progresso em JSON e link de download ao concluir
+- Comando run_worker: processamento, tarefa sem itens e devolução de tarefas travadas
+"""
+import io
+import os
+from datetime import date, timedelta
+from io import StringIO
+from django.conf import settings
+from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User, Group
+from contratos.models import (
+    Contrato, Empresa, PrestacaoContas, Agente, PostoGraduacao, TarefaConsolidacao
+)
+from contratos.tests.midia import MidiaTemporariaMixin
+
+
+class TarefaConsolidacaoTests(MidiaTemporariaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        hoje = date.today()
+        posto = PostoGraduacao.objects.create(sigla="CB", descricao="Cabo", senioridade=8)
+        empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        self.agente = Agente.objects.create(
+            nome_completo="Carlos Pereira", nome_de_guerra="Pereira", posto=posto, saram="7654321"
+        )
+        self.contrato = Contrato.objects.create(
+            numero="20/2026", objeto="Manutenção Predial", empresa=empresa,
+            vigencia_inicio=hoje - timedelta(days=30), vigencia_fim=hoje + timedelta(days=300),
+            valor_total=50000.00
+        )
+
+        grupo, _ = Group.objects.get_or_create(name='Auditores')
+        self.auditor = User.objects.create_user(username="auditor_tarefa", password="pass123")
+        self.auditor.groups.add(grupo)
+        self.client.login(username="auditor_tarefa", password="pass123")
+
+    def _make_real_pdf(self, name="slide.pdf", paginas=1):
+        from pypdf import PdfWriter
+        writer = PdfWriter()
+        for _ in range(paginas):
+            writer.add_blank_page(width=612, height=792)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="application/pdf")
+
+    def _criar_prestacao(self, paginas=2):
+        return PrestacaoContas.objects.create(
+            contrato=self.contrato, agente=self.agente,
+            mes_referencia=5, ano_referencia=2026,
+            arquivo=self._make_real_pdf(paginas=paginas),
+            status='ok', compor_apresentacao=True
+        )
+
+    def _solicitar(self, tipo='fiscais'):
+        return self.client.post(reverse('solicitar_consolidacao'), {'tipo': tipo, 'mes': 5, 'ano': 2026})
+
+    def test_solicitar_enfileira_tarefa(self):
+        response = self._solicitar()
+
+        self.assertEqual(response.status_code, 202)
+        dados = response.json()
+        self.assertEqual(dados['status'], 'pendente')
+        self.assertIsNone(dados['url_download'])
+        tarefa = TarefaConsolidacao.objects.get(pk=dados['tarefa_id'])
+        self.assertEqual((tarefa.tipo_apresentacao, tarefa.mes_referencia, tarefa.ano_referencia), ('fiscais', 5, 2026))
+        self.assertEqual(tarefa.solicitante, self.auditor)
+
+    def test_solicitar_reaproveita_tarefa_em_andamento(self):
+        primeira = self._solicitar().json()
+        segunda = self._solicitar().json()
+
+        self.assertEqual(primeira['tarefa_id'], segunda['tarefa_id'])
+        self.assertEqual(TarefaConsolidacao.objects.count(), 1)
+
+    def test_solicitar_tipo_invalido(self):
+        response = self._solicitar(tipo='outro')
+        self.assertEqual(response.status_code, 400)
+
+    def test_solicitar_exige_auditor(self):
+        User.objects.create_user(username="comum_tarefa", password="pass123")
+        self.client.login(username="comum_tarefa", password="pass123")
+
+        response = self._solicitar()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(TarefaConsolidacao.objects.exists())
+
+    def test_worker_processa_e_libera_download(self):
+        self._criar_prestacao(paginas=2)
+        tarefa_id = self._solicitar().json()['tarefa_id']
+
+        out = StringIO()
+        call_command('run_worker', '--once', stdout=out)
+        self.assertIn('[CONCLUIDA]', out.getvalue())
+
+        dados = self.client.get(reverse('progresso_consolidacao', args=[tarefa_id])).json()
+        self.assertEqual(dados['status'], 'concluida')
+        self.assertEqual(dados['arquivos_total'], 1)
+        self.assertEqual(dados['arquivos_processados'], 1)
+        self.assertEqual(dados['paginas_mescladas'], 2)
+        self.assertEqual(dados['erros'], [])
+        self.assertEqual(dados['url_download'], reverse('download_consolidacao', args=[tarefa_id]))
+
+        response = self.client.get(dados['url_download'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Apresentacao_Consolidada_Mai_2026.pdf', response['Content-Disposition'])
+        self.assertTrue(response.getvalue().startswith(b'%PDF'))
+
+        # A tarefa referencia o PDF do cache em vez de gravar uma segunda cópia
+        tarefa = TarefaConsolidacao.objects.get(pk=tarefa_id)
+        self.assertTrue(tarefa.chave_cache)
+        self.assertFalse(tarefa.arquivo)
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, 'consolidacoes')))
+
+    def test_pdf_removido_do_cache_nao_oferece_download(self):
+        self._criar_prestacao()
+        tarefa_id = self._solicitar().json()['tarefa_id']
+        call_command('run_worker', '--once', stdout=StringIO())
+
+        call_command('limpar_cache_consolidacao', stdout=StringIO())
+
+        dados = self.client.get(reverse('progresso_consolidacao', args=[tarefa_id])).json()
+        self.assertEqual(dados['status'], 'concluida')
+        self.assertIsNone(dados['url_download'])
+        response = self.client.get(reverse('download_consolidacao', args=[tarefa_id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_worker_registra_erro_sem_itens(self):
+        tarefa_id = self._solicitar().json()['tarefa_id']
+
+        call_command('run_worker', '--once', stdout=StringIO())
+
+        tarefa = TarefaConsolidacao.objects.get(pk=tarefa_id)
+        self.assertEqual(tarefa.status, 'erro')
+        self.assertIn("Nenhum slide em conformidade", tarefa.erros)
+        response = self.client.get(reverse('download_consolidacao', args=[tarefa_id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_worker_devolve_tarefa_travada_a_fila(self):
+        self._criar_prestacao()
+        tarefa = TarefaConsolidacao.objects.create(
+            tipo_apresentacao='fiscais', mes_referencia=5, ano_referencia=2026,
+            status='processando', data_inicio=timezone.now() - timedelta(hours=2)
+        )
+
+        out = StringIO()
+        call_command('run_worker', '--once', stdout=out)
+
+        self.assertIn('devolvida(s) à fila', out.getvalue())
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'concluida')
@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from contratos.models import (
+    Empresa, Contrato, Setor, PrestacaoContas, PrestacaoContasSetor,
+    UltimaPrestacao, UltimaPrestacaoSetor
+)
+
+
+class UltimaPrestacaoTests(TestCase):
+    """Manutenção do ponteiro materializado de última prestação por contrato/setor e mês."""
+
+    def setUp(self):
+        hoje = date.today()
+        self.empresa = Empresa.objects.create(razao_social="Empresa Ponteiro", cnpj="98.765.432/0001-10")
+        self.contrato = Contrato.objects.create(
+            numero="PT-1/2026",
+            empresa=self.empresa,
+            objeto="Objeto",
+            vigencia_inicio=hoje - timedelta(days=30),
+            vigencia_fim=hoje + timedelta(days=30),
+            valor_total=1000
+        )
+        self.setor = Setor.objects.create(nome="Setor Ponteiro", sigla="SPT")
+
+    def _criar(self, **kwargs):
+        dados = {'contrato': self.contrato, 'ano_referencia': 2026, 'mes_referencia': 3, 'status': 'entregue'}
+        dados.update(kwargs)
+        return PrestacaoContas.objects.create(**dados)
+
+    def test_ponteiro_acompanha_reenvio(self):
+        primeira = self._criar()
+        self.assertEqual(UltimaPrestacao.objects.get(contrato=self.contrato).prestacao, primeira)
+
+        segunda = self._criar()
+        self.assertEqual(UltimaPrestacao.objects.count(), 1)
+        self.assertEqual(UltimaPrestacao.objects.get(contrato=self.contrato).prestacao, segunda)
+
+    def test_ponteiro_volta_ao_envio_anterior_na_exclusao(self):
+        primeira = self._criar()
+        segunda = self._criar()
+        segunda.delete()
+        self.assertEqual(UltimaPrestacao.objects.get(contrato=self.contrato).prestacao, primeira)
+
+        primeira.delete()
+        self.assertFalse(UltimaPrestacao.objects.exists())
+
+    def test_exclusao_em_lote_volta_ao_envio_anterior(self):
+        # Ação "excluir selecionados" do admin: QuerySet.delete(), sem passar por delete()
+        primeira = self._criar()
+        segunda = self._criar()
+        PrestacaoContas.objects.filter(pk=segunda.pk).delete()
+        self.assertEqual(UltimaPrestacao.objects.get(contrato=self.contrato).prestacao, primeira)
+
+        PrestacaoContas.objects.filter(pk=primeira.pk).delete()
+        self.assertFalse(UltimaPrestacao.objects.exists())
+
+    def test_ponteiro_acompanha_mudanca_de_mes(self):
+        prestacao = self._criar()
+        prestacao.mes_referencia = 4
+        prestacao.save()
+        ponteiros = list(UltimaPrestacao.objects.values_list('mes_referencia', 'prestacao_id'))
+        self.assertEqual(ponteiros, [(4, prestacao.id)])
+
+    def test_ponteiro_setor(self):
+        primeira = PrestacaoContasSetor.objects.create(setor=self.setor, ano_referencia=2026, mes_referencia=3)
+        segunda = PrestacaoContasSetor.objects.create(setor=self.setor, ano_referencia=2026, mes_referencia=3)
+        self.assertEqual(UltimaPrestacaoSetor.objects.get(setor=self.setor).prestacao, segunda)
+        segunda.delete()
+        self.assertEqual(UltimaPrestacaoSetor.objects.get(setor=self.setor).prestacao, primeira)
+
+        terceira = PrestacaoContasSetor.objects.create(setor=self.setor, ano_referencia=2026, mes_referencia=3)
+        PrestacaoContasSetor.objects.filter(pk=terceira.pk).delete()
+        self.assertEqual(UltimaPrestacaoSetor.objects.get(setor=self.setor).prestacao, primeira)
+
+    def test_comando_reconstroi_ponteiros(self):
+        self._criar()
+        ultima = self._criar()
+        self._criar(mes_referencia=4)
+        PrestacaoContasSetor.objects.create(setor=self.setor, ano_referencia=2026, mes_referencia=3)
+
+        UltimaPrestacao.objects.all().delete()
+        UltimaPrestacaoSetor.objects.all().delete()
+
+        out = StringIO()
+        call_command('reconstruir_ultimas_prestacoes', stdout=out)
+
+        self.assertEqual(UltimaPrestacao.objects.count(), 2)
+        self.assertEqual(
+            UltimaPrestacao.objects.get(contrato=self.contrato, mes_referencia=3).prestacao, ultima
+        )
+        self.assertEqual(UltimaPrestacaoSetor.objects.count(), 1)
+        self.assertIn('2 ponteiro(s) de contratos', out.getvalue())
@@ -0,0 +1,76 @@
+"""
+Testes do monitoramento de vencimentos calculado no banco (Comissao.objects.com_vencimento):
+- Término efetivo (data_fim da comissão ou fim da vigência do contrato)
+- Dias restantes e limites das faixas crítico/alerta/normal
+- Painel (top 5 e contagem por faixa) e exportação de vencimentos
+"""
+from datetime import date, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from contratos.models import Contrato, Empresa, Comissao
+
+
+class ComVencimentoTests(TestCase):
+
+    def setUp(self):
+        self.hoje = date.today()
+        self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+
+    def _comissao(self, dias_contrato, dias_comissao=None, numero=None, ativa=True):
+        contrato = Contrato.objects.create(
+            numero=numero or f"{dias_contrato}/2026", objeto="Limpeza", empresa=self.empresa,
+            vigencia_inicio=self.hoje - timedelta(days=100), vigencia_fim=self.hoje + timedelta(days=dias_contrato),
+            valor_total=1000
+        )
+        data_fim = self.hoje + timedelta(days=dias_comissao) if dias_comissao is not None else None
+        return Comissao.objects.create(contrato=contrato, tipo="FISCALIZACAO", ativa=ativa, data_fim=data_fim)
+
+    def test_anota_termino_efetivo_dias_e_faixa(self):
+        propria = self._comissao(300, dias_comissao=7)
+        do_contrato = self._comissao(8)
+        limite_alerta = self._comissao(15)
+        normal = self._comissao(16)
+        Comissao.objects.create(tipo="PLANEJAMENTO", descricao_objeto="Sem término", ativa=True)
+
+        anotadas = {c.pk: c for c in Comissao.objects.com_vencimento(self.hoje)}
+
+        self.assertEqual(len(anotadas), 4)
+        self.assertEqual(anotadas[propria.pk].data_fim_efetiva, self.hoje + timedelta(days=7))
+        self.assertEqual(anotadas[do_contrato.pk].data_fim_efetiva, self.hoje + timedelta(days=8))
+        self.assertEqual(
+            [(anotadas[c.pk].dias_restantes, anotadas[c.pk].criticidade) for c in (propria, do_contrato, limite_alerta, normal)],
+            [(7, 'critico'), (8, 'alerta'), (15, 'alerta'), (16, 'normal')],
+        )
+
+    def test_painel_usa_top_5_e_contagem_por_faixa(self):
+        for dias in (40, 3, 10, 20, 1, 12, 30):
+            self._comissao(dias)
+        self._comissao(-5, numero="VENCIDO")
+        self._comissao(2, numero="INATIVA", ativa=False)
+
+        User.objects.create_superuser(username="admin_venc", password="pass123")
+        self.client.login(username="admin_venc", password="pass123")
+        context = self.client.get(reverse('painel_controle')).context
+
+        self.assertEqual([c.dias_restantes for c in context['lista_vencimentos']], [1, 3, 10, 12, 20])
+        self.assertEqual(context['lista_vencimentos'][0].status_texto, 'CRÍTICO')
+        self.assertEqual(context['lista_vencimentos'][2].classe_cor, 'table-warning')
+        self.assertEqual(
+            (context['vencimentos_critico'], context['vencimentos_alerta'], context['vencimentos_normal']),
+            (2, 2, 3)
+        )
+        self.assertEqual(context['total_vencimentos_count'], 7)
+
+    def test_exportacao_ordena_por_dias_e_inclui_vencidas(self):
+        self._comissao(20)
+        self._comissao(-5, numero="VENCIDO")
+
+        User.objects.create_superuser(username="admin_venc", password="pass123")
+        self.client.login(username="admin_venc", password="pass123")
+        response = self.client.get(reverse('exportar_vencimentos_csv'), {'formato': 'csv'})
+
+        linhas = response.getvalue().decode('utf-8-sig').strip().splitlines()[1:]
+        self.assertEqual([l.split(';')[0] for l in linhas], ["VENCIDO", "20/2026"])
+        self.assertEqual(linhas[0].split(';')[4:], ['CRÍTICO', '-5'])
+        self.assertEqual(linhas[1].split(';')[4:], ['NORMAL', '20'])
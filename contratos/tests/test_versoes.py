@@ -0,0 +1,144 @@
+"""
+Testes das versões dos dados e do cache indexado por elas (contratos.versoes):
+- Sinais de gravação/exclusão incrementam apenas o domínio do modelo
+- Reordenações gravadas com update() também incrementam o domínio
+- em_cache reaproveita o resultado até que um domínio de que depende mude
+- Relatório de transparência servido do cache e atualizado após alterações
+- Painel de auditoria em cache (cabeçalhos HIT/MISS) e botão "recalcular"
+"""
+import json
+from datetime import date, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User, Group
+from contratos.models import Contrato, Empresa, Setor
+from contratos.versoes import versoes, em_cache
+
+
+class VersoesDadosTests(TestCase):
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+
+    def _contrato(self, numero="40/2026"):
+        return Contrato.objects.create(
+            numero=numero, objeto="Vigilância", empresa=self.empresa,
+            vigencia_inicio=date.today() - timedelta(days=10), vigencia_fim=date.today() + timedelta(days=300),
+            valor_total=1000
+        )
+
+    def test_sinais_incrementam_apenas_o_dominio_do_modelo(self):
+        antes = versoes(['contratos', 'prestacoes', 'setores'])
+
+        contrato = self._contrato()
+        contrato.delete()
+        Setor.objects.create(nome="Setor de Testes")
+
+        depois = versoes(['contratos', 'prestacoes', 'setores'])
+        self.assertEqual(depois['contratos'], antes['contratos'] + 2)
+        self.assertEqual(depois['prestacoes'], antes['prestacoes'])
+        self.assertEqual(depois['setores'], antes['setores'] + 1)
+
+    def test_reordenacoes_em_massa_incrementam_o_dominio(self):
+        User.objects.create_superuser(username="admin_ordem", password="pass123")
+        self.client.login(username="admin_ordem", password="pass123")
+        setor = Setor.objects.create(nome="Setor Reordenado")
+        antes = versoes(['contratos', 'setores'])
+
+        self.client.post(
+            reverse('reordenar_integrantes'), json.dumps({'ordem': []}), content_type='application/json'
+        )
+        self.client.post(
+            reverse('reordenar_setores'), json.dumps({'setor_ids': [setor.pk]}), content_type='application/json'
+        )
+
+        depois = versoes(['contratos', 'setores'])
+        self.assertEqual(depois['contratos'], antes['contratos'] + 1)
+        self.assertEqual(depois['setores'], antes['setores'] + 1)
+
+    def test_em_cache_recalcula_somente_quando_o_dominio_muda(self):
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            return len(chamadas)
+
+        self.assertEqual(em_cache('teste', ['contratos'], calcular), 1)
+        self.assertEqual(em_cache('teste', ['contratos'], calcular), 1)
+
+        Setor.objects.create(nome="Outro domínio")
+        self.assertEqual(em_cache('teste', ['contratos'], calcular), 1)
+
+        self._contrato()
+        self.assertEqual(em_cache('teste', ['contratos'], calcular), 2)
+        self.assertEqual(len(chamadas), 2)
+
+    def test_transparencia_usa_cache_e_reflete_alteracoes(self):
+        self._contrato("41/2026")
+        url = reverse('transparencia')
+
+        self.assertContains(self.client.get(url), "41/2026")
+        with self.assertNumQueries(2):  # versões + leitura do cache
+            self.assertContains(self.client.get(url), "41/2026")
+
+        self._contrato("42/2026")
+        self.assertContains(self.client.get(url), "42/2026")
+
+
+class PainelCacheTests(TestCase):
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(razao_social="Alpha Serviços SA", cnpj="11222333000181")
+        self.admin = User.objects.create_superuser(username="admin_painel", password="pass123")
+        self.client.login(username="admin_painel", password="pass123")
+        self.url = reverse('painel_controle')
+
+    def _contrato(self, numero):
+        return Contrato.objects.create(
+            numero=numero, objeto="Vigilância", empresa=self.empresa,
+            vigencia_inicio=date.today() - timedelta(days=10), vigencia_fim=date.today() + timedelta(days=300),
+            valor_total=1000
+        )
+
+    def test_segunda_visita_vem_do_cache(self):
+        self._contrato("50/2026")
+
+        primeira = self.client.get(self.url)
+        self.assertEqual(primeira['X-Painel-Cache'], 'MISS')
+        self.assertIn('X-Painel-Tempo-Ms', primeira)
+
+        segunda = self.client.get(self.url)
+        self.assertEqual(segunda['X-Painel-Cache'], 'HIT')
+        self.assertNotIn('X-Painel-Tempo-Ms', segunda)
+        self.assertEqual(
+            [c.numero for c in segunda.context['contratos_risco']],
+            [c.numero for c in primeira.context['contratos_risco']],
+        )
+
+    def test_alteracao_nos_contratos_invalida_o_painel(self):
+        self.client.get(self.url)
+        self._contrato("51/2026")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Painel-Cache'], 'MISS')
+        self.assertIn("51/2026", [c.numero for c in response.context['contratos_risco']])
+
+    def test_recalcular_descarta_o_cache(self):
+        self.client.get(self.url)
+        self.assertContains(self.client.get(self.url), reverse('recalcular_painel'))
+
+        response = self.client.post(reverse('recalcular_painel'))
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(self.client.get(self.url)['X-Painel-Cache'], 'MISS')
+
+    def test_recalcular_exige_administrador(self):
+        grupo, _ = Group.objects.get_or_create(name='Auditores')
+        auditor = User.objects.create_user(username="auditor_painel", password="pass123")
+        auditor.groups.add(grupo)
+        self.client.login(username="auditor_painel", password="pass123")
+
+        self.client.get(self.url)
+        self.assertNotContains(self.client.get(self.url), reverse('recalcular_painel'))
+
+        self.client.post(reverse('recalcular_painel'))
+        self.assertEqual(self.client.get(self.url)['X-Painel-Cache'], 'HIT')
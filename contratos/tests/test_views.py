@@ -184,7 +184,7 @@ class PortalViewsTest(TestCase):
         url = reverse('exportar_empresas_csv')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("Outra Empresa LTDA", content)
         self.assertIn("Apelido Legal", content)
 
@@ -243,7 +243,7 @@ class AuditoriaViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         
         # O conteúdo do CSV vem em bytes, decodificamos para verificar texto
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("Maj Grafico", content)
 
     def test_agent_list_contains_cpf(self):
@@ -259,7 +259,7 @@ class AuditoriaViewsTest(TestCase):
         url = reverse('exportar_agentes_csv')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("CPF", content)
         self.assertIn("111.111.111-11", content)
 
@@ -299,7 +299,7 @@ class AuditoriaViewsTest(TestCase):
         url_query = f"{url}?data_inicial={data_inicio}&data_final={data_fim}"
         response = self.client.get(url_query)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         self.assertIn("CPF", content)
         self.assertIn("Tipo Comissão", content)
         self.assertIn("Fiscalização", content)
@@ -0,0 +1,44 @@
+"""
+Travas consultivas (advisory locks) para rotinas que não podem rodar em paralelo
+consigo mesmas, como os comandos agendados.
+
+No PostgreSQL a trava é pg_try_advisory_lock: pertence à conexão e é liberada ao sair
+do bloco ou se o processo morrer. Nos demais bancos (SQLite) é uma entrada no cache de
+banco (contratos_cache): cache.add() só grava se a chave não existir, e a validade
+impede que a trava fique presa após a queda do processo.
+"""
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+
+VALIDADE_PADRAO = 60 * 60
+
+
+@contextmanager
+def trava_consultiva(nome, validade=VALIDADE_PADRAO):
+    """
+    Tenta obter a trava sem esperar. Produz True se obtida (liberada ao sair do bloco)
+    ou False se outro processo a detém.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', [nome])
+            obtida = cursor.fetchone()[0]
+        try:
+            yield obtida
+        finally:
+            if obtida:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', [nome])
+        return
+
+    chave = f'trava:{nome}'
+    dono = uuid.uuid4().hex
+    obtida = cache.add(chave, dono, validade)
+    try:
+        yield obtida
+    finally:
+        if obtida and cache.get(chave) == dono:
+            cache.delete(chave)
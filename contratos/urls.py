@@ -9,6 +9,8 @@ urlpatterns = [
     path('contrato/<int:contrato_id>/', public.detalhe_contrato, name='detalhe_contrato'),
     path('transparencia/', public.relatorio_transparencia, name='transparencia'),
     path('transparencia/exportar/', public.exportar_transparencia_csv, name='exportar_transparencia_csv'),
+    path('api/sugestoes/', public.api_sugestoes, name='api_sugestoes'),
+    path('api/sugestoes/<str:tipo>/', public.api_sugestoes, name='api_sugestoes_tipo'),
 
     # --- ÁREA DO MILITAR (Módulo militar.py) ---
     path('militar/', militar.consulta_militar, name='consulta_militar'),
@@ -16,6 +18,7 @@ urlpatterns = [
 
     # --- ÁREA RESTRITA / AUDITORIA (Módulo auditoria.py) ---
     path('auditoria/', auditoria.painel_controle, name='painel_controle'),
+    path('auditoria/recalcular/', auditoria.recalcular_painel, name='recalcular_painel'),
 
     # Exportações do Painel
     path('auditoria/exportar.csv', auditoria.exportar_csv, name='exportar_csv'),
@@ -95,6 +98,9 @@ urlpatterns = [
     path('portal/prestacao/status/<int:pk>/<str:novo_status>/', prestacao.alterar_status_prestacao, name='alterar_status_prestacao'),
     path('portal/prestacao/toggle_apresentacao/', prestacao.toggle_apresentacao_prestacao, name='toggle_apresentacao_prestacao'),
     path('portal/prestacao/consolidar/', prestacao.consolidar_apresentacao, name='consolidar_apresentacao'),
+    path('portal/prestacao/consolidar/tarefa/', prestacao.solicitar_consolidacao, name='solicitar_consolidacao'),
+    path('portal/prestacao/consolidar/tarefa/<int:pk>/', prestacao.progresso_consolidacao, name='progresso_consolidacao'),
+    path('portal/prestacao/consolidar/tarefa/<int:pk>/download/', prestacao.download_consolidacao, name='download_consolidacao'),
     path('portal/prestacao/gestores/reordenar/', prestacao.reordenar_gestores_prio, name='reordenar_gestores_prio'),
     path('portal/prestacao/calendario/salvar/', prestacao.salvar_calendario_prestacao, name='salvar_calendario_prestacao'),
 
@@ -119,6 +125,7 @@ urlpatterns = [
     path('portal/cargos/setores/reordenar/', cargos.reordenar_setores, name='reordenar_setores'),
     # --- CONFIGURAÇÕES DO SISTEMA ---
     path('portal/configuracoes/', portal.configuracoes_sistema, name='configuracoes_sistema'),
+    path('portal/configuracoes/agendador/', portal.historico_agendador, name='historico_agendador'),
 
     path('test404/', public.handler404, name='test_404'),
 ]
\ No newline at end of file
@@ -1,26 +1,41 @@
 from datetime import date
-from django.db.models import Q
+from contratos.models import filtro_integrantes_ativos
 
 def get_filtro_ativos():
     """
-    Retorna o objeto Q para filtrar apenas integrantes ativos.
-    Regra: (Sem desligamento OU Desligamento Futuro) E (Sem fim previsto OU Fim previsto Futuro)
+    Retorna o objeto Q para filtrar apenas integrantes ativos hoje.
+    Regra única em contratos.models (ver Integrante.objects.ativos()).
     """
-    hoje = date.today()
-    return (
-        (Q(data_desligamento__isnull=True) | Q(data_desligamento__gt=hoje)) &
-        (Q(data_fim__isnull=True) | Q(data_fim__gte=hoje))
-    )
+    return filtro_integrantes_ativos()
 
 # --- PERMISSIONS ---
 from django.contrib.auth.decorators import user_passes_test
 
+def papeis_usuario(user):
+    """
+    Nomes dos grupos do usuário, consultados uma única vez e guardados no próprio objeto.
+    Como request.user é carregado a cada requisição, decorators, views e o filtro
+    is_admin dos templates compartilham a mesma consulta durante a requisição.
+    """
+    papeis = getattr(user, '_papeis', None)
+    if papeis is None:
+        papeis = frozenset(user.groups.values_list('name', flat=True))
+        user._papeis = papeis
+    return papeis
+
+def invalidar_papeis(user):
+    """Descarta os grupos memorizados (chamar após alterar os grupos do usuário)."""
+    try:
+        del user._papeis
+    except AttributeError:
+        pass
+
 def is_admin(user):
     """
     Check if user is in 'Administradores' group or is a superuser.
     """
     if not user.is_authenticated: return False
-    return user.is_superuser or user.groups.filter(name='Administradores').exists()
+    return user.is_superuser or 'Administradores' in papeis_usuario(user)
 
 def is_auditor(user):
     """
@@ -28,7 +43,7 @@ def is_auditor(user):
     """
     if not user.is_authenticated: return False
     if is_admin(user): return True
-    return user.groups.filter(name='Auditores').exists()
+    return 'Auditores' in papeis_usuario(user)
 
 def admin_required(view_func):
     return user_passes_test(is_admin, login_url='portal_home')(view_func)
@@ -64,36 +79,104 @@ def format_cnpj(value):
 
 # --- EXPORT HELPERS ---
 import csv
+import tempfile
 import urllib.parse
-from django.http import HttpResponse
+from datetime import datetime
+from decimal import Decimal
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+# Linhas acumuladas antes de cada envio de bloco do CSV em streaming
+LINHAS_POR_BLOCO_CSV = 500
+
+def _valor_csv(valor):
+    """Formata datas (dd/mm/aaaa), data/hora (horário local) e decimais (vírgula) para o CSV."""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime("%d/%m/%Y %H:%M")
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, Decimal):
+        return str(valor).replace('.', ',')
+    return valor
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha escrita em vez de armazená-la."""
+    def write(self, valor):
+        return valor
+
+def _linhas_csv(headers, data_rows):
+    writer = csv.writer(_Eco(), delimiter=';')
+    yield '\ufeff' + writer.writerow(headers)
+    bloco = []
+    for row in data_rows:
+        bloco.append(writer.writerow([_valor_csv(v) for v in row]))
+        if len(bloco) >= LINHAS_POR_BLOCO_CSV:
+            yield ''.join(bloco)
+            bloco = []
+    if bloco:
+        yield ''.join(bloco)
+
+def _celula_xlsx(ws, valor):
+    """Célula tipada do openpyxl (write-only): datas e decimais mantêm o tipo com formato brasileiro."""
+    from openpyxl.cell import WriteOnlyCell
+
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.make_naive(valor)
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.number_format = 'DD/MM/YYYY HH:MM'
+        return cell
+    if isinstance(valor, date):
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.number_format = 'DD/MM/YYYY'
+        return cell
+    if isinstance(valor, Decimal):
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.number_format = '#,##0.00'
+        return cell
+    if valor is None or isinstance(valor, (str, int, float)):
+        return valor
+    return str(valor)
 
 def export_csv_or_xlsx(request, filename_base, headers, data_rows):
     """
-    Gera um arquivo XLSX ou CSV com base em '?formato=xlsx|csv'.
+    Gera um arquivo XLSX ou CSV com base em '?formato=xlsx|csv', sem montar a planilha em memória.
     :param request: Django HttpRequest.
     :param filename_base: String com o nome base ('empresas'). A extensão será adicionada via lógica.
     :param headers: Lista com o texto das colunas.
-    :param data_rows: Lista/Generator contendo as colunas em ordem para cada linha.
+    :param data_rows: Lista/Generator contendo as colunas em ordem para cada linha. Pode (e deve,
+        em exportações grandes) ser um gerador sobre QuerySet.iterator(chunk_size=...).
+        Valores date, datetime e Decimal são gravados como tipos nativos no XLSX e
+        formatados no padrão brasileiro no CSV.
+    O CSV é transmitido via StreamingHttpResponse à medida que as linhas são geradas; o XLSX
+    é montado em modo write-only (linhas descartadas após a escrita) em arquivo temporário.
     """
     formato = request.GET.get('formato', 'csv')
     
     if formato == 'xlsx':
         import openpyxl
-        wb = openpyxl.Workbook()
-        ws = wb.active
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
         ws.append(headers)
         for row in data_rows:
-            # openpyxl lida bem com tipos embutidos, converte strings formatadas
-            ws.append([str(i) if i is not None else '' for i in row])
-        
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            ws.append([_celula_xlsx(ws, v) for v in row])
+
+        arquivo = tempfile.TemporaryFile()
+        wb.save(arquivo)
+        arquivo.seek(0)
+
+        response = FileResponse(arquivo, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
         encoded_filename = urllib.parse.quote(f"{filename_base}.xlsx")
         response['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"; filename*=UTF-8\'\'{encoded_filename}'
-        wb.save(response)
         return response
     
-    # CSV Padrão (UTF-8 com BOM)
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    # CSV Padrão (UTF-8 com BOM), transmitido em blocos
+    response = StreamingHttpResponse(
+        (bloco.encode('utf-8') for bloco in _linhas_csv(headers, data_rows)),
+        content_type='text/csv; charset=utf-8'
+    )
     encoded_filename = urllib.parse.quote(f"{filename_base}.csv")
     response['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"; filename*=UTF-8\'\'{encoded_filename}'
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
@@ -101,11 +184,111 @@ def export_csv_or_xlsx(request, filename_base, headers, data_rows):
     response['Expires'] = '0'
     response['X-Content-Type-Options'] = 'nosniff'
     response['Access-Control-Expose-Headers'] = 'Content-Disposition'
-    response.write(b'\xef\xbb\xbf')
-    
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(headers)
-    for row in data_rows:
-        writer.writerow(row)
-        
-    return response
\ No newline at end of file
+    return response
+
+# --- DOWNLOAD HELPERS ---
+import os
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def etag_arquivo(caminho):
+    """
+    ETag forte derivado da data de modificação (em segundos) e do tamanho do arquivo, no
+    mesmo formato do Nginx: com X-Accel-Redirect ligado, o 304 do Django e o ETag enviado
+    pelo Nginx coincidem.
+    """
+    info = os.stat(caminho)
+    return f'"{int(info.st_mtime):x}-{info.st_size:x}"'
+
+def _intervalo_solicitado(request, tamanho, etag):
+    """
+    Interpreta o cabeçalho Range (apenas um intervalo 'bytes=ini-fim').
+    Retorna (inicio, fim) inclusivo, None para enviar o arquivo inteiro,
+    ou False se o intervalo não puder ser atendido (416).
+    """
+    cabecalho = request.headers.get('Range')
+    if not cabecalho:
+        return None
+    # If-Range com ETag diferente: o arquivo mudou, envia inteiro
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        return None
+
+    match = _RANGE_RE.match(cabecalho.strip())
+    if not match:
+        return None  # múltiplos intervalos ou formato desconhecido: ignora o Range
+    ini, fim = match.groups()
+    if not ini and not fim:
+        return None
+
+    if not ini:
+        # Sufixo: últimos N bytes
+        n = int(fim)
+        if n == 0:
+            return False
+        return max(tamanho - n, 0), tamanho - 1
+
+    inicio = int(ini)
+    final = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > final:
+        return False
+    return inicio, final
+
+def _ler_intervalo(caminho, inicio, tamanho, bloco=64 * 1024):
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        restante = tamanho
+        while restante > 0:
+            dados = f.read(min(bloco, restante))
+            if not dados:
+                break
+            restante -= len(dados)
+            yield dados
+
+def servir_arquivo_protegido(request, caminho, content_type='application/pdf', filename=None, as_attachment=False):
+    """
+    Entrega um arquivo de MEDIA_ROOT após a checagem de permissão feita pela view.
+    - Com settings.DOWNLOAD_X_ACCEL_REDIRECT, delega a transferência ao Nginx (location interna),
+      que já trata Range e envia o arquivo sem passar pelo Python.
+    - Sem ele (desenvolvimento), transmite via FileResponse, atendendo Range (206) diretamente.
+    Em ambos os casos responde 304 quando o If-None-Match coincide com o ETag do arquivo.
+    """
+    info = os.stat(caminho)
+    etag = etag_arquivo(caminho)
+    filename = filename or os.path.basename(caminho)
+
+    nao_modificado = get_conditional_response(request, etag=etag, last_modified=int(info.st_mtime))
+    if nao_modificado is not None:
+        return nao_modificado
+
+    prefixo = getattr(settings, 'DOWNLOAD_X_ACCEL_REDIRECT', '')
+    if prefixo:
+        relativo = os.path.relpath(caminho, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefixo.rstrip('/') + '/' + urllib.parse.quote(relativo)
+    else:
+        intervalo = _intervalo_solicitado(request, info.st_size, etag)
+        if intervalo is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{info.st_size}'
+            return response
+        if intervalo:
+            inicio, fim = intervalo
+            tamanho = fim - inicio + 1
+            response = StreamingHttpResponse(
+                _ler_intervalo(caminho, inicio, tamanho), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {inicio}-{fim}/{info.st_size}'
+            response['Content-Length'] = str(tamanho)
+        else:
+            response = FileResponse(open(caminho, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(info.st_mtime)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
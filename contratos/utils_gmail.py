@@ -4,6 +4,7 @@ Módulo utilitário para envio de e-mails via Gmail API
 import os
 import base64
 import logging
+from datetime import datetime
 from email.message import EmailMessage
 from django.conf import settings
 from google.oauth2.credentials import Credentials
@@ -154,3 +155,36 @@ class GmailAPIError(Exception):
 
 # Instância singleton para reutilização
 gmail_client = GmailAPIClient()
+
+
+def verificar_saude(cliente=None):
+    """
+    Verifica a autenticação e a validade do token da Gmail API. Usa um cliente novo
+    (padrão), que lê o token do disco, em vez do serviço já guardado em gmail_client.
+    Retorna {'timestamp', 'status' ('ok', 'warning' ou 'error'), 'detalhes'}.
+    """
+    cliente = cliente or GmailAPIClient()
+    resultado = {
+        'timestamp': datetime.now().isoformat(),
+        'status': 'ok',
+        'detalhes': {}
+    }
+
+    try:
+        # Tenta autenticar
+        cliente.autenticar()
+        resultado['detalhes']['autenticacao'] = 'ok'
+
+        # Verifica validade do token
+        creds = cliente._service._http.credentials
+        if creds.expired:
+            resultado['detalhes']['token'] = 'expirado'
+            resultado['status'] = 'warning'
+        else:
+            resultado['detalhes']['token'] = 'valido'
+
+    except (GmailAPIError, RuntimeError) as e:
+        resultado['status'] = 'error'
+        resultado['detalhes']['erro'] = str(e)
+
+    return resultado
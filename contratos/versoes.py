@@ -0,0 +1,94 @@
+"""
+Versões dos dados e cache indexado por elas.
+
+Cada domínio (contratos/comissões, prestações, setores) tem um contador em
+VersaoDados, incrementado pelos sinais post_save/post_delete dos modelos do
+domínio. em_cache() compõe a chave do resultado com as versões dos domínios de que
+ele depende: quando algum dado muda, a chave muda e o valor é recalculado na próxima
+leitura, em qualquer worker, sem depender de tempo de expiração.
+
+Atualizações em massa (QuerySet.update, bulk_create) não disparam sinais: quem as
+faz deve chamar incrementar() para o domínio afetado.
+"""
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from contratos import models
+
+MODELOS_POR_DOMINIO = {
+    'contratos': [
+        models.PostoGraduacao, models.Agente, models.Empresa, models.Funcao,
+        models.Contrato, models.Comissao, models.Integrante,
+    ],
+    'prestacoes': [
+        models.PrestacaoContas, models.ApontamentoCorrecao, models.CalendarioPrestacao,
+        models.PrestacaoContasSetor, models.ApontamentoCorrecaoSetor, models.SlideApresentacao,
+    ],
+    'setores': [models.Setor, models.CargoRegimental],
+}
+
+_AUSENTE = object()
+
+
+def versoes(dominios):
+    """Versão atual de cada domínio informado, em uma única consulta."""
+    atuais = dict(models.VersaoDados.objects.filter(dominio__in=dominios).values_list('dominio', 'versao'))
+    return {dominio: atuais.get(dominio, 0) for dominio in dominios}
+
+
+def incrementar(dominio):
+    """Incrementa (de forma atômica no banco) a versão do domínio."""
+    alterados = models.VersaoDados.objects.filter(dominio=dominio).update(
+        versao=F('versao') + 1, data_atualizacao=timezone.now()
+    )
+    if not alterados:
+        models.VersaoDados.objects.get_or_create(dominio=dominio, defaults={'versao': 1})
+
+
+def chave_versionada(nome, dominios):
+    """Chave de cache composta pelo nome do resultado e pelas versões dos domínios."""
+    atuais = versoes(dominios)
+    return f"{nome}:" + ":".join(f"{dominio}{atuais[dominio]}" for dominio in dominios)
+
+
+def buscar_em_cache(nome, dominios, calcular, timeout=DEFAULT_TIMEOUT):
+    """
+    Devolve (resultado, veio_do_cache): o resultado guardado para as versões atuais
+    dos domínios ou, se não houver, o calculado agora (calcular()) e guardado.
+    """
+    chave = chave_versionada(nome, dominios)
+    valor = cache.get(chave, _AUSENTE)
+    if valor is not _AUSENTE:
+        return valor, True
+    valor = calcular()
+    cache.set(chave, valor, timeout)
+    return valor, False
+
+
+def em_cache(nome, dominios, calcular, timeout=DEFAULT_TIMEOUT):
+    """Como buscar_em_cache(), devolvendo apenas o resultado."""
+    return buscar_em_cache(nome, dominios, calcular, timeout)[0]
+
+
+def descartar_cache(nome, dominios):
+    """Remove o resultado guardado para as versões atuais, forçando novo cálculo."""
+    cache.delete(chave_versionada(nome, dominios))
+
+
+def _receptor(dominio):
+    def receptor(sender, **kwargs):
+        if kwargs.get('raw'):  # carga de fixtures
+            return
+        incrementar(dominio)
+    return receptor
+
+
+def conectar_sinais():
+    for dominio, modelos in MODELOS_POR_DOMINIO.items():
+        receptor = _receptor(dominio)
+        for modelo in modelos:
+            post_save.connect(receptor, sender=modelo, weak=False, dispatch_uid=f'versao_{dominio}_{modelo.__name__}_save')
+            post_delete.connect(receptor, sender=modelo, weak=False, dispatch_uid=f'versao_{dominio}_{modelo.__name__}_delete')
@@ -3,71 +3,69 @@ import json
 import urllib.parse
 import io
 import math
+import time
 from datetime import date, timedelta
 from django.http import HttpResponse
-from django.shortcuts import render
+from django.contrib import messages
+from django.shortcuts import render, redirect
+from django.views.decorators.http import require_POST
 from django.db.models import Count, Q, Prefetch
 from django.contrib.auth.decorators import login_required
 from django.utils.dateparse import parse_date
 from django.utils.safestring import mark_safe
-from contratos.models import Contrato, Agente, Comissao, Integrante, DIAS_VALIDADE_QUALIFICACAO
-from contratos.utils import get_filtro_ativos, export_csv_or_xlsx
+from contratos.models import (
+    Contrato, Agente, Comissao, Integrante, DIAS_VALIDADE_QUALIFICACAO,
+    LIMITE_VENCIMENTO_CRITICO, LIMITE_VENCIMENTO_ALERTA,
+)
+from contratos.utils import export_csv_or_xlsx, admin_required, is_admin
+from contratos.permanencia import calcular_radar_permanencia
+from contratos.versoes import buscar_em_cache, descartar_cache
+
+
+# Classe visual e rótulo de cada faixa anotada por Comissao.objects.com_vencimento()
+CLASSIFICACAO_VENCIMENTO = {
+    'critico': ('table-danger', 'CRÍTICO'),
+    'alerta': ('table-warning', 'ALERTA'),
+    'normal': ('table-success', 'NORMAL'),
+}
 
 
 def get_classificacao_vencimento(dias):
     """
     Função auxiliar para centralizar a regra de negócio de vencimentos.
-    Facilita a manutenção caso os prazos mudem novamente.
+    Os limites das faixas ficam em contratos.models (usados também na anotação SQL).
     """
-    if dias <= 7:
-        return 'table-danger', 'CRÍTICO'
-    elif 8 <= dias <= 15:
-        return 'table-warning', 'ALERTA'
+    if dias <= LIMITE_VENCIMENTO_CRITICO:
+        return CLASSIFICACAO_VENCIMENTO['critico']
+    elif dias <= LIMITE_VENCIMENTO_ALERTA:
+        return CLASSIFICACAO_VENCIMENTO['alerta']
     else:
-        return 'table-success', 'NORMAL'
+        return CLASSIFICACAO_VENCIMENTO['normal']
 
 
-@login_required
-def painel_controle(request):
-    hoje = date.today()
+def calcular_contexto_painel(hoje):
+    """
+    Contexto do painel de auditoria para a data informada, sem dados do usuário.
+    Tudo é avaliado aqui (listas, não querysets) para que o resultado possa ir ao cache.
+    """
     data_limite_curso = hoje - timedelta(days=DIAS_VALIDADE_QUALIFICACAO)
-    filtro_ativos = get_filtro_ativos()
-
-    # 1. MONITORAMENTO DE VENCIMENTOS (Lógica Refatorada)
-    comissoes_ativas = Comissao.objects.filter(
-        ativa=True
-    ).select_related('contrato')
-
-    lista_completa = []
-    for comissao in comissoes_ativas:
-        # Usa data_fim da comissão ou, se não existir, vigencia_fim do contrato
-        data_fim_efetiva = comissao.data_fim or (comissao.contrato.vigencia_fim if comissao.contrato else None)
-        if not data_fim_efetiva:
-            continue
-            
-        if data_fim_efetiva < hoje:
-            continue
 
-        dias_restantes = (data_fim_efetiva - hoje).days
+    # 1. MONITORAMENTO DE VENCIMENTOS (término efetivo, dias restantes e faixa calculados no banco)
+    vencimentos = Comissao.objects.filter(ativa=True).com_vencimento(hoje).filter(dias_restantes__gte=0)
 
+    # Os mais próximos de vencer
+    top_5_vencimentos = list(vencimentos.select_related('contrato').order_by('dias_restantes', 'tipo', 'pk')[:5])
+    for comissao in top_5_vencimentos:
         # Aplicação dos critérios: <=7 Crítico | 8-15 Alerta | >15 Normal
-        classe_cor, status_texto = get_classificacao_vencimento(dias_restantes)
+        comissao.classe_cor, comissao.status_texto = CLASSIFICACAO_VENCIMENTO[comissao.criticidade]
 
-        comissao.dias_restantes = dias_restantes
-        comissao.classe_cor = classe_cor
-        comissao.status_texto = status_texto
-        lista_completa.append(comissao)
-
-    # Ordena pelos mais próximos de vencer
-    lista_completa.sort(key=lambda x: x.dias_restantes)
-    top_5_vencimentos = lista_completa[:5]
-    total_vencimentos_count = len(lista_completa)
-    
     # Dados agregados para gráfico de vencimentos (serializado como JSON para evitar
     # que o locale pt-BR formate números com separador de milhar no template)
-    vencimentos_critico = sum(1 for i in lista_completa if i.dias_restantes <= 7)
-    vencimentos_alerta = sum(1 for i in lista_completa if 8 <= i.dias_restantes <= 15)
-    vencimentos_normal = sum(1 for i in lista_completa if i.dias_restantes > 15)
+    por_faixa = dict(vencimentos.order_by().values_list('criticidade').annotate(total=Count('pk')))
+    vencimentos_critico = por_faixa.get('critico', 0)
+    vencimentos_alerta = por_faixa.get('alerta', 0)
+    vencimentos_normal = por_faixa.get('normal', 0)
+    total_vencimentos_count = vencimentos_critico + vencimentos_alerta + vencimentos_normal
     vencimentos_json = mark_safe(json.dumps({
         'critico': vencimentos_critico,
         'alerta': vencimentos_alerta,
@@ -75,52 +73,7 @@ def painel_controle(request):
     }))
 
     # 2. RADAR DE PERMANÊNCIA (Cálculo de tempo de designação contínua)
-    integrantes_ativos = Integrante.objects.filter(filtro_ativos).select_related(
-        'agente', 'funcao', 'comissao__contrato'
-    )
-    radar_permanencia = []
-
-    for atual in integrantes_ativos:
-        data_inicio_real = atual.data_inicio
-        # Busca recursiva simples para encontrar a data de início real da sequência de designações no mesmo contrato e tipo de comissão
-        if atual.comissao.contrato:
-            while True:
-                dia_anterior = data_inicio_real - timedelta(days=1)
-                designacao_anterior = Integrante.objects.filter(
-                    comissao__contrato=atual.comissao.contrato,
-                    comissao__tipo=atual.comissao.tipo,
-                    agente=atual.agente,
-                    funcao=atual.funcao
-                ).filter(Q(data_fim=dia_anterior) | Q(data_desligamento=dia_anterior)).first()
-
-                if designacao_anterior:
-                    data_inicio_real = designacao_anterior.data_inicio
-                else:
-                    break
-
-        dias_totais = (hoje - data_inicio_real).days
-        anos, meses = dias_totais // 365, (dias_totais % 365) // 30
-
-        # Classificação de tempo para rodízio
-        classe_tempo = 'bg-success'
-        if dias_totais > 730:  # 2 anos
-            classe_tempo = 'bg-danger'
-        elif dias_totais > 365:  # 1 ano
-            classe_tempo = 'bg-warning text-dark'
-
-        contrato_ref = atual.comissao.contrato
-        radar_permanencia.append({
-            'agente': atual.agente,
-            'funcao': atual.funcao,
-            'contrato': contrato_ref,
-            'dias_totais': dias_totais,
-            'tempo_formatado': f"{anos}a {meses}m ({dias_totais} dias)",
-            'inicio_real': data_inicio_real,
-            'classe_tempo': classe_tempo,
-            'inicio_original': atual.data_inicio
-        })
-
-    radar_permanencia.sort(key=lambda x: (-x['dias_totais'], x['agente'].posto.senioridade, x['agente'].nome_de_guerra))
+    radar_permanencia = calcular_radar_permanencia(hoje)
     top_10_permanencia = radar_permanencia[:10]
     
     # Dados para gráfico de permanência (top 10) - serializado como JSON
@@ -131,7 +84,7 @@ def painel_controle(request):
     tem_permanencia = len(top_10_permanencia) > 0
 
     # 3. ESTATÍSTICAS DE QUALIFICAÇÃO
-    agentes_ativos_ids = Integrante.objects.filter(filtro_ativos).values_list('agente', flat=True).distinct()
+    agentes_ativos_ids = Integrante.objects.ativos(hoje).values_list('agente', flat=True).distinct()
     agentes_ativos_qs = Agente.objects.filter(id__in=agentes_ativos_ids)
     
     total_ativos = agentes_ativos_qs.count()
@@ -156,7 +109,7 @@ def painel_controle(request):
 
     # Listagem completa de contratos ativos com cálculo de dias restantes
     # (Usada para a nova tabela de monitoramento de prazos)
-    contratos_ativos_lista = Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').order_by('vigencia_fim')
+    contratos_ativos_lista = list(Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').order_by('vigencia_fim'))
     for c in contratos_ativos_lista:
         c.dias_restantes = (c.vigencia_fim - hoje).days
         if c.dias_restantes <= 90:
@@ -168,14 +121,15 @@ def painel_controle(request):
 
     # 4. SOBRECARGA DE FISCAIS E RISCOS
     # Filtra apenas as designações ativas onde o título da função é exatamente "Fiscal"
-    integrantes_fiscais = Integrante.objects.filter(filtro_ativos, funcao__titulo='Fiscal')
+    integrantes_fiscais = Integrante.objects.ativos(hoje).filter(funcao__titulo='Fiscal')
     
     # Agrupa os agentes e conta as suas atuações exclusivas como Fiscais
     fiscais_sobrecarregados = Agente.objects.filter(
         integrante__in=integrantes_fiscais
     ).annotate(
         total_atuacoes=Count('integrante', filter=Q(integrante__in=integrantes_fiscais))
-    ).filter(total_atuacoes__gt=0).order_by('-total_atuacoes', 'posto__senioridade', 'nome_de_guerra')[:10]
+    ).filter(total_atuacoes__gt=0).select_related('posto').order_by('-total_atuacoes', 'posto__senioridade', 'nome_de_guerra')[:10]
+    fiscais_sobrecarregados = list(fiscais_sobrecarregados)
     
     total_contratos_ativos = Contrato.objects.filter(vigencia_fim__gte=hoje).count()
     
@@ -194,20 +148,13 @@ def painel_controle(request):
 
     contratos_risco = Contrato.objects.filter(vigencia_fim__gte=hoje).annotate(
         fiscais_ativos=Count('comissoes__integrantes', filter=Q(comissoes__tipo='FISCALIZACAO') & Q(comissoes__ativa=True) & Q(
-            comissoes__integrantes__in=Integrante.objects.filter(filtro_ativos)))
-    ).filter(fiscais_ativos=0)
+            comissoes__integrantes__in=Integrante.objects.ativos(hoje)))
+    ).filter(fiscais_ativos=0).select_related('empresa')
+    contratos_risco = list(contratos_risco)
 
     total_contratos_ativos = Contrato.objects.filter(vigencia_fim__gte=hoje).count()
     total_agentes_atuando = Agente.objects.filter(
-        integrante__in=Integrante.objects.filter(filtro_ativos)).distinct().count()
-
-    tabela_contratos = Contrato.objects.filter(vigencia_fim__gte=hoje).prefetch_related(
-        Prefetch('comissoes', queryset=Comissao.objects.filter(ativa=True).prefetch_related(
-            Prefetch('integrantes',
-                     queryset=Integrante.objects.filter(filtro_ativos).select_related('agente', 'funcao'),
-                     to_attr='equipe_vigente')
-        ), to_attr='comissoes_ativas')
-    ).order_by('vigencia_fim')
+        integrante__in=Integrante.objects.ativos(hoje)).distinct().count()
 
     context = {
         'lista_vencimentos': top_5_vencimentos,
@@ -235,44 +182,65 @@ def painel_controle(request):
         'contratos_risco': contratos_risco,
         'total_contratos_ativos': total_contratos_ativos,
         'total_agentes_atuando': total_agentes_atuando,
-        'tabela_contratos': tabela_contratos,
         'dados_qualificacao_json': mark_safe(json.dumps(dados_qualificacao)),
     }
+    return context
+
+
+# O painel depende apenas dos dados de contratos, comissões, integrantes e agentes
+DOMINIOS_PAINEL = ['contratos']
+
+
+def _nome_cache_painel(hoje):
+    return f'painel_controle:{hoje.isoformat()}'
 
-    return render(request, 'contratos/painel_controle.html', context)
+
+@login_required
+def painel_controle(request):
+    hoje = date.today()
+
+    inicio = time.perf_counter()
+    context, acerto = buscar_em_cache(_nome_cache_painel(hoje), DOMINIOS_PAINEL, lambda: calcular_contexto_painel(hoje))
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    context = dict(context, pode_recalcular=is_admin(request.user))
+    response = render(request, 'contratos/painel_controle.html', context)
+    response['X-Painel-Cache'] = 'HIT' if acerto else 'MISS'
+    if not acerto:
+        response['X-Painel-Tempo-Ms'] = f"{duracao_ms:.0f}"
+    return response
+
+
+@admin_required
+@require_POST
+def recalcular_painel(request):
+    """Descarta o painel guardado em cache; a próxima visita o recalcula."""
+    descartar_cache(_nome_cache_painel(date.today()), DOMINIOS_PAINEL)
+    messages.success(request, "Painel recalculado com os dados atuais.")
+    return redirect('painel_controle')
 
 
 @login_required
 def exportar_vencimentos_csv(request):
     headers = ['Contrato', 'Empresa', 'Comissão', 'Término Previsto', 'Status', 'Dias Restantes']
-    data = []
 
-    hoje = date.today()
-    comissoes = Comissao.objects.filter(
-        ativa=True
-    ).select_related('contrato')
-
-    lista_export = []
-    for comissao in comissoes:
-        data_fim_efetiva = comissao.data_fim or (comissao.contrato.vigencia_fim if comissao.contrato else None)
-        if not data_fim_efetiva:
-            continue
-            
-        dias = (data_fim_efetiva - hoje).days
-        _, status = get_classificacao_vencimento(dias)
-        lista_export.append((dias, status, comissao, data_fim_efetiva))
-
-    lista_export.sort(key=lambda x: x[0])
-    for dias, status, comissao, data_fim_efetiva in lista_export:
-        data.append([
-            comissao.contrato.numero if comissao.contrato else comissao.get_tipo_display(),
-            comissao.contrato.empresa.razao_social if comissao.contrato else (comissao.descricao_objeto or '-'),
-            comissao.get_tipo_display(),
-            data_fim_efetiva.strftime('%d/%m/%Y'),
-            status,
-            dias
-        ])
-    
+    comissoes = Comissao.objects.filter(ativa=True).com_vencimento().select_related(
+        'contrato', 'contrato__empresa'
+    ).order_by('dias_restantes', 'tipo', 'pk')
+
+    def linhas():
+        for comissao in comissoes.iterator(chunk_size=500):
+            _, status = CLASSIFICACAO_VENCIMENTO[comissao.criticidade]
+            yield [
+                comissao.contrato.numero if comissao.contrato else comissao.get_tipo_display(),
+                comissao.contrato.empresa.razao_social if comissao.contrato else (comissao.descricao_objeto or '-'),
+                comissao.get_tipo_display(),
+                comissao.data_fim_efetiva,
+                status,
+                comissao.dias_restantes
+            ]
+
+    data = linhas()
     return export_csv_or_xlsx(request, 'monitoramento_vencimentos', headers, data)
 
 
@@ -284,34 +252,38 @@ def exportar_csv(request):
         'Militar', 'SARAM', 'Início Designação', 'Término Previsto',
         'Nº Portaria', 'Data Portaria', 'Nº Boletim', 'Data Boletim'
     ]
-    data = []
 
     hoje = date.today()
-    contratos = Contrato.objects.filter(vigencia_fim__gte=hoje)
-    filtro_ativo = get_filtro_ativos()
-
-    for contrato in contratos:
-        comissoes = contrato.comissoes.filter(ativa=True)
-        if comissoes.exists():
-            for com in comissoes:
-                for integrante in com.integrantes.filter(filtro_ativo):
-                    inicio = integrante.data_inicio.strftime('%d/%m/%Y') if integrante.data_inicio else "-"
-                    fim = integrante.data_fim.strftime('%d/%m/%Y') if integrante.data_fim else "Ativa"
-                    data_port = integrante.portaria_data.strftime('%d/%m/%Y') if integrante.portaria_data else "-"
-                    data_bol = integrante.boletim_data.strftime('%d/%m/%Y') if integrante.boletim_data else "-"
-                    data.append([
-                        contrato.numero, contrato.empresa.razao_social, contrato.vigencia_fim.strftime('%d/%m/%Y'),
-                        com.get_tipo_display(), integrante.funcao.titulo, integrante.agente.nome_de_guerra,
-                        integrante.agente.saram, inicio, fim, integrante.portaria_numero, data_port,
-                        integrante.boletim_numero, data_bol
-                    ])
-        else:
-            data.append([
-                                contrato.numero, contrato.empresa.razao_social,
-                                contrato.vigencia_fim.strftime('%d/%m/%Y'),
-                                "SEM COMISSÃO"
-                            ] + ["-"] * 9)
-    
+    contratos = Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').prefetch_related(
+        Prefetch(
+            'comissoes',
+            queryset=Comissao.objects.filter(ativa=True).prefetch_related(
+                Prefetch('integrantes', queryset=Integrante.objects.ativos(hoje).select_related('agente', 'funcao'))
+            ),
+            to_attr='comissoes_vigentes'
+        )
+    )
+
+    def linhas():
+        for contrato in contratos.iterator(chunk_size=500):
+            if contrato.comissoes_vigentes:
+                for com in contrato.comissoes_vigentes:
+                    for integrante in com.integrantes.all():
+                        yield [
+                            contrato.numero, contrato.empresa.razao_social, contrato.vigencia_fim,
+                            com.get_tipo_display(), integrante.funcao.titulo, integrante.agente.nome_de_guerra,
+                            integrante.agente.saram, integrante.data_inicio or "-", integrante.data_fim or "Ativa",
+                            integrante.portaria_numero, integrante.portaria_data or "-",
+                            integrante.boletim_numero, integrante.boletim_data or "-"
+                        ]
+            else:
+                yield [
+                    contrato.numero, contrato.empresa.razao_social,
+                    contrato.vigencia_fim,
+                    "SEM COMISSÃO"
+                ] + ["-"] * 9
+
+    data = linhas()
     return export_csv_or_xlsx(request, 'auditoria_completa', headers, data)
 
 
@@ -339,36 +311,35 @@ def relatorio_por_periodo(request):
 @login_required
 def exportar_qualificacao_csv(request):
     headers = ['Militar', 'SARAM', 'Função', 'Contrato', 'Data Último Curso', 'Validade', 'Situação']
-    data = []
 
     hoje = date.today()
     data_limite_curso = hoje - timedelta(days=DIAS_VALIDADE_QUALIFICACAO)
-    equipe_ativa = Integrante.objects.filter(get_filtro_ativos()).select_related(
+    equipe_ativa = Integrante.objects.ativos(hoje).select_related(
         'agente', 'agente__posto', 'posto_graduacao', 'funcao', 'comissao__contrato'
     ).order_by('agente__nome_de_guerra')
 
-    for item in equipe_ativa:
-        dt_curso = item.agente.data_ultimo_curso
-        situacao, validade_fmt = "EM DIA", "-"
-        if not dt_curso:
-            situacao, dt_fmt = "SEM CURSO (IRREGULAR)", "Não Realizado"
-        elif dt_curso < data_limite_curso:
-            situacao = "VENCIDO (IRREGULAR)"
-            dt_fmt = dt_curso.strftime('%d/%m/%Y')
-            validade_fmt = (dt_curso + timedelta(days=DIAS_VALIDADE_QUALIFICACAO)).strftime('%d/%m/%Y')
-        else:
-            dt_fmt = dt_curso.strftime('%d/%m/%Y')
-            validade_fmt = (dt_curso + timedelta(days=DIAS_VALIDADE_QUALIFICACAO)).strftime('%d/%m/%Y')
-
-        posto = item.posto_graduacao.sigla if item.posto_graduacao else item.agente.posto.sigla
-        nome_completo = f"{posto} {item.agente.nome_de_guerra}"
-
-        data.append([
-            nome_completo, item.agente.saram, item.funcao.titulo,
-            item.comissao.contrato.numero if item.comissao.contrato else item.comissao.get_tipo_display(),
-            dt_fmt, validade_fmt, situacao
-        ])
-        
+    def linhas():
+        for item in equipe_ativa.iterator(chunk_size=2000):
+            dt_curso = item.agente.data_ultimo_curso
+            situacao, validade = "EM DIA", "-"
+            if not dt_curso:
+                situacao, dt_curso = "SEM CURSO (IRREGULAR)", "Não Realizado"
+            elif dt_curso < data_limite_curso:
+                situacao = "VENCIDO (IRREGULAR)"
+                validade = dt_curso + timedelta(days=DIAS_VALIDADE_QUALIFICACAO)
+            else:
+                validade = dt_curso + timedelta(days=DIAS_VALIDADE_QUALIFICACAO)
+
+            posto = item.posto_graduacao.sigla if item.posto_graduacao else item.agente.posto.sigla
+            nome_completo = f"{posto} {item.agente.nome_de_guerra}"
+
+            yield [
+                nome_completo, item.agente.saram, item.funcao.titulo,
+                item.comissao.contrato.numero if item.comissao.contrato else item.comissao.get_tipo_display(),
+                dt_curso, validade, situacao
+            ]
+
+    data = linhas()
     return export_csv_or_xlsx(request, 'relatorio_qualificacao_agentes', headers, data)
 
 
@@ -381,22 +352,20 @@ def exportar_relatorio_periodo_csv(request):
         'Contrato', 'Tipo Comissão', 'Empresa', 'Militar', 'SARAM', 'CPF', 'Função',
         'Início', 'Término (Previsão)', 'Nº Portaria', 'Data Portaria', 'Nº Boletim', 'Data Boletim'
     ]
-    data = []
-    
-    if data_inicial and data_final:
+
+    def linhas():
+        if not (data_inicial and data_final):
+            return
         dt_ini = parse_date(data_inicial)
         dt_fim = parse_date(data_final)
         resultados = Integrante.objects.filter(data_inicio__lte=dt_fim).filter(
             Q(data_fim__gte=dt_ini) | Q(data_fim__isnull=True)).filter(
             Q(data_desligamento__gte=dt_ini) | Q(data_desligamento__isnull=True)).select_related(
-            'agente', 'funcao', 'comissao__contrato'
+            'agente', 'agente__posto', 'posto_graduacao', 'funcao', 'comissao__contrato', 'comissao__contrato__empresa'
         )
-        for r in resultados:
-            fim_fmt = r.data_fim.strftime('%d/%m/%Y') if r.data_fim else "-"
-            data_port = r.portaria_data.strftime('%d/%m/%Y') if r.portaria_data else "-"
+        for r in resultados.iterator(chunk_size=2000):
             bol_num = r.boletim_numero if r.boletim_numero else "-"
-            bol_data = r.boletim_data.strftime('%d/%m/%Y') if r.boletim_data else "-"
-            
+
             posto = r.posto_graduacao.sigla if r.posto_graduacao else r.agente.posto.sigla
             nome_completo = f"{posto} {r.agente.nome_de_guerra}"
             
@@ -409,13 +378,14 @@ def exportar_relatorio_periodo_csv(request):
                 contrato_numero = tipo_label
                 empresa_nome = (r.comissao.descricao_objeto or '-')[:50]
 
-            data.append([
+            yield [
                 contrato_numero, tipo_label, empresa_nome,
                 nome_completo, r.agente.saram, r.agente.cpf or '-', r.funcao.titulo,
-                r.data_inicio.strftime('%d/%m/%Y'), fim_fmt, 
-                r.portaria_numero, data_port, bol_num, bol_data
-            ])
-            
+                r.data_inicio, r.data_fim or "-",
+                r.portaria_numero, r.portaria_data or "-", bol_num, r.boletim_data or "-"
+            ]
+
+    data = linhas()
     nome_arquivo = f"relatorio_agentes_{data_inicial}_a_{data_final}"
     return export_csv_or_xlsx(request, nome_arquivo, headers, data)
     
@@ -423,104 +393,67 @@ def exportar_relatorio_periodo_csv(request):
 @login_required
 def exportar_radar_permanencia_csv(request):
     headers = ['Militar', 'Função', 'Contrato', 'Dias Totais', 'Tempo Formatado', 'Início Real']
-    data = []
-    
-    hoje = date.today()
-    filtro_ativos = get_filtro_ativos()
     
-    integrantes_ativos = Integrante.objects.filter(filtro_ativos).select_related(
-        'agente', 'funcao', 'comissao__contrato'
-    )
-    
-    radar_permanencia = []
-    
-    for atual in integrantes_ativos:
-        data_inicio_real = atual.data_inicio
-        while True:
-            dia_anterior = data_inicio_real - timedelta(days=1)
-            designacao_anterior = Integrante.objects.filter(
-                comissao__contrato=atual.comissao.contrato,
-                comissao__tipo=atual.comissao.tipo,
-                agente=atual.agente,
-                funcao=atual.funcao
-            ).filter(Q(data_fim=dia_anterior) | Q(data_desligamento=dia_anterior)).first()
-
-            if designacao_anterior:
-                data_inicio_real = designacao_anterior.data_inicio
-            else:
-                break
-
-        dias_totais = (hoje - data_inicio_real).days
-        anos, meses = dias_totais // 365, (dias_totais % 365) // 30
-        
-        radar_permanencia.append({
-            'agente': atual.agente,
-            'funcao': atual.funcao,
-            'contrato': atual.comissao.contrato,
-            'dias_totais': dias_totais,
-            'tempo_formatado': f"{anos}a {meses}m ({dias_totais} dias)",
-            'inicio_real': data_inicio_real,
-        })
-        
-    radar_permanencia.sort(key=lambda x: (-x['dias_totais'], x['agente'].posto.senioridade, x['agente'].nome_de_guerra))
-    
-    for item in radar_permanencia:
-        data.append([
+    radar_permanencia = calcular_radar_permanencia()
+
+    data = (
+        [
             f"{item['agente'].posto.sigla} {item['agente'].nome_de_guerra}",
             item['funcao'].titulo,
             item['contrato'].numero if item['contrato'] else '-',
             item['dias_totais'],
             item['tempo_formatado'],
-            item['inicio_real'].strftime('%d/%m/%Y')
-        ])
-        
+            item['inicio_real']
+        ]
+        for item in radar_permanencia
+    )
     return export_csv_or_xlsx(request, 'radar_permanencia', headers, data)
 
 
 @login_required
 def exportar_sobrecarga_fiscais_csv(request):
     headers = ['Militar (Fiscal)', 'SARAM', 'Quantidade de Contratos Fiscalizados']
-    data = []
     
-    filtro_ativos = get_filtro_ativos()
-    integrantes_fiscais = Integrante.objects.filter(filtro_ativos, funcao__titulo='Fiscal')
+    integrantes_fiscais = Integrante.objects.ativos().filter(funcao__titulo='Fiscal')
     
     fiscais_sobrecarregados = Agente.objects.filter(
         integrante__in=integrantes_fiscais
     ).annotate(
         total_atuacoes=Count('integrante', filter=Q(integrante__in=integrantes_fiscais))
-    ).filter(total_atuacoes__gt=0).order_by('-total_atuacoes', 'posto__senioridade', 'nome_de_guerra')
-    
-    for agente in fiscais_sobrecarregados:
-        data.append([
+    ).filter(total_atuacoes__gt=0).select_related('posto').order_by('-total_atuacoes', 'posto__senioridade', 'nome_de_guerra')
+
+    data = (
+        [
             f"{agente.posto.sigla} {agente.nome_de_guerra}",
             agente.saram,
             agente.total_atuacoes
-        ])
-        
+        ]
+        for agente in fiscais_sobrecarregados.iterator(chunk_size=2000)
+    )
     return export_csv_or_xlsx(request, 'sobrecarga_fiscais', headers, data)
 @login_required
 def exportar_contratos_vencimento_csv(request):
     headers = ['Contrato', 'Empresa', 'Vencimento', 'Dias Restantes', 'Situação']
-    data = []
-    
+
     hoje = date.today()
     contratos = Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').order_by('vigencia_fim')
-    
-    for c in contratos:
-        dias = (c.vigencia_fim - hoje).days
-        situacao = "NORMAL"
-        if dias <= 90:
-            situacao = "CRÍTICO"
-        elif dias <= 120:
-            situacao = "ALERTA"
-            
-        data.append([
-            c.numero,
-            c.empresa.razao_social,
-            c.vigencia_fim.strftime('%d/%m/%Y'),
-            dias,
-            situacao
-        ])
-        
+
+    def linhas():
+        for c in contratos.iterator(chunk_size=2000):
+            dias = (c.vigencia_fim - hoje).days
+            situacao = "NORMAL"
+            if dias <= 90:
+                situacao = "CRÍTICO"
+            elif dias <= 120:
+                situacao = "ALERTA"
+
+            yield [
+                c.numero,
+                c.empresa.razao_social,
+                c.vigencia_fim,
+                dias,
+                situacao
+            ]
+
+    data = linhas()
     return export_csv_or_xlsx(request, 'vencimento_contratos', headers, data)
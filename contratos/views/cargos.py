@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 import json
 
+from contratos import versoes
 from contratos.models import Setor, CargoRegimental
 from contratos.forms import SetorForm, CargoRegimentalForm
 from contratos.utils import is_admin, is_auditor
@@ -141,7 +142,8 @@ def reordenar_setores(request):
         
         for index, setor_id in enumerate(setor_ids):
             Setor.objects.filter(id=setor_id).update(ordem=index)
-            
+        versoes.incrementar('setores')
+
         return JsonResponse({'status': 'success'})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
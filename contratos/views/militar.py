@@ -3,25 +3,20 @@ import urllib.parse
 from datetime import date
 from django.http import HttpResponse
 from django.shortcuts import render
-from django.db.models import Q
+from contratos.busca import resolver_agentes
 from contratos.models import Integrante
-from contratos.utils import get_filtro_ativos, export_csv_or_xlsx
+from contratos.utils import export_csv_or_xlsx
 
 
 def consulta_militar(request):
     query = request.GET.get('q')
     integrantes_ativos = []
+    agentes_ids = []
     hoje = date.today()
 
     if query:
-        base_qs = Integrante.objects.filter(
-            Q(agente__saram=query) |
-            Q(agente__nome_de_guerra__icontains=query) |
-            Q(agente__nome_completo__icontains=query)
-        )
-        filtro_ativo = get_filtro_ativos()
-
-        integrantes_ativos = base_qs.filter(filtro_ativo).select_related(
+        agentes_ids = resolver_agentes(query)
+        integrantes_ativos = Integrante.objects.filter(agente_id__in=agentes_ids).ativos(hoje).select_related(
             'comissao__contrato',
             'comissao__contrato__empresa',
             'funcao',
@@ -33,31 +28,36 @@ def consulta_militar(request):
     return render(request, 'contratos/militar.html', {
         'integrantes': integrantes_ativos,
         'query': query,
+        'agentes': ','.join(map(str, agentes_ids)),
         'hoje': hoje
     })
 
 
+def _agentes_da_exportacao(request, query):
+    """Ids resolvidos pela consulta (parâmetro 'agentes') ou, na falta deles, resolvidos agora a partir de q."""
+    agentes = request.GET.get('agentes', '')
+    if agentes:
+        ids = [int(pk) for pk in agentes.split(',') if pk.strip().isdigit()]
+        if ids:
+            return ids
+    return resolver_agentes(query)
+
+
 def exportar_historico_militar_csv(request):
     query = request.GET.get('q')
     headers = [
         'Militar', 'SARAM', 'Status', 'Contrato', 'Objeto',
         'Função', 'Início', 'Fim Previsto', 'Fim Efetivo (Desligamento)', 'Motivo Saída', 'Portaria'
     ]
-    data = []
-
-    if query:
+    def linhas():
+        if not query:
+            return
         historico_completo = Integrante.objects.filter(
-            Q(agente__saram=query) |
-            Q(agente__nome_de_guerra__icontains=query) |
-            Q(agente__nome_completo__icontains=query)
-        ).select_related('agente', 'funcao', 'comissao__contrato').order_by('-data_inicio')
+            agente_id__in=_agentes_da_exportacao(request, query)
+        ).com_status().select_related('agente', 'funcao', 'comissao__contrato').order_by('-data_inicio')
 
-        for item in historico_completo:
+        for item in historico_completo.iterator(chunk_size=2000):
             status = "ATIVO" if item.is_ativo else "ENCERRADO"
-
-            inicio = item.data_inicio.strftime('%d/%m/%Y') if item.data_inicio else "-"
-            fim_prev = item.data_fim.strftime('%d/%m/%Y') if item.data_fim else "Indefinido"
-            fim_real = item.data_desligamento.strftime('%d/%m/%Y') if item.data_desligamento else "-"
             motivo = item.motivo_desligamento if item.motivo_desligamento else "-"
 
             if item.comissao.contrato:
@@ -67,18 +67,20 @@ def exportar_historico_militar_csv(request):
                 contrato_numero = item.comissao.get_tipo_display()
                 contrato_objeto = (item.comissao.descricao_objeto or '-')[:50]
 
-            data.append([
+            yield [
                 item.agente.nome_de_guerra,
                 item.agente.saram,
                 status,
                 contrato_numero,
                 contrato_objeto,
                 item.funcao.titulo,
-                inicio,
-                fim_prev,
-                fim_real,
+                item.data_inicio or "-",
+                item.data_fim or "Indefinido",
+                item.data_desligamento or "-",
                 motivo,
                 item.portaria_numero
-            ])
+            ]
+
+    data = linhas()
 
     return export_csv_or_xlsx(request, 'historico_comissoes', headers, data)
\ No newline at end of file
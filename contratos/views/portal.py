@@ -1,11 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from contratos.utils import admin_required, auditor_required, export_csv_or_xlsx
+from contratos.contadores import contadores_portal
+from contratos import agendador, versoes
+from contratos.listagem import montar_listagem, serializar_listagem, OPCOES_POR_PAGINA
 from django.contrib import messages
 from django.contrib import messages
 from django.urls import reverse
+from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.db.models import Prefetch, Case, When, Value, IntegerField
-from ..models import Empresa, Contrato, Agente, Integrante, Comissao, Funcao, ConfiguracaoSistema, CargoRegimental
+from ..models import Empresa, Contrato, Agente, Integrante, Comissao, Funcao, ConfiguracaoSistema, ExecucaoTarefa
 from ..forms import EmpresaForm, ContratoForm, AgenteForm, IntegranteForm, ComissaoForm, ConfiguracaoSistemaForm
 
 
@@ -16,15 +21,7 @@ def _get_integrantes_ordenados():
 @auditor_required
 def portal_home(request):
     """Tela inicial do Portal do Lançador"""
-    context = {
-        'total_empresas': Empresa.objects.count(),
-        'total_contratos': Contrato.objects.count(),
-        'total_agentes': Agente.objects.count(),
-        'total_integrantes': Integrante.objects.count(),
-        'total_comissoes': Comissao.objects.count(),
-        'total_cargos': CargoRegimental.objects.count(),
-    }
-    return render(request, 'contratos/portal/home.html', context)
+    return render(request, 'contratos/portal/home.html', contadores_portal())
 
 @login_required
 def manual_usuario(request):
@@ -34,15 +31,24 @@ def manual_usuario(request):
 # --- GENERIC CRUD HELPERS ---
 
 def generico_listar(request, model, template_name, titulo, url_novo, url_editar, fields_display, url_exportar=None, arquivo_exportacao=None):
-    items = model.objects.all()
+    """
+    Lista paginada, ordenável e filtrável no servidor (contratos.listagem); ?formato=json
+    devolve a mesma página em JSON para tabelas montadas no cliente.
+    """
+    listagem = montar_listagem(model, fields_display, request.GET)
+    if request.GET.get('formato') == 'json':
+        return JsonResponse(serializar_listagem(listagem))
+
     context = {
-        'items': items,
+        'items': listagem['pagina'].object_list,
         'titulo': titulo,
         'url_novo': url_novo,
         'url_editar': url_editar,
         'url_exportar': url_exportar,
         'arquivo_exportacao': arquivo_exportacao,
-        'fields': fields_display # Lista de tuplas (atributo, label)
+        'fields': fields_display, # Lista de tuplas (atributo, label)
+        'opcoes_por_pagina': OPCOES_POR_PAGINA,
+        **listagem,
     }
     return render(request, template_name, context)
 
@@ -80,9 +86,10 @@ def listar_empresas(request):
 @auditor_required
 def exportar_empresas_csv(request):
     headers = ['Razão Social', 'Nome Fantasia', 'CNPJ']
-    data = []
-    for empresa in Empresa.objects.all():
-        data.append([empresa.razao_social, empresa.nome_fantasia or '', empresa.cnpj])
+    data = (
+        [empresa.razao_social, empresa.nome_fantasia or '', empresa.cnpj]
+        for empresa in Empresa.objects.all().iterator(chunk_size=2000)
+    )
     return export_csv_or_xlsx(request, 'empresas', headers, data)
 
 @admin_required
@@ -101,7 +108,7 @@ def listar_contratos(request):
     return generico_listar(
         request, Contrato, 'contratos/portal/lista_generica.html', 'Contratos', 
         'novo_contrato', 'editar_contrato',
-        [('numero', 'Número'), ('pag', 'PAG'), ('tipo', 'Tipo'), ('empresa', 'Empresa'), ('cnpj', 'CNPJ'), ('objeto', 'Objeto'), ('vigencia_fim', 'Vigência')],
+        [('numero', 'Número'), ('pag', 'PAG'), ('tipo', 'Tipo'), ('empresa__razao_social', 'Empresa'), ('empresa__cnpj', 'CNPJ'), ('objeto', 'Objeto'), ('vigencia_fim', 'Vigência')],
         url_exportar='exportar_contratos_csv',
         arquivo_exportacao='contratos.csv'
     )
@@ -109,18 +116,19 @@ def listar_contratos(request):
 @auditor_required
 def exportar_contratos_csv(request):
     headers = ['Número', 'PAG', 'Objeto', 'Empresa', 'CNPJ', 'Início Vigência', 'Fim Vigência', 'Valor Total']
-    data = []
-    for contrato in Contrato.objects.select_related('empresa').all():
-        data.append([
+    data = (
+        [
             contrato.numero, 
             contrato.pag if contrato.pag else '',
             contrato.objeto, 
             contrato.empresa.razao_social, 
             contrato.empresa.cnpj, 
-            contrato.vigencia_inicio.strftime('%d/%m/%Y'), 
-            contrato.vigencia_fim.strftime('%d/%m/%Y'),
-            str(contrato.valor_total).replace('.', ',')
-        ])
+            contrato.vigencia_inicio,
+            contrato.vigencia_fim,
+            contrato.valor_total
+        ]
+        for contrato in Contrato.objects.select_related('empresa').all().iterator(chunk_size=2000)
+    )
     return export_csv_or_xlsx(request, 'contratos', headers, data)
 
 @auditor_required
@@ -167,17 +175,18 @@ def listar_agentes(request):
 @auditor_required
 def exportar_agentes_csv(request):
     headers = ['Posto', 'Nome de Guerra', 'Nome Completo', 'SARAM', 'CPF', 'E-mail', 'Data Último Curso']
-    data = []
-    for agente in Agente.objects.select_related('posto').all():
-        data.append([
+    data = (
+        [
             agente.posto.sigla, 
             agente.nome_de_guerra, 
             agente.nome_completo, 
             agente.saram,
             agente.cpf if agente.cpf else '',
             agente.email if agente.email else '',
-            agente.data_ultimo_curso.strftime('%d/%m/%Y') if agente.data_ultimo_curso else ''
-        ])
+            agente.data_ultimo_curso or ''
+        ]
+        for agente in Agente.objects.select_related('posto').all().iterator(chunk_size=2000)
+    )
     return export_csv_or_xlsx(request, 'agentes', headers, data)
 
 @admin_required
@@ -206,9 +215,8 @@ def listar_comissoes(request):
 @auditor_required
 def exportar_comissoes_csv(request):
     headers = ['Nº', 'Categoria', 'Descrição/Objeto', 'Contrato', 'Empresa', 'Tipo', 'Ativa', 'Portaria Nº', 'Portaria Data', 'Boletim Nº', 'Boletim Data', 'Início', 'Fim']
-    data = []
-    for comissao in Comissao.objects.select_related('contrato__empresa').all():
-        data.append([
+    data = (
+        [
             comissao.id,
             comissao.get_categoria_display(),
             comissao.descricao_objeto or '',
@@ -217,12 +225,14 @@ def exportar_comissoes_csv(request):
             comissao.get_tipo_display(),
             'Sim' if comissao.ativa else 'Não',
             comissao.portaria_numero or '',
-            comissao.portaria_data.strftime('%d/%m/%Y') if comissao.portaria_data else '',
+            comissao.portaria_data or '',
             comissao.boletim_numero or '',
-            comissao.boletim_data.strftime('%d/%m/%Y') if comissao.boletim_data else '',
-            comissao.data_inicio.strftime('%d/%m/%Y') if comissao.data_inicio else '',
-            comissao.data_fim.strftime('%d/%m/%Y') if comissao.data_fim else ''
-        ])
+            comissao.boletim_data or '',
+            comissao.data_inicio or '',
+            comissao.data_fim or ''
+        ]
+        for comissao in Comissao.objects.select_related('contrato__empresa').all().iterator(chunk_size=2000)
+    )
     return export_csv_or_xlsx(request, 'comissoes', headers, data)
 
 @admin_required
@@ -388,7 +398,9 @@ def reordenar_integrantes(request):
             for index, integrante_id in enumerate(lista_ids):
                 # Usar update para ser mais rápido e evitar sinais desnecessários se houver
                 Integrante.objects.filter(pk=integrante_id).update(ordem=index + 1)
-                
+            # update() não dispara os sinais: invalida os resultados em cache que dependem da ordem
+            versoes.incrementar('contratos')
+
             return JsonResponse({'status': 'success'})
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
@@ -425,3 +437,33 @@ def configuracoes_sistema(request):
         'form': form,
         'titulo': 'Configurações do Sistema'
     })
+
+
+EXECUCOES_POR_PAGINA = 30
+
+
+@login_required
+def historico_agendador(request):
+    """Tarefas do agendador (comando scheduler) com a última execução e o histórico paginado."""
+    if not request.user.is_superuser:
+        messages.error(request, 'Acesso negado. Apenas superusuários podem acessar o histórico do agendador.')
+        return redirect('painel_controle')
+
+    ultimas = agendador.ultimas_execucoes()
+    tarefas = [
+        {'tarefa': tarefa, 'ultima': ultimas[tarefa.nome], 'proximo': tarefa.proximo_horario()}
+        for tarefa in agendador.TAREFAS
+    ]
+
+    filtro = request.GET.get('tarefa', '')
+    execucoes = ExecucaoTarefa.objects.all()
+    if filtro:
+        execucoes = execucoes.filter(tarefa=filtro)
+    pagina = Paginator(execucoes, EXECUCOES_POR_PAGINA).get_page(request.GET.get('pagina'))
+
+    return render(request, 'contratos/portal/agendador.html', {
+        'titulo': 'Agendador de Tarefas',
+        'tarefas': tarefas,
+        'filtro': filtro,
+        'pagina': pagina,
+    })
@@ -5,17 +5,20 @@ from django.urls import reverse
 from urllib.parse import urlencode
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Count, Max, Q, Prefetch
-from django.http import HttpResponse, Http404, JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.views.decorators.http import require_POST
 import json
 from django.conf import settings
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils import timezone
 
-from contratos.models import Contrato, PrestacaoContas, Comissao, Integrante, Agente, CalendarioPrestacao, ApontamentoCorrecao, Setor, PrestacaoContasSetor, ApontamentoCorrecaoSetor, SlideApresentacao
+from contratos import versoes
+from contratos.models import Contrato, PrestacaoContas, Comissao, Integrante, Agente, CalendarioPrestacao, ApontamentoCorrecao, Setor, PrestacaoContasSetor, ApontamentoCorrecaoSetor, SlideApresentacao, TarefaConsolidacao
 from contratos.forms import PrestacaoContasUploadForm, PrestacaoContasSetorUploadForm
-from contratos.utils import admin_required, auditor_required, export_csv_or_xlsx, get_filtro_ativos, is_admin, is_auditor
+from contratos.consolidacao import itens_consolidacao, obter_pdf_consolidado, aplicar_cabecalhos_metricas, nome_arquivo_consolidado, caminho_pdf_tarefa
+from contratos.utils import admin_required, auditor_required, export_csv_or_xlsx, is_admin, is_auditor, servir_arquivo_protegido
 
 def portal_prestacao_index(request):
     """Landing page do Portal Público de Prestações."""
@@ -62,25 +65,26 @@ def upload_prestacao_setor(request, setor_id):
             mes = form.cleaned_data['mes_referencia']
             ano = form.cleaned_data['ano_referencia']
             
-            existente = PrestacaoContasSetor.objects.filter(
-                setor=setor, mes_referencia=mes, ano_referencia=ano
-            ).order_by('-data_envio').first()
-            
-            if existente and existente.status == 'pendente':
-                existente.arquivo = form.cleaned_data.get('arquivo')
-                existente.agente = form.cleaned_data.get('agente')
-                existente.observacao = form.cleaned_data.get('observacao', '')
-                existente.status = 'entregue'
-                from django.utils import timezone
-                existente.data_envio = timezone.now()
-                existente.save()
-            else:
-                prestacao = form.save(commit=False)
-                prestacao.setor = setor
-                prestacao.status = 'entregue'
-                if existente:
-                    prestacao.compor_apresentacao = existente.compor_apresentacao
-                prestacao.save()
+            # O envio e o ponteiro de "última prestação" são gravados na mesma transação
+            with transaction.atomic():
+                existente = PrestacaoContasSetor.objects.filter(
+                    setor=setor, mes_referencia=mes, ano_referencia=ano
+                ).order_by('-data_envio').first()
+                
+                if existente and existente.status == 'pendente':
+                    existente.arquivo = form.cleaned_data.get('arquivo')
+                    existente.agente = form.cleaned_data.get('agente')
+                    existente.observacao = form.cleaned_data.get('observacao', '')
+                    existente.status = 'entregue'
+                    existente.data_envio = timezone.now()
+                    existente.save()
+                else:
+                    prestacao = form.save(commit=False)
+                    prestacao.setor = setor
+                    prestacao.status = 'entregue'
+                    if existente:
+                        prestacao.compor_apresentacao = existente.compor_apresentacao
+                    prestacao.save()
             
             if is_ajax:
                 return JsonResponse({'success': True, 'message': 'Prestação de contas recebida com sucesso!'})
@@ -131,25 +135,26 @@ def upload_prestacao(request, contrato_id):
             mes = form.cleaned_data['mes_referencia']
             ano = form.cleaned_data['ano_referencia']
             
-            existente = PrestacaoContas.objects.filter(
-                contrato=contrato, mes_referencia=mes, ano_referencia=ano
-            ).order_by('-data_envio').first()
-            
-            if existente and existente.status == 'pendente':
-                existente.arquivo = form.cleaned_data.get('arquivo')
-                existente.agente = form.cleaned_data.get('agente')
-                existente.observacao = form.cleaned_data.get('observacao', '')
-                existente.status = 'entregue'
-                from django.utils import timezone
-                existente.data_envio = timezone.now()
-                existente.save()
-            else:
-                prestacao = form.save(commit=False)
-                prestacao.contrato = contrato
-                prestacao.status = 'entregue'
-                if existente:
-                    prestacao.compor_apresentacao = existente.compor_apresentacao
-                prestacao.save()
+            # O envio e o ponteiro de "última prestação" são gravados na mesma transação
+            with transaction.atomic():
+                existente = PrestacaoContas.objects.filter(
+                    contrato=contrato, mes_referencia=mes, ano_referencia=ano
+                ).order_by('-data_envio').first()
+                
+                if existente and existente.status == 'pendente':
+                    existente.arquivo = form.cleaned_data.get('arquivo')
+                    existente.agente = form.cleaned_data.get('agente')
+                    existente.observacao = form.cleaned_data.get('observacao', '')
+                    existente.status = 'entregue'
+                    existente.data_envio = timezone.now()
+                    existente.save()
+                else:
+                    prestacao = form.save(commit=False)
+                    prestacao.contrato = contrato
+                    prestacao.status = 'entregue'
+                    if existente:
+                        prestacao.compor_apresentacao = existente.compor_apresentacao
+                    prestacao.save()
             
             if is_ajax:
                 return JsonResponse({'success': True, 'message': 'Prestação de contas recebida com sucesso!'})
@@ -188,9 +193,35 @@ def upload_prestacao(request, contrato_id):
     return render(request, 'contratos/prestacao/upload_contrato.html', context)
 
 
+def _ultimas_prestacoes(ano, mes):
+    """Envio mais recente de cada contrato no mês/ano (join com o ponteiro materializado UltimaPrestacao)."""
+    return PrestacaoContas.objects.filter(ponteiro__ano_referencia=ano, ponteiro__mes_referencia=mes)
+
+
+def _ultimas_prestacoes_setor(ano, mes):
+    """Envio mais recente de cada setor no mês/ano (join com o ponteiro materializado UltimaPrestacaoSetor)."""
+    return PrestacaoContasSetor.objects.filter(ponteiro__ano_referencia=ano, ponteiro__mes_referencia=mes)
+
+
+STATUS_CONTABILIZADOS = ('ok', 'entregue', 'correcao')
+STATUS_PRIORITARIOS = ('ok', 'entregue', 'correcao', 'pendente')
+
+
+def _agregar_status(prestacoes):
+    """
+    Conta os status e as prioridades de apresentação das prestações informadas
+    em uma única consulta agregada (COUNT com FILTER), no lugar de um COUNT por status.
+    """
+    contadores = {}
+    for status in STATUS_CONTABILIZADOS:
+        contadores[status] = Count('id', filter=Q(status=status))
+    for status in STATUS_PRIORITARIOS:
+        contadores[f'prio_{status}'] = Count('id', filter=Q(status=status, compor_apresentacao=True))
+    return prestacoes.aggregate(**contadores)
+
+
 def _get_dashboard_stats(ano, mes):
     """Retorna as estatísticas do dashboard consolidadas para um dado mês/ano."""
-    from datetime import date
     hoje = date.today()
     
     contratos_vigentes = Contrato.objects.filter(
@@ -199,25 +230,19 @@ def _get_dashboard_stats(ano, mes):
     )
     total_contratos = contratos_vigentes.count()
     
-    from django.db.models import Max
-    latest_ids = PrestacaoContas.objects.filter(
-        mes_referencia=mes,
-        ano_referencia=ano,
-        contrato__in=contratos_vigentes
-    ).values('contrato_id').annotate(max_id=Max('id')).values_list('max_id', flat=True)
+    prestacoes_filtradas = _ultimas_prestacoes(ano, mes).filter(contrato__in=contratos_vigentes)
     
-    prestacoes_filtradas = PrestacaoContas.objects.filter(id__in=latest_ids)
-    
-    ok = prestacoes_filtradas.filter(status='ok').count()
-    entregues = prestacoes_filtradas.filter(status='entregue').count()
-    correcao = prestacoes_filtradas.filter(status='correcao').count()
+    contagem = _agregar_status(prestacoes_filtradas)
+    ok = contagem['ok']
+    entregues = contagem['entregue']
+    correcao = contagem['correcao']
     # Pendentes são os contratos sem nenhuma entrega OU com entrega em status pendente
     pendentes = total_contratos - (ok + entregues + correcao)
     
-    prio_ok = prestacoes_filtradas.filter(status='ok', compor_apresentacao=True).count()
-    prio_entregues = prestacoes_filtradas.filter(status='entregue', compor_apresentacao=True).count()
-    prio_correcao = prestacoes_filtradas.filter(status='correcao', compor_apresentacao=True).count()
-    prio_pendentes = prestacoes_filtradas.filter(status='pendente', compor_apresentacao=True).count()
+    prio_ok = contagem['prio_ok']
+    prio_entregues = contagem['prio_entregue']
+    prio_correcao = contagem['prio_correcao']
+    prio_pendentes = contagem['prio_pendente']
     
     # Lista ordenada de gestores prioritários
     lista_gestores_prio = prestacoes_filtradas.filter(
@@ -257,22 +282,18 @@ def _get_dashboard_stats(ano, mes):
         
     # Estatísticas de Setores
     total_setores = Setor.objects.count()
-    latest_setor_ids = PrestacaoContasSetor.objects.filter(
-        mes_referencia=mes,
-        ano_referencia=ano
-    ).values('setor_id').annotate(max_id=Max('id')).values_list('max_id', flat=True)
-    
-    prestacoes_setor_filtradas = PrestacaoContasSetor.objects.filter(id__in=latest_setor_ids)
+    prestacoes_setor_filtradas = _ultimas_prestacoes_setor(ano, mes)
     
-    ok_setores = prestacoes_setor_filtradas.filter(status='ok').count()
-    entregues_setores = prestacoes_setor_filtradas.filter(status='entregue').count()
-    correcao_setores = prestacoes_setor_filtradas.filter(status='correcao').count()
+    contagem_setores = _agregar_status(prestacoes_setor_filtradas)
+    ok_setores = contagem_setores['ok']
+    entregues_setores = contagem_setores['entregue']
+    correcao_setores = contagem_setores['correcao']
     pendentes_setores = total_setores - (ok_setores + entregues_setores + correcao_setores)
     
-    prio_ok_setores = prestacoes_setor_filtradas.filter(status='ok', compor_apresentacao=True).count()
-    prio_entregues_setores = prestacoes_setor_filtradas.filter(status='entregue', compor_apresentacao=True).count()
-    prio_correcao_setores = prestacoes_setor_filtradas.filter(status='correcao', compor_apresentacao=True).count()
-    prio_pendentes_setores = prestacoes_setor_filtradas.filter(status='pendente', compor_apresentacao=True).count()
+    prio_ok_setores = contagem_setores['prio_ok']
+    prio_entregues_setores = contagem_setores['prio_entregue']
+    prio_correcao_setores = contagem_setores['prio_correcao']
+    prio_pendentes_setores = contagem_setores['prio_pendente']
     
     # Lista ordenada de gestores de setores prioritários
     lista_gestores_setores = prestacoes_setor_filtradas.filter(
@@ -385,6 +406,7 @@ def dashboard_prestacao(request):
     ).order_by('numero')
     
     todas_prestacoes = PrestacaoContas.objects.filter(
+        ponteiro__isnull=False,
         ano_referencia__gte=ultimos_3_meses[0][0],
         contrato__in=contratos_vigentes
     ).order_by('id')
@@ -415,6 +437,7 @@ def dashboard_prestacao(request):
     # Busca todas as prestações dos setores dos últimos 3 meses
     setores = Setor.objects.all().order_by('nome')
     todas_prestacoes_setores = PrestacaoContasSetor.objects.filter(
+        ponteiro__isnull=False,
         ano_referencia__gte=ultimos_3_meses[0][0]
     ).order_by('id')
     
@@ -487,11 +510,8 @@ def download_prestacao(request, pk):
     caminho = prestacao.arquivo.path
     if not os.path.exists(caminho):
         raise Http404("Arquivo físico não encontrado no servidor.")
-        
-    with open(caminho, 'rb') as pdf:
-        response = HttpResponse(pdf.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{os.path.basename(caminho)}"'
-        return response
+
+    return servir_arquivo_protegido(request, caminho)
 
 
 @admin_required
@@ -571,7 +591,8 @@ def exportar_prestacao_csv(request):
         vigencia_fim__gte=hoje
     ).order_by('numero').select_related('empresa').prefetch_related(
         Prefetch('comissoes', queryset=Comissao.objects.filter(tipo='FISCALIZACAO', ativa=True).prefetch_related(
-            Prefetch('integrantes', queryset=Integrante.objects.select_related('agente', 'agente__posto', 'funcao', 'posto_graduacao'))
+            Prefetch('integrantes', queryset=Integrante.objects.ativos(hoje).select_related('agente', 'agente__posto', 'funcao', 'posto_graduacao'),
+                     to_attr='integrantes_ativos')
         ))
     )
 
@@ -579,7 +600,9 @@ def exportar_prestacao_csv(request):
     from contratos.models import CalendarioPrestacao
 
     # Obter IDs das prestações mais recentes por contrato (pode haver múltiplos envios por período)
-    # Exclui registros com status 'pendente' que são registros sem envio efetivo (sem arquivo/agente)
+    # Exclui registros com status 'pendente' que são registros sem envio efetivo (sem arquivo/agente).
+    # Não usa o ponteiro UltimaPrestacao: ele aponta para o registro mais recente, mesmo pendente,
+    # e aqui interessa o último envio efetivo
     latest_ids = PrestacaoContas.objects.filter(
         mes_referencia=filtro_mes,
         ano_referencia=filtro_ano,
@@ -625,68 +648,68 @@ def exportar_prestacao_csv(request):
         'Observações do Fiscal',
         'Motivo da Correção'
     ]
-    data = []
-
-    for c in contratos_vigentes:
-        fiscal_oficial = "-"
-        comissao = c.comissoes.first()
-        if comissao:
-            integrantes_ativos = [i for i in comissao.integrantes.all() if i.is_ativo]
-            if integrantes_ativos:
-                principal = next((i for i in integrantes_ativos if 'presidente' in i.funcao.titulo.lower()), None)
-                if not principal:
-                    principal = integrantes_ativos[0]
-                posto = principal.posto_graduacao.sigla if principal.posto_graduacao else principal.agente.posto.sigla
-                fiscal_oficial = f"{posto} {principal.agente.nome_de_guerra}"
-
-        p = prestacoes_map.get(c.id)
-        
-        primeiro_envio_dt = primeiras_entregas_map.get(c.id)
-        if primeiro_envio_dt:
-            primeiro_envio_str = timezone.localtime(primeiro_envio_dt).strftime("%d/%m/%Y %H:%M")
-            if data_entrega_limite:
-                dt_localtime = timezone.localtime(primeiro_envio_dt).date()
-                status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+    def linhas():
+        for c in contratos_vigentes:
+            fiscal_oficial = "-"
+            comissao = c.comissoes.first()
+            if comissao:
+                integrantes_ativos = comissao.integrantes_ativos
+                if integrantes_ativos:
+                    principal = next((i for i in integrantes_ativos if 'presidente' in i.funcao.titulo.lower()), None)
+                    if not principal:
+                        principal = integrantes_ativos[0]
+                    posto = principal.posto_graduacao.sigla if principal.posto_graduacao else principal.agente.posto.sigla
+                    fiscal_oficial = f"{posto} {principal.agente.nome_de_guerra}"
+
+            p = prestacoes_map.get(c.id)
+
+            primeiro_envio_dt = primeiras_entregas_map.get(c.id)
+            if primeiro_envio_dt:
+                primeiro_envio = primeiro_envio_dt
+                if data_entrega_limite:
+                    dt_localtime = timezone.localtime(primeiro_envio_dt).date()
+                    status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+                else:
+                    status_primeiro_envio = '-'
             else:
+                primeiro_envio = '-'
                 status_primeiro_envio = '-'
-        else:
-            primeiro_envio_str = '-'
-            status_primeiro_envio = '-'
-
-        if p:
-            situacao = p.get_status_display()
-            responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
-            data_envio = timezone.localtime(p.data_envio).strftime("%d/%m/%Y %H:%M")
-            observacao = p.observacao or '-'
-            apontamento = p.apontamentos.first()
-            motivo_correcao = apontamento.descricao if apontamento else '-'
-        else:
-            situacao = 'Pendente'
-            responsavel = '-'
-            data_envio = '-'
-            observacao = '-'
-            motivo_correcao = '-'
-
-        data.append([
-            c.numero,
-            c.pag or '-',
-            c.get_tipo_display(),
-            c.objeto,
-            c.vigencia_inicio.strftime("%d/%m/%Y"),
-            c.vigencia_fim.strftime("%d/%m/%Y"),
-            float(c.valor_total),
-            c.empresa.razao_social,
-            c.empresa.cnpj,
-            situacao,
-            fiscal_oficial,
-            responsavel,
-            data_envio,
-            primeiro_envio_str,
-            status_primeiro_envio,
-            observacao,
-            motivo_correcao
-        ])
 
+            if p:
+                situacao = p.get_status_display()
+                responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
+                data_envio = p.data_envio
+                observacao = p.observacao or '-'
+                apontamento = p.apontamentos.first()
+                motivo_correcao = apontamento.descricao if apontamento else '-'
+            else:
+                situacao = 'Pendente'
+                responsavel = '-'
+                data_envio = '-'
+                observacao = '-'
+                motivo_correcao = '-'
+
+            yield [
+                c.numero,
+                c.pag or '-',
+                c.get_tipo_display(),
+                c.objeto,
+                c.vigencia_inicio,
+                c.vigencia_fim,
+                c.valor_total,
+                c.empresa.razao_social,
+                c.empresa.cnpj,
+                situacao,
+                fiscal_oficial,
+                responsavel,
+                data_envio,
+                primeiro_envio,
+                status_primeiro_envio,
+                observacao,
+                motivo_correcao
+            ]
+
+    data = linhas()
     nome_arquivo = f"prestacao_contas_{filtro_mes:02d}_{filtro_ano}"
     return export_csv_or_xlsx(request, nome_arquivo, headers, data)
 
@@ -728,15 +751,16 @@ def alterar_status_prestacao(request, pk, novo_status):
         messages.error(request, "A justificativa de correção é obrigatória.")
         return redirect('dashboard_prestacao')
 
-    prestacao.status = novo_status
-    prestacao.save()
+    with transaction.atomic():
+        prestacao.status = novo_status
+        prestacao.save()
 
-    if novo_status == 'correcao':
-        ApontamentoCorrecao.objects.create(
-            prestacao=prestacao,
-            autor=request.user,
-            descricao=justificativa
-        )
+        if novo_status == 'correcao':
+            ApontamentoCorrecao.objects.create(
+                prestacao=prestacao,
+                autor=request.user,
+                descricao=justificativa
+            )
 
     if is_ajax:
         # Se for AJAX, não inserimos a mensagem de sucesso para não poluir futuras páginas
@@ -811,17 +835,19 @@ def toggle_apresentacao_prestacao(request):
                 ano_referencia=ano
             )
             
-            if prestacoes.exists():
-                prestacoes.update(compor_apresentacao=checked)
-                prestacao = prestacoes.order_by('-id').first()
-            else:
-                prestacao = PrestacaoContas.objects.create(
-                    contrato=contrato,
-                    mes_referencia=mes,
-                    ano_referencia=ano,
-                    status='pendente',
-                    compor_apresentacao=checked
-                )
+            with transaction.atomic():
+                if prestacoes.exists():
+                    prestacoes.update(compor_apresentacao=checked)
+                    versoes.incrementar('prestacoes')
+                    prestacao = prestacoes.order_by('-id').first()
+                else:
+                    prestacao = PrestacaoContas.objects.create(
+                        contrato=contrato,
+                        mes_referencia=mes,
+                        ano_referencia=ano,
+                        status='pendente',
+                        compor_apresentacao=checked
+                    )
             
             dashboard_mes = data.get('dashboard_mes')
             dashboard_ano = data.get('dashboard_ano')
@@ -884,17 +910,19 @@ def toggle_apresentacao_prestacao_setor(request):
                 ano_referencia=ano
             )
             
-            if prestacoes.exists():
-                prestacoes.update(compor_apresentacao=checked)
-                prestacao = prestacoes.order_by('-id').first()
-            else:
-                prestacao = PrestacaoContasSetor.objects.create(
-                    setor=setor,
-                    mes_referencia=mes,
-                    ano_referencia=ano,
-                    status='pendente',
-                    compor_apresentacao=checked
-                )
+            with transaction.atomic():
+                if prestacoes.exists():
+                    prestacoes.update(compor_apresentacao=checked)
+                    versoes.incrementar('prestacoes')
+                    prestacao = prestacoes.order_by('-id').first()
+                else:
+                    prestacao = PrestacaoContasSetor.objects.create(
+                        setor=setor,
+                        mes_referencia=mes,
+                        ano_referencia=ano,
+                        status='pendente',
+                        compor_apresentacao=checked
+                    )
             
             dashboard_mes = data.get('dashboard_mes')
             dashboard_ano = data.get('dashboard_ano')
@@ -922,222 +950,145 @@ def toggle_apresentacao_prestacao_setor(request):
     return JsonResponse({'success': False, 'error': 'Método inválido'}, status=405)
 
 
-@auditor_required
-def consolidar_apresentacao(request):
-    """Consolida todos os slides prioritários em conformidade em um único PDF para download."""
-    import io
-    from pypdf import PdfWriter, PdfReader
-
+def _filtro_mes_ano_consolidacao(request):
     hoje = date.today()
+    params = request.POST if request.method == 'POST' else request.GET
 
     try:
-        filtro_mes = int(request.GET.get('mes', hoje.month))
+        filtro_mes = int(params.get('mes', hoje.month))
     except (ValueError, TypeError):
         filtro_mes = hoje.month
 
     try:
-        raw_ano = request.GET.get('ano', str(hoje.year)).replace('.', '')
+        raw_ano = params.get('ano', str(hoje.year)).replace('.', '')
         filtro_ano = int(raw_ano)
     except (ValueError, TypeError):
         filtro_ano = hoje.year
 
-    contratos_vigentes = Contrato.objects.filter(
-        vigencia_inicio__lte=hoje,
-        vigencia_fim__gte=hoje
-    )
+    return filtro_mes, filtro_ano
 
-    # Filtrar apenas o registro mais recente por contrato (mesma lógica do dashboard)
-    latest_ids = PrestacaoContas.objects.filter(
-        mes_referencia=filtro_mes,
-        ano_referencia=filtro_ano,
-        contrato__in=contratos_vigentes
-    ).values('contrato_id').annotate(max_id=Max('id')).values_list('max_id', flat=True)
 
-    prestacoes = list(PrestacaoContas.objects.filter(
-        id__in=latest_ids,
-        compor_apresentacao=True,
-        status='ok'
-    ).select_related('agente', 'agente__posto', 'contrato').order_by(
-        'agente__posto__senioridade', 'agente__ordem_manual', 'agente__nome_de_guerra'
-    ))
-
-    slides_avulsos = list(SlideApresentacao.objects.filter(
-        tipo_apresentacao='fiscais',
-        ano_referencia=filtro_ano,
-        mes_referencia=filtro_mes
-    ).order_by('indice_posicao', 'data_registro'))
+def _responder_consolidacao(request, tipo_apresentacao, itens, filtro_mes, filtro_ano, sufixo_redirect=''):
+    """
+    Obtém o PDF consolidado (do cache ou gerado em arquivo temporário) e o devolve via
+    FileResponse, com tempo de geração, pico de memória e uso do cache nos cabeçalhos.
+    """
+    qs = urlencode({'mes': filtro_mes, 'ano': filtro_ano})
 
-    if not prestacoes and not slides_avulsos:
+    if not itens:
         messages.warning(request, "Nenhum slide em conformidade para consolidar.")
-        qs = urlencode({'mes': filtro_mes, 'ano': filtro_ano})
-        return redirect(f"{reverse('dashboard_prestacao')}?{qs}")
+        return redirect(f"{reverse('dashboard_prestacao')}?{qs}{sufixo_redirect}")
 
-    # Mescla as listas usando o indice_posicao
-    itens_consolidados = prestacoes.copy()
-    for s in slides_avulsos:
-        idx = int(s.indice_posicao)
-        if idx > len(itens_consolidados):
-            idx = len(itens_consolidados)
-        itens_consolidados.insert(idx, s)
-
-    writer = PdfWriter()
-    erros = []
-
-    for item in itens_consolidados:
-        is_slide_avulso = isinstance(item, SlideApresentacao)
-        
-        if not item.arquivo:
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}' sem arquivo.")
-            else:
-                erros.append(f"Contrato {item.contrato.numero}: registro sem arquivo.")
-            continue
-
-        caminho = item.arquivo.path
-        if not os.path.isfile(caminho):
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}': arquivo não encontrado no servidor.")
-            else:
-                erros.append(f"Contrato {item.contrato.numero}: arquivo não encontrado no servidor.")
-            continue
-
-        try:
-            reader = PdfReader(caminho)
-            for page in reader.pages:
-                writer.add_page(page)
-        except Exception as e:
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}': erro ao ler PDF ({e}).")
-            else:
-                erros.append(f"Contrato {item.contrato.numero}: erro ao ler PDF ({e}).")
+    arquivo, total_paginas, erros, metricas = obter_pdf_consolidado(itens)
 
-    if erros:
-        for erro in erros:
-            messages.warning(request, erro)
+    for erro in erros:
+        messages.warning(request, erro)
 
-    if len(writer.pages) == 0:
+    if total_paginas == 0:
+        arquivo.close()
         messages.error(request, "Nenhuma página válida encontrada para consolidar.")
-        qs = urlencode({'mes': filtro_mes, 'ano': filtro_ano})
-        return redirect(f"{reverse('dashboard_prestacao')}?{qs}")
+        return redirect(f"{reverse('dashboard_prestacao')}?{qs}{sufixo_redirect}")
 
-    buffer = io.BytesIO()
-    writer.write(buffer)
-    buffer.seek(0)
+    response = FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=nome_arquivo_consolidado(tipo_apresentacao, filtro_ano, filtro_mes),
+        content_type='application/pdf'
+    )
+    return aplicar_cabecalhos_metricas(response, metricas)
 
-    meses_nomes = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-    nome_mes = meses_nomes[filtro_mes - 1] if 1 <= filtro_mes <= 12 else str(filtro_mes)
-    nome_arquivo = f"Apresentacao_Consolidada_{nome_mes}_{filtro_ano}.pdf"
 
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
-    return response
+@auditor_required
+def consolidar_apresentacao(request):
+    """Consolida todos os slides prioritários em conformidade em um único PDF para download."""
+    filtro_mes, filtro_ano = _filtro_mes_ano_consolidacao(request)
+
+    # Apenas o registro mais recente por contrato vigente (mesma lógica do dashboard)
+    itens = itens_consolidacao('fiscais', filtro_ano, filtro_mes)
+    return _responder_consolidacao(request, 'fiscais', itens, filtro_mes, filtro_ano)
 
 
 @auditor_required
 def consolidar_apresentacao_setor(request):
     """Consolida todos os slides de setores em conformidade em um único PDF para download."""
-    import io
-    import os
-    from urllib.parse import urlencode
-    from pypdf import PdfWriter, PdfReader
-
-    hoje = date.today()
-
-    try:
-        filtro_mes = int(request.GET.get('mes', hoje.month))
-    except (ValueError, TypeError):
-        filtro_mes = hoje.month
-
-    try:
-        raw_ano = request.GET.get('ano', str(hoje.year)).replace('.', '')
-        filtro_ano = int(raw_ano)
-    except (ValueError, TypeError):
-        filtro_ano = hoje.year
-
-    # Filtrar apenas o registro mais recente por setor (mesma lógica do dashboard)
-    latest_setor_ids = PrestacaoContasSetor.objects.filter(
-        mes_referencia=filtro_mes,
-        ano_referencia=filtro_ano
-    ).values('setor_id').annotate(max_id=Max('id')).values_list('max_id', flat=True)
-
-    prestacoes = list(PrestacaoContasSetor.objects.filter(
-        id__in=latest_setor_ids,
-        compor_apresentacao=True,
-        status='ok'
-    ).select_related('agente', 'agente__posto', 'setor').order_by(
-        'agente__posto__senioridade', 'agente__ordem_manual', 'agente__nome_de_guerra'
-    ))
-
-    slides_avulsos = list(SlideApresentacao.objects.filter(
-        tipo_apresentacao='gestores',
-        ano_referencia=filtro_ano,
-        mes_referencia=filtro_mes
-    ).order_by('indice_posicao', 'data_registro'))
-
-    if not prestacoes and not slides_avulsos:
-        messages.warning(request, "Nenhum slide em conformidade para consolidar.")
-        qs = urlencode({'mes': filtro_mes, 'ano': filtro_ano})
-        return redirect(f"{reverse('dashboard_prestacao')}?{qs}&tab=setores")
-
-    # Mescla as listas usando o indice_posicao
-    itens_consolidados = prestacoes.copy()
-    for s in slides_avulsos:
-        idx = int(s.indice_posicao)
-        if idx > len(itens_consolidados):
-            idx = len(itens_consolidados)
-        itens_consolidados.insert(idx, s)
-
-    writer = PdfWriter()
-    erros = []
-
-    for item in itens_consolidados:
-        is_slide_avulso = isinstance(item, SlideApresentacao)
-
-        if not item.arquivo:
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}' sem arquivo.")
-            else:
-                erros.append(f"Setor {item.setor.sigla or item.setor.nome}: registro sem arquivo.")
-            continue
+    filtro_mes, filtro_ano = _filtro_mes_ano_consolidacao(request)
+
+    # Apenas o registro mais recente por setor (mesma lógica do dashboard)
+    itens = itens_consolidacao('gestores', filtro_ano, filtro_mes)
+    return _responder_consolidacao(request, 'gestores', itens, filtro_mes, filtro_ano, sufixo_redirect='&tab=setores')
+
+
+def _progresso_tarefa(tarefa):
+    dados = {
+        'success': True,
+        'tarefa_id': tarefa.pk,
+        'status': tarefa.status,
+        'status_display': tarefa.get_status_display(),
+        'arquivos_total': tarefa.arquivos_total,
+        'arquivos_processados': tarefa.arquivos_processados,
+        'paginas_mescladas': tarefa.paginas_mescladas,
+        'erros': tarefa.lista_erros,
+        'url_progresso': reverse('progresso_consolidacao', args=[tarefa.pk]),
+        'url_download': None,
+    }
+    if tarefa.status == 'concluida' and caminho_pdf_tarefa(tarefa):
+        dados['url_download'] = reverse('download_consolidacao', args=[tarefa.pk])
+    return dados
 
-        caminho = item.arquivo.path
-        if not os.path.isfile(caminho):
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}': arquivo não encontrado no servidor.")
-            else:
-                erros.append(f"Setor {item.setor.sigla or item.setor.nome}: arquivo não encontrado no servidor.")
-            continue
 
-        try:
-            reader = PdfReader(caminho)
-            for page in reader.pages:
-                writer.add_page(page)
-        except Exception as e:
-            if is_slide_avulso:
-                erros.append(f"Slide avulso '{item.nome_slide}': erro ao ler PDF ({e}).")
-            else:
-                erros.append(f"Setor {item.setor.sigla or item.setor.nome}: erro ao ler PDF ({e}).")
+@auditor_required
+@require_POST
+def solicitar_consolidacao(request):
+    """
+    Enfileira a consolidação da apresentação para o worker (run_worker).
+    Reaproveita uma tarefa ainda não finalizada do mesmo tipo e mês.
+    """
+    tipo_apresentacao = request.POST.get('tipo', 'fiscais')
+    if tipo_apresentacao not in dict(TarefaConsolidacao.TIPO_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Tipo de apresentação inválido.'}, status=400)
+
+    filtro_mes, filtro_ano = _filtro_mes_ano_consolidacao(request)
+
+    with transaction.atomic():
+        tarefa = TarefaConsolidacao.objects.filter(
+            tipo_apresentacao=tipo_apresentacao,
+            ano_referencia=filtro_ano,
+            mes_referencia=filtro_mes,
+            status__in=['pendente', 'processando'],
+        ).first()
+        if tarefa is None:
+            tarefa = TarefaConsolidacao.objects.create(
+                tipo_apresentacao=tipo_apresentacao,
+                ano_referencia=filtro_ano,
+                mes_referencia=filtro_mes,
+                solicitante=request.user,
+            )
 
-    if erros:
-        for erro in erros:
-            messages.warning(request, erro)
+    return JsonResponse(_progresso_tarefa(tarefa), status=202)
 
-    if len(writer.pages) == 0:
-        messages.error(request, "Nenhuma página válida encontrada para consolidar.")
-        qs = urlencode({'mes': filtro_mes, 'ano': filtro_ano})
-        return redirect(f"{reverse('dashboard_prestacao')}?{qs}&tab=setores")
 
-    buffer = io.BytesIO()
-    writer.write(buffer)
-    buffer.seek(0)
+@auditor_required
+def progresso_consolidacao(request, pk):
+    """Progresso da tarefa de consolidação em JSON (consultado periodicamente pelo dashboard)."""
+    tarefa = get_object_or_404(TarefaConsolidacao, pk=pk)
+    return JsonResponse(_progresso_tarefa(tarefa))
 
-    meses_nomes = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-    nome_mes = meses_nomes[filtro_mes - 1] if 1 <= filtro_mes <= 12 else str(filtro_mes)
-    nome_arquivo = f"Apresentacao_Consolidada_Setores_{nome_mes}_{filtro_ano}.pdf"
 
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
-    return response
+@auditor_required
+def download_consolidacao(request, pk):
+    """Download do PDF gerado por uma tarefa de consolidação concluída."""
+    tarefa = get_object_or_404(TarefaConsolidacao, pk=pk, status='concluida')
+
+    caminho = caminho_pdf_tarefa(tarefa)
+    if caminho is None:
+        raise Http404("Arquivo consolidado não encontrado no servidor. Solicite a consolidação novamente.")
+
+    return servir_arquivo_protegido(
+        request,
+        caminho,
+        filename=nome_arquivo_consolidado(tarefa.tipo_apresentacao, tarefa.ano_referencia, tarefa.mes_referencia),
+        as_attachment=True,
+    )
 
 
 @login_required
@@ -1158,7 +1109,8 @@ def reordenar_gestores_prio(request):
         # O array agente_ids vem na ordem estabelecida via drag-and-drop
         for index, agente_id in enumerate(agente_ids):
             Agente.objects.filter(id=agente_id).update(ordem_manual=float(index))
-            
+        versoes.incrementar('contratos')
+
         return JsonResponse({'status': 'success', 'message': 'Ordem atualizada com sucesso.'})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
@@ -1176,7 +1128,7 @@ def exportar_historico_prestacao_csv(request):
     prestacoes = PrestacaoContas.objects.exclude(status='pendente').select_related(
         'contrato', 'contrato__empresa', 'agente', 'agente__posto'
     ).prefetch_related(
-        Prefetch('apontamentos', queryset=ApontamentoCorrecao.objects.order_by('-data_registro'))
+        Prefetch('apontamentos', queryset=ApontamentoCorrecao.objects.order_by('-data_registro'), to_attr='apontamentos_recentes')
     ).order_by('-data_envio')
     
     calendarios = CalendarioPrestacao.objects.all()
@@ -1205,45 +1157,46 @@ def exportar_historico_prestacao_csv(request):
         'Motivo da Correção'
     ]
     
-    data = []
-    for p in prestacoes:
-        responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
-        data_envio = timezone.localtime(p.data_envio).strftime("%d/%m/%Y %H:%M")
-        
-        primeiro_envio_dt = primeiros_envios_map.get((p.contrato_id, p.mes_referencia, p.ano_referencia))
-        if primeiro_envio_dt:
-            primeiro_envio_str = timezone.localtime(primeiro_envio_dt).strftime("%d/%m/%Y %H:%M")
-            data_entrega_limite = cal_map.get((p.mes_referencia, p.ano_referencia))
-            if data_entrega_limite:
-                dt_localtime = timezone.localtime(primeiro_envio_dt).date()
-                status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+    def linhas():
+        for p in prestacoes.iterator(chunk_size=2000):
+            responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
+            data_envio = p.data_envio
+
+            primeiro_envio_dt = primeiros_envios_map.get((p.contrato_id, p.mes_referencia, p.ano_referencia))
+            if primeiro_envio_dt:
+                primeiro_envio = primeiro_envio_dt
+                data_entrega_limite = cal_map.get((p.mes_referencia, p.ano_referencia))
+                if data_entrega_limite:
+                    dt_localtime = timezone.localtime(primeiro_envio_dt).date()
+                    status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+                else:
+                    status_primeiro_envio = '-'
             else:
+                primeiro_envio = '-'
                 status_primeiro_envio = '-'
-        else:
-            primeiro_envio_str = '-'
-            status_primeiro_envio = '-'
 
-        apontamento = p.apontamentos.first()
-        motivo_correcao = apontamento.descricao if apontamento else '-'
-        
-        data.append([
-            p.contrato.numero,
-            p.contrato.pag or '-',
-            p.contrato.get_tipo_display(),
-            p.contrato.objeto,
-            p.contrato.empresa.nome_exibicao,
-            p.contrato.empresa.cnpj,
-            f"{p.mes_referencia:02d}",
-            str(p.ano_referencia),
-            responsavel,
-            data_envio,
-            primeiro_envio_str,
-            status_primeiro_envio,
-            p.get_status_display(),
-            p.observacao or '-',
-            motivo_correcao
-        ])
-        
+            apontamento = p.apontamentos_recentes[0] if p.apontamentos_recentes else None
+            motivo_correcao = apontamento.descricao if apontamento else '-'
+
+            yield [
+                p.contrato.numero,
+                p.contrato.pag or '-',
+                p.contrato.get_tipo_display(),
+                p.contrato.objeto,
+                p.contrato.empresa.nome_exibicao,
+                p.contrato.empresa.cnpj,
+                f"{p.mes_referencia:02d}",
+                str(p.ano_referencia),
+                responsavel,
+                data_envio,
+                primeiro_envio,
+                status_primeiro_envio,
+                p.get_status_display(),
+                p.observacao or '-',
+                motivo_correcao
+            ]
+
+    data = linhas()
     nome_arquivo = "historico_prestacao_contas_completo"
     return export_csv_or_xlsx(request, nome_arquivo, headers, data)
 
@@ -1279,10 +1232,7 @@ def download_prestacao_setor(request, pk):
     if not prestacao.arquivo: raise Http404("Arquivo não encontrado no registro.")
     caminho = prestacao.arquivo.path
     if not os.path.exists(caminho): raise Http404("Arquivo físico não encontrado no servidor.")
-    with open(caminho, 'rb') as pdf:
-        response = HttpResponse(pdf.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{os.path.basename(caminho)}"'
-        return response
+    return servir_arquivo_protegido(request, caminho)
 
 @admin_required
 def excluir_prestacao_setor(request, pk):
@@ -1330,12 +1280,13 @@ def alterar_status_prestacao_setor(request, pk, novo_status):
         if is_ajax: return JsonResponse({'success': False, 'error': 'A justificativa é obrigatória.'}, status=400)
         messages.error(request, "A justificativa é obrigatória.")
         return redirect('dashboard_prestacao')
-    prestacao.status = novo_status
-    prestacao.save()
-    if novo_status == 'correcao':
-        ApontamentoCorrecaoSetor.objects.create(
-            prestacao=prestacao, autor=request.user, descricao=justificativa
-        )
+    with transaction.atomic():
+        prestacao.status = novo_status
+        prestacao.save()
+        if novo_status == 'correcao':
+            ApontamentoCorrecaoSetor.objects.create(
+                prestacao=prestacao, autor=request.user, descricao=justificativa
+            )
     if is_ajax:
         return JsonResponse({
             'success': True,
@@ -1378,7 +1329,8 @@ def exportar_prestacao_setor_csv(request):
     from django.db.models import Max, Min
     from contratos.models import CalendarioPrestacao
 
-    # Obter IDs das prestações mais recentes por setor
+    # Obter IDs das prestações mais recentes por setor, ignorando os registros pendentes
+    # (sem o ponteiro UltimaPrestacaoSetor, que pode apontar para um registro pendente)
     latest_ids = PrestacaoContasSetor.objects.filter(
         mes_referencia=filtro_mes,
         ano_referencia=filtro_ano,
@@ -1417,57 +1369,57 @@ def exportar_prestacao_setor_csv(request):
         'Observações do Gestor',
         'Motivo da Correção'
     ]
-    data = []
-
-    for s in setores:
-        p = prestacoes_map.get(s.id)
-        
-        primeiro_envio_dt = primeiras_entregas_map.get(s.id)
-        if primeiro_envio_dt:
-            primeiro_envio_str = timezone.localtime(primeiro_envio_dt).strftime("%d/%m/%Y %H:%M")
-            if data_entrega_limite:
-                dt_localtime = timezone.localtime(primeiro_envio_dt).date()
-                status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+    def linhas():
+        for s in setores:
+            p = prestacoes_map.get(s.id)
+
+            primeiro_envio_dt = primeiras_entregas_map.get(s.id)
+            if primeiro_envio_dt:
+                primeiro_envio = primeiro_envio_dt
+                if data_entrega_limite:
+                    dt_localtime = timezone.localtime(primeiro_envio_dt).date()
+                    status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+                else:
+                    status_primeiro_envio = '-'
             else:
+                primeiro_envio = '-'
                 status_primeiro_envio = '-'
-        else:
-            primeiro_envio_str = '-'
-            status_primeiro_envio = '-'
-
-        if p:
-            situacao = p.get_status_display()
-            responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
-            data_envio = timezone.localtime(p.data_envio).strftime("%d/%m/%Y %H:%M")
-            observacao = p.observacao or '-'
-            apontamento = p.apontamentos.first()
-            motivo_correcao = apontamento.descricao if apontamento else '-'
-        else:
-            situacao = 'Pendente'
-            responsavel = '-'
-            data_envio = '-'
-            observacao = '-'
-            motivo_correcao = '-'
-
-        cargos = s.cargos.select_related('agente', 'agente__posto').all()
-        if cargos.exists():
-            gestores = [f"{c.agente.posto.sigla} {c.agente.nome_de_guerra}" for c in cargos if c.agente]
-            responsavel_setor = ", ".join(gestores)
-        else:
-            responsavel_setor = "Não informado"
-
-        data.append([
-            s.nome,
-            s.sigla,
-            responsavel_setor,
-            situacao,
-            responsavel,
-            data_envio,
-            primeiro_envio_str,
-            status_primeiro_envio,
-            observacao,
-            motivo_correcao
-        ])
 
+            if p:
+                situacao = p.get_status_display()
+                responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
+                data_envio = p.data_envio
+                observacao = p.observacao or '-'
+                apontamento = p.apontamentos.first()
+                motivo_correcao = apontamento.descricao if apontamento else '-'
+            else:
+                situacao = 'Pendente'
+                responsavel = '-'
+                data_envio = '-'
+                observacao = '-'
+                motivo_correcao = '-'
+
+            cargos = s.cargos.select_related('agente', 'agente__posto').all()
+            if cargos.exists():
+                gestores = [f"{c.agente.posto.sigla} {c.agente.nome_de_guerra}" for c in cargos if c.agente]
+                responsavel_setor = ", ".join(gestores)
+            else:
+                responsavel_setor = "Não informado"
+
+            yield [
+                s.nome,
+                s.sigla,
+                responsavel_setor,
+                situacao,
+                responsavel,
+                data_envio,
+                primeiro_envio,
+                status_primeiro_envio,
+                observacao,
+                motivo_correcao
+            ]
+
+    data = linhas()
     nome_arquivo = f"prestacao_contas_setores_{filtro_mes:02d}_{filtro_ano}"
     return export_csv_or_xlsx(request, nome_arquivo, headers, data)
 
@@ -1484,7 +1436,7 @@ def exportar_historico_prestacao_setor_csv(request):
     prestacoes = PrestacaoContasSetor.objects.exclude(status='pendente').select_related(
         'setor', 'agente', 'agente__posto'
     ).prefetch_related(
-        Prefetch('apontamentos', queryset=ApontamentoCorrecaoSetor.objects.order_by('-data_registro'))
+        Prefetch('apontamentos', queryset=ApontamentoCorrecaoSetor.objects.order_by('-data_registro'), to_attr='apontamentos_recentes')
     ).order_by('-data_envio')
     
     calendarios = CalendarioPrestacao.objects.all()
@@ -1509,41 +1461,42 @@ def exportar_historico_prestacao_setor_csv(request):
         'Motivo da Correção'
     ]
     
-    data = []
-    for p in prestacoes:
-        responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
-        data_envio = timezone.localtime(p.data_envio).strftime("%d/%m/%Y %H:%M")
-        
-        primeiro_envio_dt = primeiros_envios_map.get((p.setor_id, p.mes_referencia, p.ano_referencia))
-        if primeiro_envio_dt:
-            primeiro_envio_str = timezone.localtime(primeiro_envio_dt).strftime("%d/%m/%Y %H:%M")
-            data_entrega_limite = cal_map.get((p.mes_referencia, p.ano_referencia))
-            if data_entrega_limite:
-                dt_localtime = timezone.localtime(primeiro_envio_dt).date()
-                status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+    def linhas():
+        for p in prestacoes.iterator(chunk_size=2000):
+            responsavel = f"{p.agente.posto.sigla} {p.agente.nome_de_guerra}" if p.agente else "Não informado"
+            data_envio = p.data_envio
+
+            primeiro_envio_dt = primeiros_envios_map.get((p.setor_id, p.mes_referencia, p.ano_referencia))
+            if primeiro_envio_dt:
+                primeiro_envio = primeiro_envio_dt
+                data_entrega_limite = cal_map.get((p.mes_referencia, p.ano_referencia))
+                if data_entrega_limite:
+                    dt_localtime = timezone.localtime(primeiro_envio_dt).date()
+                    status_primeiro_envio = 'Atraso' if dt_localtime > data_entrega_limite else 'Ok'
+                else:
+                    status_primeiro_envio = '-'
             else:
+                primeiro_envio = '-'
                 status_primeiro_envio = '-'
-        else:
-            primeiro_envio_str = '-'
-            status_primeiro_envio = '-'
 
-        apontamento = p.apontamentos.first()
-        motivo_correcao = apontamento.descricao if apontamento else '-'
-        
-        data.append([
-            p.setor.nome,
-            p.setor.sigla,
-            f"{p.mes_referencia:02d}",
-            str(p.ano_referencia),
-            responsavel,
-            data_envio,
-            primeiro_envio_str,
-            status_primeiro_envio,
-            p.get_status_display(),
-            p.observacao or '-',
-            motivo_correcao
-        ])
-        
+            apontamento = p.apontamentos_recentes[0] if p.apontamentos_recentes else None
+            motivo_correcao = apontamento.descricao if apontamento else '-'
+
+            yield [
+                p.setor.nome,
+                p.setor.sigla,
+                f"{p.mes_referencia:02d}",
+                str(p.ano_referencia),
+                responsavel,
+                data_envio,
+                primeiro_envio,
+                status_primeiro_envio,
+                p.get_status_display(),
+                p.observacao or '-',
+                motivo_correcao
+            ]
+
+    data = linhas()
     nome_arquivo = "historico_prestacao_contas_setores_completo"
     return export_csv_or_xlsx(request, nome_arquivo, headers, data)
 
@@ -1632,6 +1585,7 @@ def reordenar_slide_avulso(request):
         new_index = float(data.get('new_index'))
         
         SlideApresentacao.objects.filter(id=slide_id).update(indice_posicao=new_index)
+        versoes.incrementar('prestacoes')
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -1,57 +1,79 @@
 import csv
 import urllib.parse
 from datetime import date
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse, Http404
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q, Prefetch, Case, When, Value, IntegerField, Max
+from django.db.models import Prefetch, Case, When, Value, IntegerField, Max
 from contratos.models import Contrato, Comissao, Integrante, PrestacaoContas, ApontamentoCorrecao
-from contratos.utils import get_filtro_ativos, export_csv_or_xlsx
+from contratos import busca, sugestoes
+from contratos.utils import export_csv_or_xlsx
+from contratos.versoes import em_cache
 from contratos.forms import PrestacaoContasUploadForm
 
+RESULTADOS_POR_PAGINA = 20
+
 
 def pesquisa_publica(request):
     return render(request, 'contratos/pesquisa.html')
 
 
 def buscar_contratos(request):
+    """Busca textual (sem distinção de acentos) nos contratos vigentes, por relevância e paginada."""
     query = request.GET.get('q')
     contratos = []
-    
+    pagina = None
+
     if query:
-        filtro_integrante_ativo = get_filtro_ativos()
         hoje = date.today()
-        
-        contratos = Contrato.objects.filter(
-            Q(numero__icontains=query) |
-            Q(objeto__icontains=query) |
-            Q(empresa__razao_social__icontains=query) |
-            Q(empresa__nome_fantasia__icontains=query)
-        ).filter(
-            vigencia_fim__gte=hoje
-        ).prefetch_related(
+
+        resultados = busca.buscar_contratos(
+            query, Contrato.objects.filter(vigencia_fim__gte=hoje)
+        ).select_related('empresa').prefetch_related(
             Prefetch(
                 'comissoes',
                 queryset=Comissao.objects.filter(ativa=True).order_by('tipo').prefetch_related(
                     Prefetch('integrantes',
-                             queryset=Integrante.objects.filter(filtro_integrante_ativo).select_related('agente', 'funcao').order_by('ordem', 'funcao__titulo'))
+                             queryset=Integrante.objects.ativos(hoje).select_related(
+                                 'agente__posto', 'funcao', 'posto_graduacao'
+                             ).order_by('ordem', 'funcao__titulo'))
                 ),
                 to_attr='comissoes_vigentes'
             )
-        ).distinct().order_by('vigencia_fim')
+        ).order_by('-relevancia', 'vigencia_fim', 'numero')
+
+        pagina = Paginator(resultados, RESULTADOS_POR_PAGINA).get_page(request.GET.get('pagina'))
+        contratos = pagina.object_list
 
-    return render(request, 'contratos/resultado_busca.html', {'contratos': contratos, 'query': query})
+    return render(request, 'contratos/resultado_busca.html', {'contratos': contratos, 'query': query, 'pagina': pagina})
+
+
+def api_sugestoes(request, tipo=None):
+    """
+    Sugestões (JSON) para as caixas de busca: contratos, empresas e militares.
+    /api/sugestoes/?q=... consulta todos os tipos; /api/sugestoes/<tipo>/ apenas um.
+    """
+    if tipo is not None and tipo not in sugestoes.TIPOS:
+        raise Http404("Tipo de sugestão inválido.")
+    query = request.GET.get('q', '')
+    try:
+        limite = max(1, int(request.GET.get('limite', sugestoes.LIMITE_PADRAO)))
+    except (ValueError, TypeError):
+        limite = sugestoes.LIMITE_PADRAO
+
+    itens = sugestoes.sugerir(query, (tipo,) if tipo else sugestoes.TIPOS, limite)
+    return JsonResponse({'q': query, 'sugestoes': itens})
 
 
 def detalhe_contrato(request, contrato_id):
     hoje = date.today()
     contrato = get_object_or_404(Contrato, id=contrato_id, vigencia_fim__gte=hoje)
-    filtro_integrante_ativo = get_filtro_ativos() 
 
     # Busca apenas as comissões ativas e apenas os integrantes ativos
     comissoes_ativas = contrato.comissoes.filter(ativa=True).prefetch_related(
         Prefetch(
             'integrantes',
-            queryset=Integrante.objects.filter(filtro_integrante_ativo).select_related('agente', 'funcao').order_by('ordem', 'funcao__titulo'),
+            queryset=Integrante.objects.ativos(hoje).select_related('agente', 'funcao').order_by('ordem', 'funcao__titulo'),
             to_attr='integrantes_lista'
         )
     )
@@ -68,18 +90,21 @@ def detalhe_contrato(request, contrato_id):
 
 def relatorio_transparencia(request):
     hoje = date.today()
-    filtro_integrante_ativo = get_filtro_ativos()
 
-    contratos = Contrato.objects.filter(vigencia_fim__gte=hoje).prefetch_related(
-        Prefetch(
-            'comissoes',
-            queryset=Comissao.objects.filter(ativa=True).order_by('tipo').prefetch_related(
-                Prefetch('integrantes',
-                         queryset=Integrante.objects.filter(filtro_integrante_ativo).select_related('agente', 'funcao').order_by('ordem', 'funcao__titulo'))
-            ),
-            to_attr='comissoes_vigentes'
-        )
-    ).order_by('vigencia_fim')
+    def carregar_contratos():
+        return list(Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').prefetch_related(
+            Prefetch(
+                'comissoes',
+                queryset=Comissao.objects.filter(ativa=True).order_by('tipo').prefetch_related(
+                    Prefetch('integrantes',
+                             queryset=Integrante.objects.ativos(hoje).select_related('agente__posto', 'funcao', 'posto_graduacao').order_by('ordem', 'funcao__titulo'))
+                ),
+                to_attr='comissoes_vigentes'
+            )
+        ).order_by('vigencia_fim'))
+
+    # A lista depende da data (vigência e integrantes ativos) e só muda com os dados de contratos
+    contratos = em_cache(f'transparencia:{hoje.isoformat()}', ['contratos'], carregar_contratos)
 
     return render(request, 'contratos/relatorio_transparencia.html', {'contratos': contratos})
 
@@ -94,39 +119,46 @@ def exportar_transparencia_csv(request):
     ]
 
     hoje = date.today()
-    filtro_integrante_ativo = get_filtro_ativos()
-    contratos = Contrato.objects.filter(vigencia_fim__gte=hoje)
-    data = []
-
-    for contrato in contratos:
-        comissoes = contrato.comissoes.filter(ativa=True).order_by('tipo')
-        if comissoes.exists():
-            for com in comissoes:
-                for integrante in com.integrantes.filter(filtro_integrante_ativo):
-                    inicio = integrante.data_inicio.strftime('%d/%m/%Y') if integrante.data_inicio else "-"
-                    fim = integrante.data_fim.strftime('%d/%m/%Y') if integrante.data_fim else "Indeterminado"
-                    data_port = integrante.portaria_data.strftime('%d/%m/%Y') if integrante.portaria_data else "-"
-                    data_bol = integrante.boletim_data.strftime('%d/%m/%Y') if integrante.boletim_data else "-"
-                    posto = integrante.posto_graduacao.sigla if integrante.posto_graduacao else integrante.agente.posto.sigla
-
-                    data.append([
-                        contrato.numero,
-                        contrato.empresa.razao_social,
-                        contrato.vigencia_fim.strftime('%d/%m/%Y'),
-                        com.get_tipo_display(),
-                        integrante.funcao.titulo,
-                        posto,
-                        integrante.agente.nome_de_guerra,
-                        inicio,
-                        fim,
-                        integrante.portaria_numero,
-                        data_port,
-                        integrante.boletim_numero if integrante.boletim_numero else "-",
-                        data_bol
-                    ])
-        else:
-            data.append([contrato.numero, contrato.empresa.razao_social, contrato.vigencia_fim.strftime('%d/%m/%Y'),
-                             "SEM COMISSÃO"] + ["-"] * 9)
+    contratos = Contrato.objects.filter(vigencia_fim__gte=hoje).select_related('empresa').prefetch_related(
+        Prefetch(
+            'comissoes',
+            queryset=Comissao.objects.filter(ativa=True).order_by('tipo').prefetch_related(
+                Prefetch('integrantes',
+                         queryset=Integrante.objects.ativos(hoje).select_related(
+                             'agente', 'agente__posto', 'funcao', 'posto_graduacao'
+                         ))
+            ),
+            to_attr='comissoes_vigentes'
+        )
+    )
+
+    def linhas():
+        for contrato in contratos.iterator(chunk_size=500):
+            if contrato.comissoes_vigentes:
+                for com in contrato.comissoes_vigentes:
+                    for integrante in com.integrantes.all():
+                        posto = integrante.posto_graduacao.sigla if integrante.posto_graduacao else integrante.agente.posto.sigla
+
+                        yield [
+                            contrato.numero,
+                            contrato.empresa.razao_social,
+                            contrato.vigencia_fim,
+                            com.get_tipo_display(),
+                            integrante.funcao.titulo,
+                            posto,
+                            integrante.agente.nome_de_guerra,
+                            integrante.data_inicio or "-",
+                            integrante.data_fim or "Indeterminado",
+                            integrante.portaria_numero,
+                            integrante.portaria_data or "-",
+                            integrante.boletim_numero if integrante.boletim_numero else "-",
+                            integrante.boletim_data or "-"
+                        ]
+            else:
+                yield [contrato.numero, contrato.empresa.razao_social, contrato.vigencia_fim,
+                       "SEM COMISSÃO"] + ["-"] * 9
+
+    data = linhas()
 
     return export_csv_or_xlsx(request, 'contratos_gap_br', headers, data)
 
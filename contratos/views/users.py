@@ -4,7 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
-from contratos.utils import admin_required, is_admin
+from contratos.utils import admin_required, is_admin, invalidar_papeis
 
 @admin_required
 def listar_usuarios(request):
@@ -173,3 +173,5 @@ def update_user_group(user, perfil_code):
         user.groups.add(admin_group)
     elif perfil_code == 'auditor':
         user.groups.add(auditor_group)
+
+    invalidar_papeis(user)
@@ -178,6 +178,35 @@ LOGGING = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'mediafiles')
 
+# Cache das apresentações consolidadas (PDFs mesclados), com limite total em MB
+CONSOLIDACAO_CACHE_DIR = os.path.join(MEDIA_ROOT, 'cache_consolidacao')
+CONSOLIDACAO_CACHE_MAX_MB = int(os.getenv('CONSOLIDACAO_CACHE_MAX_MB', '200'))
+
+# Prefixo da location interna do Nginx para downloads autenticados (X-Accel-Redirect).
+# Vazio (padrão em desenvolvimento): o próprio Django transmite o arquivo.
+DOWNLOAD_X_ACCEL_REDIRECT = os.getenv('DOWNLOAD_X_ACCEL_REDIRECT', '')
+
+# Cache compartilhado entre os workers do Gunicorn, sem serviço externo: tabela no próprio
+# banco (criada pela migração 0037). Os resultados são indexados pelas versões dos dados
+# (contratos.versoes), então o tempo de expiração serve apenas para liberar espaço.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'contratos_cache',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 24 * 60 * 60)),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+}
+
+# Sugestões das caixas de busca (contratos.sugestoes): intervalo, em segundos, entre as
+# conferências da versão dos dados feitas por cada worker antes de reconstruir o índice
+SUGESTOES_INTERVALO_VERIFICACAO = int(os.getenv('SUGESTOES_INTERVALO_VERIFICACAO', '5'))
+
+# Diretório de destino dos backups (comando executar_backup)
+BACKUP_DIR = os.getenv('BACKUP_DIR', '/backups')
+# Dias de retenção dos snapshots da mídia; objetos sem referência são apagados junto
+BACKUP_MIDIA_RETER_DIAS = int(os.getenv('BACKUP_MIDIA_RETER_DIAS', '90'))
+
 # Limites de Upload (10 MB)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024
 DATA_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024
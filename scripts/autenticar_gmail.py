@@ -49,7 +49,7 @@ def main():
     print(f"📁 Arquivo salvo em: {token_out}")
     print("\nPróximos passos:")
     print("1. Mova credentials.json e token.json para a pasta secrets/ do servidor de produção")
-    print("2. Reinicie o container Docker (docker compose restart web cron)")
+    print("2. Reinicie o container Docker (docker compose restart web scheduler)")
 
 if __name__ == '__main__':
     main()